@@ -1,15 +1,25 @@
 from django.apps import apps
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from django.utils.html import format_html
+from django.template.response import TemplateResponse
 from django.urls import reverse
 from django.utils.safestring import mark_safe
+from django.db import transaction
+from django.db.models import Count
 
 # Import models
-from .models import Narrator, Hadith, Sanad, SanadNarrator, HadithCategory, HadithBook
-from .forms import HadithForm
+from .models import Narrator, NarratorAlias, Hadith, Sanad, SanadNarrator, HadithCategory, HadithBook, Job
+from .forms import (
+    HadithForm, BulkInlineFormSet, SanadNarratorAdminForm, SanadNarratorInlineForm, SanadNarratorInlineFormSet,
+)
+from .utils.hadith_utils import sanad_chain_prefetch
+from .utils.sanad_utils import resync_sanad_chains, sync_sanad_chain
+from .utils.narrator_utils import merge_narrators
 
 # Import the custom admin site
 from .admin_site import admin_site
@@ -66,6 +76,8 @@ if not admin_site.is_registered(get_user_model()):
 # Inline Admin Classes
 class SanadNarratorInline(admin.TabularInline):
     model = SanadNarrator
+    form = SanadNarratorInlineForm
+    formset = SanadNarratorInlineFormSet
     extra = 1
     verbose_name = _('راوي السند')
     verbose_name_plural = _('رواة السند')
@@ -76,17 +88,36 @@ class SanadNarratorInline(admin.TabularInline):
             kwargs['queryset'] = Narrator.objects.all().order_by('name')
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+class NarratorAliasInline(admin.TabularInline):
+    model = NarratorAlias
+    extra = 0
+    fields = ('name', 'created_at')
+    readonly_fields = ('created_at',)
+    verbose_name = _('اسم بديل')
+    verbose_name_plural = _('الأسماء البديلة')
+
+def chain_narrators(sanad):
+    """The narrators of a sanad in chain order, from ``sanad.chain`` when prefetched."""
+    links = getattr(sanad, 'chain', None)
+    if links is None:
+        links = sanad.sanadnarrator_set.select_related('narrator').order_by('order')
+    return [link.narrator for link in links]
+
 class SanadInline(admin.TabularInline):
     model = Sanad
+    formset = BulkInlineFormSet
     extra = 1
     show_change_link = True
     fields = ('is_mutawatir', 'narrators_list', 'created_at')
     readonly_fields = ('narrators_list', 'created_at')
     
     def narrators_list(self, obj):
-        return ", ".join([n.name for n in obj.narrators.all()])
+        return ", ".join([n.name for n in chain_narrators(obj)])
     narrators_list.short_description = _('الرواة')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).order_by('pk').prefetch_related(sanad_chain_prefetch())
+
 # Register models with the custom admin site
 @admin.register(Hadith, site=admin_site)
 class HadithAdmin(admin.ModelAdmin):
@@ -141,14 +172,19 @@ class SanadAdmin(admin.ModelAdmin):
     
     def narrators_list(self, obj):
         narrators = []
-        for narrator in obj.narrators.all():
+        for narrator in chain_narrators(obj):
             url = reverse('admin:hadith_app_narrator_change', args=[narrator.id])
             narrators.append(f'<a href="{url}">{narrator.name}</a>')
         return mark_safe(" → ".join(narrators))
     narrators_list.short_description = _('سلسلة الرواة')
     
     def get_queryset(self, request):
-        return super().get_queryset(request).select_related('hadith')
+        return super().get_queryset(request).select_related('hadith').prefetch_related(sanad_chain_prefetch())
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Inline edits change the chain; refresh its fingerprint and segment index
+        sync_sanad_chain(form.instance)
 
 @admin.register(HadithCategory, site=admin_site)
 class HadithCategoryAdmin(admin.ModelAdmin):
@@ -191,6 +227,8 @@ class NarratorAdmin(admin.ModelAdmin):
     list_display = ('name', 'birth_year', 'death_year', 'get_reliability_display', 'hadith_count')
     search_fields = ('name', 'biography')
     list_filter = ('reliability',)
+    inlines = [NarratorAliasInline]
+    actions = ['merge_selected']
     fieldsets = (
         (None, {
             'fields': ('name', 'birth_year', 'death_year', 'biography')
@@ -199,6 +237,35 @@ class NarratorAdmin(admin.ModelAdmin):
             'fields': ('reliability',)
         }),
     )
+
+    # Merging deletes the merged narrators, so it takes the delete permission
+    @admin.action(description=_('دمج الرواة المحددين في راوٍ واحد'), permissions=['delete'])
+    def merge_selected(self, request, queryset):
+        # The narrator with the most narrations is kept
+        narrators = list(queryset.annotate(narration_count=Count('narrations')).order_by('-narration_count', 'pk'))
+        if len(narrators) < 2:
+            self.message_user(request, _('اختر راويين على الأقل للدمج.'), messages.WARNING)
+            return
+        target, merged = narrators[0], narrators[1:]
+        if not request.POST.get('post'):
+            # Ask first, like delete_selected: the merge cannot be undone
+            return TemplateResponse(request, 'admin/hadith_app/narrator/merge_selected_confirmation.html', {
+                **self.admin_site.each_context(request),
+                'title': _('تأكيد دمج الرواة'),
+                'opts': self.model._meta,
+                'target': target,
+                'merged': merged,
+                'narrators': narrators,
+                'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+                'media': self.media,
+            })
+        stats = merge_narrators(target, merged)
+        self.message_user(
+            request,
+            f"تم دمج {stats['narrators_merged']} رواة في «{target.name}» "
+            f"(نقل {stats['links_repointed']} روابط ودمج {stats['sanads_merged']} أسانيد مكررة)",
+            messages.SUCCESS,
+        )
     
     def hadith_count(self, obj):
         count = Hadith.objects.filter(asanid__narrators=obj).distinct().count()
@@ -209,6 +276,7 @@ class NarratorAdmin(admin.ModelAdmin):
 
 @admin.register(SanadNarrator, site=admin_site)
 class SanadNarratorAdmin(admin.ModelAdmin):
+    form = SanadNarratorAdminForm
     list_display = ('sanad_link', 'narrator_link', 'order', 'narration_method')
     list_filter = ('narration_method',)
     search_fields = ('narrator__name', 'sanad__hadith__text')
@@ -229,6 +297,54 @@ class SanadNarratorAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('sanad', 'narrator')
 
+    def save_model(self, request, obj, form, change):
+        previous_sanad_id = form.initial.get('sanad') if change else None
+        with transaction.atomic():
+            super().save_model(request, obj, form, change)
+            sync_sanad_chain(obj.sanad)
+            if previous_sanad_id and previous_sanad_id != obj.sanad_id:
+                # The link moved to another sanad; the one it left changed too
+                sync_sanad_chain(Sanad.objects.get(pk=previous_sanad_id))
+
+    def delete_model(self, request, obj):
+        with transaction.atomic():
+            super().delete_model(request, obj)
+            self._resync(request, [obj.sanad_id])
+
+    def delete_queryset(self, request, queryset):
+        # "Delete selected" bypasses delete_model; every affected chain is re-synced
+        sanad_ids = set(queryset.values_list('sanad_id', flat=True))
+        with transaction.atomic():
+            super().delete_queryset(request, queryset)
+            self._resync(request, sanad_ids)
+
+    def _resync(self, request, sanad_ids):
+        # A shortened chain may now match another sanad of its hadith
+        merged = resync_sanad_chains(sanad_ids)
+        if merged:
+            self.message_user(
+                request, f'تم دمج {merged} أسانيد أصبحت مطابقة لأسانيد أخرى للحديث نفسه', messages.INFO,
+            )
+
+@admin.register(Job, site=admin_site)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'progress', 'attempts', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'error')
+    date_hierarchy = 'created_at'
+    actions = ['requeue_jobs']
+    readonly_fields = [field.name for field in Job._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.action(description=_('إعادة جدولة المهام الفاشلة'))
+    def requeue_jobs(self, request, queryset):
+        count = queryset.filter(status=Job.FAILED).update(
+            status=Job.QUEUED, attempts=0, error='', run_after=timezone.now(), finished_at=None
+        )
+        self.message_user(request, f"تمت إعادة جدولة {count} مهام", messages.SUCCESS)
+
 # Register models with the custom admin site
 # The models are now registered using the @admin.register decorator above each class
 
@@ -12,6 +12,13 @@ class CustomAdminSite(AdminSite):
     site_header = _('إدارة نظام السند')
     site_title = _('نظام السند')
     index_title = _('لوحة التحكم')
+    index_template = 'admin/dashboard.html'
+    
+    def index(self, request, extra_context=None):
+        from .utils.stats_utils import get_site_stats
+        # The statistics come from the StatsCounter rows, not full-table counts
+        extra_context = {'stats': get_site_stats(), **(extra_context or {})}
+        return super().index(request, extra_context)
     
     def get_urls(self):
         from django.urls import include, path
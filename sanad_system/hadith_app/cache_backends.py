@@ -0,0 +1,257 @@
+"""
+Cache backend for the hot read paths: a small in-process LRU in front of a
+cache shared by every worker process.
+
+Reads are served from the local tier when possible and fall back to the
+shared one, whose results are kept locally for ``LOCAL_TIMEOUT`` seconds.
+Writes go to both tiers and are announced to the other processes through
+version keys in the shared tier: every write increments a generation
+counter and records the written keys under that generation. Each process
+reads the counter at most once per ``SYNC_INTERVAL`` seconds and drops the
+keys written since the generation it last saw, so a change made by one
+worker is seen by the others within ``SYNC_INTERVAL`` rather than
+``LOCAL_TIMEOUT``.
+
+Configuration::
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'hadith_app.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',  # alias of the shared cache
+            'OPTIONS': {'MAX_ENTRIES': 2000, 'LOCAL_TIMEOUT': 5, 'SYNC_INTERVAL': 1},
+        },
+        'shared': {...},
+    }
+"""
+import os
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+
+GENERATION_KEY = 'two-tier:generation'
+# Beyond this many generations behind, a process drops its whole local tier
+# instead of reading the log
+MAX_LOG_READ = 100
+
+_MISSING = object()
+
+
+def _log_key(generation: int) -> str:
+    return f'two-tier:log:{generation}'
+
+
+class _ProcessState:
+    """What the per-thread instances of one two-tier cache share within a process."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation: Optional[int] = None
+        self.synced_at = float('-inf')
+        self.stats = Counter()
+        self.stats_lock = threading.Lock()
+
+
+_states: Dict[str, _ProcessState] = {}
+_states_lock = threading.Lock()
+
+
+class TwoTierCache(BaseCache):
+    """
+    A bounded in-process LRU (``MAX_ENTRIES``, ``CULL_FREQUENCY``) with a
+    short TTL (``LOCAL_TIMEOUT``) in front of the cache named by ``LOCATION``.
+
+    ``stats()`` returns the hit and miss counts of each tier in this process.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location or 'shared'
+        self._local_timeout = int(options.get('LOCAL_TIMEOUT', 5))
+        self._sync_interval = float(options.get('SYNC_INTERVAL', 1))
+        # Django makes one backend instance per thread; the local tier and the
+        # generation seen are shared by all of them, as LocMemCache shares its data
+        self._local = LocMemCache(f'two-tier:{self._shared_alias}', {
+            'TIMEOUT': self._local_timeout,
+            'OPTIONS': {'MAX_ENTRIES': self._max_entries, 'CULL_FREQUENCY': self._cull_frequency},
+        })
+        with _states_lock:
+            self._state = _states.setdefault(self._shared_alias, _ProcessState())
+
+    @property
+    def _shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _timeouts(self, timeout):
+        """Return the timeouts of a write in the shared and the local tier."""
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.default_timeout
+        if timeout is None:
+            return None, self._local_timeout
+        return timeout, min(timeout, self._local_timeout)
+
+    def _count(self, **counts) -> None:
+        with self._state.stats_lock:
+            self._state.stats.update(counts)
+
+    # Invalidation channel
+
+    def _publish(self, keys: Optional[List]) -> None:
+        """Announce a write of ``keys`` ((key, version) pairs, or None for all) to the other processes."""
+        shared = self._shared
+        try:
+            generation = shared.incr(GENERATION_KEY)
+        except ValueError:
+            shared.add(GENERATION_KEY, 0, timeout=None)
+            generation = shared.incr(GENERATION_KEY)
+        # A process that has not synced for LOCAL_TIMEOUT has nothing left to drop
+        shared.set(_log_key(generation), keys, self._local_timeout + self._sync_interval)
+        state = self._state
+        with state.lock:
+            if state.generation is not None and generation == state.generation + 1:
+                # Nobody else wrote in between; our own write is already applied locally
+                state.generation = generation
+
+    def _sync(self) -> None:
+        """Drop the local copies of keys other processes have written since the last sync."""
+        state = self._state
+        if time.monotonic() - state.synced_at < self._sync_interval:
+            return
+        with state.lock:
+            now = time.monotonic()
+            if now - state.synced_at < self._sync_interval:
+                return
+            state.synced_at = now
+            shared = self._shared
+            # Missing until the first write, and after the shared cache is cleared
+            generation = shared.get(GENERATION_KEY, 0)
+            if generation == state.generation:
+                return
+            previous, state.generation = state.generation, generation
+            if previous is None or not 0 < generation - previous <= MAX_LOG_READ:
+                self._flush_local()
+                return
+            log = shared.get_many([_log_key(g) for g in range(previous + 1, generation + 1)])
+            if len(log) < generation - previous or None in log.values():
+                # An entry expired or was not written yet, or the cache was cleared
+                self._flush_local()
+                return
+            for keys in log.values():
+                for key, version in keys:
+                    self._local.delete(key, version)
+
+    def _flush_local(self) -> None:
+        self._local.clear()
+        self._count(local_flushes=1)
+
+    # Reads
+
+    def get(self, key, default=None, version=None):
+        self._sync()
+        value = self._local.get(key, _MISSING, version)
+        if value is not _MISSING:
+            self._count(local_hits=1)
+            return value
+        value = self._shared.get(key, _MISSING, version)
+        if value is _MISSING:
+            self._count(local_misses=1, shared_misses=1)
+            return default
+        self._count(local_misses=1, shared_hits=1)
+        self._local.set(key, value, self._local_timeout, version)
+        return value
+
+    def get_many(self, keys: Iterable, version=None):
+        self._sync()
+        keys = list(keys)
+        found = self._local.get_many(keys, version)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            fetched = self._shared.get_many(missing, version)
+            if fetched:
+                self._local.set_many(fetched, self._local_timeout, version)
+                found.update(fetched)
+            self._count(shared_hits=len(fetched), shared_misses=len(missing) - len(fetched))
+        self._count(local_hits=len(keys) - len(missing), local_misses=len(missing))
+        return found
+
+    # Writes
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_timeout, local_timeout = self._timeouts(timeout)
+        self._shared.set(key, value, shared_timeout, version)
+        self._local.set(key, value, local_timeout, version)
+        self._publish([(key, version)])
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        shared_timeout, local_timeout = self._timeouts(timeout)
+        failed = self._shared.set_many(data, shared_timeout, version)
+        self._local.set_many(data, local_timeout, version)
+        self._publish([(key, version) for key in data])
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_timeout, local_timeout = self._timeouts(timeout)
+        added = self._shared.add(key, value, shared_timeout, version)
+        if added:
+            # The key was missing from the shared tier, so no process holds a
+            # copy that outlives it: nothing to announce
+            self._local.set(key, value, local_timeout, version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        shared_timeout, local_timeout = self._timeouts(timeout)
+        self._local.touch(key, local_timeout, version)
+        return self._shared.touch(key, shared_timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        value = self._shared.incr(key, delta, version)
+        self._local.set(key, value, self._local_timeout, version)
+        self._publish([(key, version)])
+        return value
+
+    def delete(self, key, version=None):
+        deleted = self._shared.delete(key, version)
+        self._local.delete(key, version)
+        self._publish([(key, version)])
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        if keys:
+            self._shared.delete_many(keys, version)
+            for key in keys:
+                self._local.delete(key, version)
+            self._publish([(key, version) for key in keys])
+
+    def clear(self):
+        self._shared.clear()
+        self._local.clear()
+        self._publish(None)
+
+    # Statistics
+
+    def stats(self) -> Dict:
+        """Return the hit and miss counts of each tier since this process started."""
+        with self._state.stats_lock:
+            counts = dict(self._state.stats)
+        result = {'pid': os.getpid(), 'generation': self._state.generation,
+                  'local_flushes': counts.get('local_flushes', 0)}
+        for tier in ('local', 'shared'):
+            hits, misses = counts.get(f'{tier}_hits', 0), counts.get(f'{tier}_misses', 0)
+            result[tier] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None,
+            }
+        return result
+
+    def reset_stats(self) -> None:
+        with self._state.stats_lock:
+            self._state.stats.clear()
@@ -0,0 +1,6 @@
+from .collection import iter_hadith_records, load_chains, load_categories, EXPORT_CHUNK_SIZE
+from .writers import iter_export, iter_jsonl_lines, iter_csv_lines, format_chain, EXPORT_FORMATS, CONTENT_TYPES
+from .snapshot import (
+    SnapshotExporter, read_snapshot, SNAPSHOT_FORMATS, SNAPSHOT_COMPRESSIONS, SNAPSHOT_CHUNK_SIZE, SNAPSHOT_TABLES,
+)
+from .tei import TEIWriter, iter_tei, find_book, source_queryset, TEI_CONTENT_TYPE
@@ -0,0 +1,65 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List, Sequence
+
+from ..importers.collection import HADITH_FIELDS, chunked
+from ..models import Hadith, SanadNarrator
+
+EXPORT_CHUNK_SIZE = 500
+
+
+def load_chains(hadith_ids: Sequence[int]) -> Dict[int, List[List[Dict[str, Any]]]]:
+    """
+    Return the asanid of ``hadith_ids`` as ``{hadith_id: [chain, ...]}``.
+
+    Each chain is a list of ``{"name", "method", "narrator_id"}`` links in
+    chain order (compiler first); asanid keep their creation order. One query.
+    """
+    links = SanadNarrator.objects.filter(sanad__hadith_id__in=hadith_ids).order_by(
+        'sanad__hadith_id', 'sanad_id', 'order',
+    ).values_list('sanad__hadith_id', 'sanad_id', 'narrator_id', 'narrator__name', 'narration_method')
+
+    chains = defaultdict(list)
+    current_sanad = None
+    for hadith_id, sanad_id, narrator_id, name, method in links:
+        if sanad_id != current_sanad:
+            chains[hadith_id].append([])
+            current_sanad = sanad_id
+        chains[hadith_id][-1].append({'name': name, 'method': method, 'narrator_id': narrator_id})
+    return chains
+
+
+def load_categories(hadith_ids: Sequence[int]) -> Dict[int, List[str]]:
+    """Return the category names of ``hadith_ids`` as ``{hadith_id: [name, ...]}``. One query."""
+    through = Hadith.categories.through
+    rows = through.objects.filter(hadith_id__in=hadith_ids).order_by('hadithcategory_id').values_list(
+        'hadith_id', 'hadithcategory__name',
+    )
+    categories = defaultdict(list)
+    for hadith_id, name in rows:
+        categories[hadith_id].append(name)
+    return categories
+
+
+def iter_hadith_records(queryset=None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Stream export records for ``queryset`` (all hadiths by default) in id order.
+
+    A record has the shape ``import_collection`` reads, so an export can be
+    imported again: ``id``, the Hadith fields, ``categories`` (names) and
+    ``asanid`` (chains of ``{"name", "method", "narrator_id"}`` links).
+
+    Hadiths are read from a server-side cursor; each chunk of
+    ``chunk_size`` hadiths costs two extra queries (chains and categories)
+    however many asanid it holds, and only that chunk is held in memory.
+    """
+    if queryset is None:
+        queryset = Hadith.objects.all()
+    rows = queryset.order_by('pk').values('id', *HADITH_FIELDS).iterator(chunk_size=chunk_size)
+    for chunk in chunked(rows, chunk_size):
+        hadith_ids = [row['id'] for row in chunk]
+        chains = load_chains(hadith_ids)
+        categories = load_categories(hadith_ids)
+        for row in chunk:
+            row['categories'] = categories.get(row['id'], [])
+            row['asanid'] = chains.get(row['id'], [])
+            yield row
@@ -0,0 +1,172 @@
+import json
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from ..importers.collection import chunked
+from ..models import Hadith, HadithCategory, Narrator, Sanad, SanadNarrator
+
+SNAPSHOT_FORMATS = ('parquet', 'arrow')
+SNAPSHOT_EXTENSIONS = {'parquet': 'parquet', 'arrow': 'arrow'}
+# Arrow IPC files only support these codecs; leave them uncompressed to memory-map them
+SNAPSHOT_COMPRESSIONS = {
+    'parquet': ('zstd', 'snappy', 'gzip', 'lz4', 'none'),
+    'arrow': ('zstd', 'lz4', 'none'),
+}
+SNAPSHOT_CHUNK_SIZE = 65536
+
+# (file name, model); the category links are the Hadith.categories through table
+SNAPSHOT_TABLES = (
+    ('hadiths', Hadith),
+    ('narrators', Narrator),
+    ('asanid', Sanad),
+    ('sanad_narrators', SanadNarrator),
+    ('categories', HadithCategory),
+    ('hadith_categories', Hadith.categories.through),
+)
+# Index data rebuilt by cluster_matn, not corpus content
+SNAPSHOT_EXCLUDED_FIELDS = {'matn_signature'}
+
+
+def import_pyarrow():
+    """
+    Import pyarrow, which snapshot exports need but the site does not.
+
+    Raises:
+        ValueError: If pyarrow is not installed
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet  # noqa: F401 (loads the pyarrow.parquet submodule)
+    except ImportError:
+        raise ValueError('Snapshot exports require the pyarrow package')
+    return pyarrow
+
+
+def arrow_type(pa, field: models.Field):
+    """Return the Arrow type of a concrete model field."""
+    if field.is_relation:
+        field = field.target_field
+    if isinstance(field, (models.AutoField, models.BigAutoField, models.IntegerField)):
+        return pa.int64()
+    if isinstance(field, models.BooleanField):
+        return pa.bool_()
+    if isinstance(field, models.DateTimeField):
+        return pa.timestamp('us', tz='UTC')
+    if isinstance(field, models.BinaryField):
+        return pa.binary()
+    return pa.string()
+
+
+def snapshot_fields(model) -> List[models.Field]:
+    """Return the concrete fields of ``model`` written to its snapshot file."""
+    return [field for field in model._meta.concrete_fields if field.name not in SNAPSHOT_EXCLUDED_FIELDS]
+
+
+@contextmanager
+def read_snapshot(using: str = 'default'):
+    """
+    Run the enclosed queries in one read transaction, so they all see the same data.
+
+    SQLite keeps the snapshot taken by a transaction's first read (in WAL
+    mode without blocking writers); PostgreSQL needs repeatable read.
+    """
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+class SnapshotExporter:
+    """
+    Writer of columnar snapshots of the corpus tables for offline analysis.
+
+    Each table in ``SNAPSHOT_TABLES`` becomes one Parquet or Arrow IPC file
+    with one column per model field (foreign keys as ``<name>_id``). Rows
+    are read in primary key order with a server-side cursor and written as
+    one record batch (Parquet row group) per ``chunk_size`` rows, so memory
+    use is bounded by the chunk size, not the table size.
+
+    All tables are read inside one transaction, so the files are consistent
+    with each other. A ``manifest.json`` lists the files and row counts.
+    """
+
+    def __init__(self, output_dir: str, fmt: str = 'parquet', compression: str = 'zstd',
+                 chunk_size: int = SNAPSHOT_CHUNK_SIZE, using: str = 'default'):
+        if fmt not in SNAPSHOT_FORMATS:
+            raise ValueError(f'Unsupported snapshot format: {fmt}')
+        if compression not in SNAPSHOT_COMPRESSIONS[fmt]:
+            raise ValueError(f'Unsupported {fmt} compression: {compression}')
+        self.pa = import_pyarrow()
+        self.output_dir = output_dir
+        self.fmt = fmt
+        self.compression = compression
+        self.chunk_size = chunk_size
+        self.using = using
+
+    def open_writer(self, path: str, schema):
+        pa = self.pa
+        if self.fmt == 'parquet':
+            return pa.parquet.ParquetWriter(path, schema, compression=self.compression)
+        compression = None if self.compression == 'none' else self.compression
+        return pa.ipc.new_file(path, schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def export_table(self, name: str, model) -> Dict:
+        """Write one table to its snapshot file and return its manifest entry."""
+        pa = self.pa
+        fields = snapshot_fields(model)
+        types = [arrow_type(pa, field) for field in fields]
+        schema = pa.schema([pa.field(field.attname, type_, nullable=field.null)
+                            for field, type_ in zip(fields, types)])
+        filename = f'{name}.{SNAPSHOT_EXTENSIONS[self.fmt]}'
+        path = os.path.join(self.output_dir, filename)
+
+        rows = model._default_manager.using(self.using).order_by('pk').values_list(
+            *(field.attname for field in fields)
+        ).iterator(chunk_size=self.chunk_size)
+        count = 0
+        # Write next to the target and swap it in only once complete
+        with self.open_writer(path + '.tmp', schema) as writer:
+            for chunk in chunked(rows, self.chunk_size):
+                columns = zip(*chunk)
+                arrays = [pa.array(column, type=type_) for column, type_ in zip(columns, types)]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                count += len(chunk)
+        os.replace(path + '.tmp', path)
+        return {'file': filename, 'table': model._meta.db_table, 'rows': count,
+                'columns': [field.attname for field in fields]}
+
+    def run(self, progress: Optional[Callable[[str, Dict], None]] = None) -> List[Dict]:
+        """
+        Write every snapshot table and the manifest.
+
+        Args:
+            progress: Called with the table name and its manifest entry after each table
+
+        Returns:
+            list: The manifest entries
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        tables = []
+        with read_snapshot(self.using):
+            taken_at = timezone.now()
+            for name, model in SNAPSHOT_TABLES:
+                entry = self.export_table(name, model)
+                tables.append(entry)
+                if progress:
+                    progress(name, entry)
+
+        manifest = {
+            'taken_at': taken_at.isoformat(),
+            'format': self.fmt,
+            'compression': self.compression,
+            'tables': tables,
+        }
+        with open(os.path.join(self.output_dir, 'manifest.json'), 'w', encoding='utf-8') as fp:
+            json.dump(manifest, fp, ensure_ascii=False, indent=2)
+        return tables
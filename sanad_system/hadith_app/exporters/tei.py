@@ -0,0 +1,225 @@
+import io
+from typing import Any, Dict, Iterable, Iterator, Optional
+from xml.sax.saxutils import XMLGenerator
+
+from django.utils import timezone
+
+from ..models import Hadith, HadithBook, Narrator, SanadNarrator
+from ..utils.sanad_utils import TRANSMISSION_TERMS
+from .collection import EXPORT_CHUNK_SIZE, iter_hadith_records
+
+TEI_NAMESPACE = 'http://www.tei-c.org/ns/1.0'
+TEI_CONTENT_TYPE = 'application/tei+xml; charset=utf-8'
+GRADE_LABELS = dict(Hadith._meta.get_field('grade').choices)
+# Years in the database are Hijri; TEI's @when only takes Gregorian dates, so
+# they are written as @when-custom pointing to this calendar declaration
+HIJRI_CALENDAR_ID = 'hijri'
+
+
+def find_book(source: str) -> Optional[HadithBook]:
+    """Return the HadithBook whose title names ``source`` (after normalization), if any."""
+    source_key = Hadith.make_source_key(source)
+    for book in HadithBook.objects.all():
+        if Hadith.make_source_key(book.title) == source_key:
+            return book
+    return None
+
+
+def source_queryset(source: str):
+    """Return the hadiths of a source, matched on its normalized name."""
+    return Hadith.objects.filter(source_key=Hadith.make_source_key(source))
+
+
+class TEIWriter:
+    """
+    Incremental TEI P5 writer for one hadith source.
+
+    Elements are written with ``XMLGenerator`` into a small buffer that is
+    handed out and emptied after each narrator and hadith, so a book is
+    serialized in constant memory and can be streamed as it is written.
+
+    Each hadith is a ``<div type="hadith">`` whose ``<ab>`` holds the
+    asanid as ``<seg type="isnad">`` (one ``<persName ref="#narrator-N">``
+    per narrator, preceded by its transmission term) and the text as
+    ``<seg type="matn">``. The narrators are listed once in the header's
+    ``<listPerson>``, with their Hijri years dated against the
+    ``<calendar>`` declared in ``<encodingDesc>``.
+    """
+
+    def __init__(self, source: str, book: Optional[HadithBook] = None):
+        self.source = source
+        self.book = book
+        self.buffer = io.StringIO()
+        self.xml = XMLGenerator(self.buffer, encoding='utf-8', short_empty_elements=True)
+
+    def flush(self) -> str:
+        value = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return value
+
+    def element(self, name: str, text: Any = None, **attrs):
+        """Write a complete element with optional text content."""
+        self.xml.startElement(name, self._attrs(attrs))
+        if text is not None:
+            self.xml.characters(str(text))
+        self.xml.endElement(name)
+
+    def start(self, name: str, **attrs):
+        self.xml.startElement(name, self._attrs(attrs))
+
+    def end(self, name: str):
+        self.xml.endElement(name)
+
+    def newline(self):
+        self.xml.ignorableWhitespace('\n')
+
+    @staticmethod
+    def _attrs(attrs: Dict[str, Any]) -> Dict[str, str]:
+        # xml_id / xml_lang stand for the xml: prefixed attributes
+        return {
+            name.replace('xml_', 'xml:', 1) if name.startswith('xml_') else name: str(value)
+            for name, value in attrs.items() if value is not None
+        }
+
+    def hijri_date(self, name: str, year: int, text: Any = None):
+        """Write a dating element for a Hijri year."""
+        self.element(name, text, **{'when-custom': year, 'datingMethod': f'#{HIJRI_CALENDAR_ID}'})
+
+    def write_header(self, narrators: Iterable[Dict[str, Any]]) -> Iterator[str]:
+        title = self.book.title if self.book else self.source
+        self.xml.startDocument()
+        self.start('TEI', xmlns=TEI_NAMESPACE, xml_lang='ar')
+        self.newline()
+        self.start('teiHeader')
+        self.start('fileDesc')
+        self.start('titleStmt')
+        self.element('title', title)
+        if self.book:
+            self.element('author', self.book.author)
+        self.end('titleStmt')
+        self.start('publicationStmt')
+        self.element('publisher', 'نظام الأسانيد')
+        self.element('date', when=timezone.localdate().isoformat())
+        self.end('publicationStmt')
+        self.start('sourceDesc')
+        self.start('bibl')
+        self.element('title', title)
+        if self.book:
+            self.element('author', self.book.author)
+            if self.book.year_written:
+                self.hijri_date('date', self.book.year_written, self.book.year_written)
+            if self.book.description:
+                self.element('note', self.book.description)
+        self.end('bibl')
+        self.end('sourceDesc')
+        self.end('fileDesc')
+        self.start('encodingDesc')
+        self.start('calendarDesc')
+        self.start('calendar', xml_id=HIJRI_CALENDAR_ID)
+        self.element('p', 'التقويم الهجري')
+        self.end('calendar')
+        self.end('calendarDesc')
+        self.end('encodingDesc')
+        self.start('profileDesc')
+        self.start('particDesc')
+        self.start('listPerson')
+        self.newline()
+        yield self.flush()
+
+        for narrator in narrators:
+            self.start('person', xml_id=f"narrator-{narrator['id']}")
+            self.element('persName', narrator['name'])
+            if narrator['birth_year']:
+                self.hijri_date('birth', narrator['birth_year'])
+            if narrator['death_year']:
+                self.hijri_date('death', narrator['death_year'])
+            self.end('person')
+            self.newline()
+            yield self.flush()
+
+        self.end('listPerson')
+        self.end('particDesc')
+        self.end('profileDesc')
+        self.end('teiHeader')
+        self.newline()
+        self.start('text')
+        self.start('body')
+        self.newline()
+        yield self.flush()
+
+    def write_hadith(self, record: Dict[str, Any]) -> str:
+        self.start('div', type='hadith', xml_id=f"hadith-{record['id']}", n=record['source_hadith_number'])
+        if record['source_page'] or record['reference_page'] or record['reference_edition']:
+            self.start('bibl')
+            if record['reference_edition']:
+                self.element('edition', record['reference_edition'])
+            if record['source_page']:
+                self.element('biblScope', record['source_page'], unit='page')
+            if record['reference_page']:
+                self.element('biblScope', record['reference_page'], unit='page', type='reference')
+            self.end('bibl')
+        # <seg> is phrase-level: the isnad and matn segments sit in an anonymous block
+        self.start('ab')
+        for index, chain in enumerate(record['asanid'], start=1):
+            self.start('seg', type='isnad', n=index)
+            for position, link in enumerate(chain):
+                if position:
+                    self.xml.characters(' ')
+                if link['method']:
+                    # Only the recognised terms are typed; others (e.g. "قال") are kept as text
+                    self.element('seg', link['method'],
+                                 type='transmission' if link['method'] in TRANSMISSION_TERMS else None)
+                    self.xml.characters(' ')
+                self.element('persName', link['name'], ref=f"#narrator-{link['narrator_id']}")
+            self.end('seg')
+        self.element('seg', record['text'], type='matn')
+        self.end('ab')
+        if record['grade']:
+            self.element('note', GRADE_LABELS.get(record['grade'], record['grade']), type='grade', n=record['grade'])
+        if record['context']:
+            self.element('note', record['context'], type='context')
+        if record['categories']:
+            self.start('note', type='categories')
+            for name in record['categories']:
+                self.element('term', name)
+            self.end('note')
+        self.end('div')
+        self.newline()
+        return self.flush()
+
+    def write_footer(self) -> str:
+        self.end('body')
+        self.end('text')
+        self.end('TEI')
+        self.newline()
+        self.xml.endDocument()
+        return self.flush()
+
+
+def iter_source_narrators(queryset) -> Iterator[Dict[str, Any]]:
+    """Stream the narrators appearing in the asanid of ``queryset``, in id order."""
+    narrator_ids = SanadNarrator.objects.filter(sanad__hadith__in=queryset).values('narrator_id')
+    return Narrator.objects.filter(pk__in=narrator_ids).order_by('pk').values(
+        'id', 'name', 'birth_year', 'death_year',
+    ).iterator(chunk_size=2000)
+
+
+def iter_tei(source: str, book: Optional[HadithBook] = None, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Serialize the hadiths of ``source`` as a TEI document, a fragment at a time.
+
+    Args:
+        source: Source name, matched on its normalized form
+        book: HadithBook describing the source in the TEI header
+        chunk_size: Hadiths read per batch of queries
+
+    Yields:
+        str: Consecutive pieces of the document
+    """
+    queryset = source_queryset(source)
+    writer = TEIWriter(source, book)
+    yield from writer.write_header(iter_source_narrators(queryset))
+    for record in iter_hadith_records(queryset, chunk_size):
+        yield writer.write_hadith(record)
+    yield writer.write_footer()
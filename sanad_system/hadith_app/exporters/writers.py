@@ -0,0 +1,73 @@
+import csv
+import json
+from typing import Any, Dict, Iterable, Iterator, List
+
+from ..importers.collection import HADITH_FIELDS
+from ..utils.sanad_utils import TRANSMISSION_TERMS
+
+EXPORT_FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+CSV_FIELDS = ('id',) + HADITH_FIELDS + ('categories', 'asanid')
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the text instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def format_chain(links: List[Dict[str, Any]]) -> str:
+    """
+    Render a chain as text that ``parse_sanad_chain`` reads back.
+
+    Each name is preceded by its narration method and a comma, e.g.
+    ``"مالك، عن نافع، عن ابن عمر"``. Methods that are not transmission terms
+    would read back as part of the name, so they are left out; the JSON
+    Lines export keeps them.
+    """
+    parts = []
+    for link in links:
+        name = link['name'].replace('|', ' ')
+        parts.append(f"{link['method']} {name}" if link['method'] in TRANSMISSION_TERMS else name)
+    return '، '.join(parts)
+
+
+def iter_jsonl_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """Yield one JSON Lines line per record."""
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def iter_csv_lines(records: Iterable[Dict[str, Any]]) -> Iterator[str]:
+    """
+    Yield a CSV header and one row per record.
+
+    Follows the CSV layout ``import_collection`` reads: ``|``-separated
+    category names and ``|``-separated chains. The leading byte order mark
+    lets spreadsheet programs detect the Arabic text as UTF-8.
+    """
+    writer = csv.writer(_Echo())
+    yield '\ufeff' + writer.writerow(CSV_FIELDS)
+    for record in records:
+        row = [record['id']]
+        row.extend(record[field] or '' for field in HADITH_FIELDS)
+        row.append('|'.join(name.replace('|', ' ') for name in record['categories']))
+        row.append('|'.join(format_chain(chain) for chain in record['asanid']))
+        yield writer.writerow(row)
+
+
+def iter_export(records: Iterable[Dict[str, Any]], fmt: str) -> Iterator[str]:
+    """
+    Serialize export records as ``fmt`` (one of ``EXPORT_FORMATS``), a line at a time.
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f'Unsupported export format: {fmt}')
+    writers = {'jsonl': iter_jsonl_lines, 'csv': iter_csv_lines}
+    return writers[fmt](records)
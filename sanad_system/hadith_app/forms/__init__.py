@@ -2,4 +2,6 @@ from .hadith_forms import HadithForm, SanadNarratorForm
 from .narrator_forms import NarratorForm
 from .profile_forms import ProfileUpdateForm, AvatarUploadForm
 from .search_forms import SearchForm
-from .sanad_forms import SanadForm
+from .sanad_forms import (
+    SanadForm, BulkInlineFormSet, SanadNarratorAdminForm, SanadNarratorInlineFormSet, SanadNarratorInlineForm,
+)
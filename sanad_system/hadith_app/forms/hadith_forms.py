@@ -11,7 +11,7 @@ class HadithForm(forms.ModelForm):
             'placeholder': _('Enter the sanad chain text here...'),
             'class': 'form-control',
         }),
-        help_text=_('Enter the sanad chain text. Each narrator should be separated by a newline.')
+        help_text=_('Enter the sanad chain text. Narrators may be separated by newlines, commas, semicolons or transmission terms (حدثنا، أخبرنا، عن...).')
     )
 
     class Meta:
@@ -1,6 +1,11 @@
 from django import forms
+from django.db import transaction
+from django.db.models import F
+from django.forms.models import BaseInlineFormSet
 from django.utils.translation import gettext_lazy as _
-from ..models import Sanad, SanadNarrator, Narrator
+from ..models import Sanad, Narrator, SanadNarrator
+from ..utils.lookup_utils import get_narrators
+from ..utils.sanad_utils import find_duplicate_sanad, set_sanad_chain
 
 class SanadForm(forms.ModelForm):
     narrators = forms.ModelMultipleChoiceField(
@@ -38,18 +43,236 @@ class SanadForm(forms.ModelForm):
         if self.instance and self.instance.pk:
             self.fields['narrators'].initial = self.instance.narrators.all()
     
+    def get_ordered_narrator_ids(self):
+        """Selected narrator ids in the order they were submitted."""
+        selected = [narrator.pk for narrator in self.cleaned_data.get('narrators', [])]
+        submitted = self.data.getlist(self.add_prefix('narrators')) if hasattr(self.data, 'getlist') else []
+        ordered = []
+        for value in submitted:
+            if value.isdigit() and int(value) in selected and int(value) not in ordered:
+                ordered.append(int(value))
+        return ordered or selected
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.instance.hadith_id and cleaned_data.get('narrators'):
+            duplicate = find_duplicate_sanad(
+                self.instance.hadith_id,
+                self.get_ordered_narrator_ids(),
+                exclude_id=self.instance.pk,
+            )
+            if duplicate:
+                raise forms.ValidationError(_('هذا السند مسجل مسبقاً لهذا الحديث'))
+        return cleaned_data
+
     def save(self, commit=True):
         # Save the Sanad instance first without the many-to-many field
         sanad = super().save(commit=False)
         if commit:
             sanad.save()
-            
-        # Save many-to-many data
-        if 'narrators' in self.cleaned_data:
-            # Clear existing relations
-            sanad.narrators.clear()
-            # Add new relations
-            for narrator in self.cleaned_data['narrators']:
-                SanadNarrator.objects.create(sanad=sanad, narrator=narrator)
-                
+            # Replace the chain in submitted order and refresh its fingerprint
+            if 'narrators' in self.cleaned_data:
+                set_sanad_chain(sanad, self.get_ordered_narrator_ids())
+
         return sanad
+
+
+class PrefetchedModelChoiceField(forms.ModelChoiceField):
+    """A ModelChoiceField that resolves submitted ids from objects loaded in bulk."""
+
+    def __init__(self, queryset, *, objects, **kwargs):
+        super().__init__(queryset, **kwargs)
+        self.objects = objects
+
+    @classmethod
+    def from_field(cls, field, objects):
+        return cls(
+            field.queryset,
+            objects=objects,
+            required=field.required,
+            widget=field.widget,
+            label=field.label,
+            initial=field.initial,
+            help_text=field.help_text,
+            empty_label=field.empty_label,
+            to_field_name=field.to_field_name,
+            limit_choices_to=field.limit_choices_to,
+        )
+
+    def to_python(self, value):
+        # Model form fields for a ForeignKey name the pk as their to_field_name
+        if value not in self.empty_values and self.to_field_name in (None, self.queryset.model._meta.pk.name):
+            obj = self.objects.get(str(value))
+            if obj is not None:
+                return obj
+        return super().to_python(value)
+
+
+class BulkInlineFormSet(BaseInlineFormSet):
+    """
+    Inline formset that writes all rows with one delete, one ``bulk_update``
+    and one ``bulk_create`` instead of a query per row.
+
+    Existing rows are resolved from the formset queryset (already loaded
+    once) rather than with a lookup per submitted id. Model ``save()`` and
+    save signals are not called for the rows.
+    """
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        pk_name = self._pk_field.name
+        if form.is_bound and isinstance(form.fields.get(pk_name), forms.ModelChoiceField):
+            form.fields[pk_name] = PrefetchedModelChoiceField.from_field(
+                form.fields[pk_name], self._existing_objects_by_key()
+            )
+
+    def _existing_objects_by_key(self):
+        if not hasattr(self, '_objects_by_key'):
+            self._objects_by_key = {str(obj.pk): obj for obj in self.get_queryset()}
+        return self._objects_by_key
+
+    def bulk_update(self, objects, fields):
+        self.model._default_manager.bulk_update(objects, fields)
+
+    def save(self, commit=True):
+        if not commit:
+            return super().save(commit=False)
+
+        self.new_objects, self.changed_objects, self.deleted_objects = [], [], []
+        editable = {field.name for field in self.model._meta.concrete_fields if not field.primary_key}
+        update_fields = set()
+        for form in self.initial_forms:
+            obj = form.instance
+            if obj.pk is None:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                self.deleted_objects.append(obj)
+            elif form.has_changed():
+                self.changed_objects.append((obj, form.changed_data))
+                update_fields.update(editable.intersection(form.changed_data))
+        for form in self.extra_forms:
+            if not form.has_changed() or (self.can_delete and self._should_delete_form(form)):
+                continue
+            setattr(form.instance, self.fk.name, self.instance)
+            self.new_objects.append(form.instance)
+
+        with transaction.atomic(using=self.instance._state.db):
+            if self.deleted_objects:
+                self.model._default_manager.filter(pk__in=[obj.pk for obj in self.deleted_objects]).delete()
+            if update_fields:
+                self.bulk_update([obj for obj, _ in self.changed_objects], sorted(update_fields))
+            if self.new_objects:
+                self.model._default_manager.bulk_create(self.new_objects)
+        return self.new_objects + [obj for obj, _ in self.changed_objects]
+
+
+class SanadNarratorInlineForm(forms.ModelForm):
+    class Meta:
+        model = SanadNarrator
+        fields = ['narrator', 'order', 'narration_method']
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        # The narrator was already loaded by the form field; skip the model
+        # field's existence query
+        exclude.add('narrator')
+        return exclude
+
+    def validate_unique(self):
+        # Unique orders are checked across the whole chain by the formset
+        pass
+
+
+class SanadNarratorAdminForm(forms.ModelForm):
+    """Single chain link editor; refuses an edit that makes a chain identical to another sanad of its hadith."""
+
+    class Meta:
+        model = SanadNarrator
+        fields = '__all__'
+
+    def clean(self):
+        cleaned_data = super().clean()
+        sanad, narrator, order = (cleaned_data.get(field) for field in ('sanad', 'narrator', 'order'))
+        if sanad is None or narrator is None or order is None:
+            return cleaned_data
+        links = dict(
+            SanadNarrator.objects.filter(sanad=sanad).exclude(pk=self.instance.pk).values_list('order', 'narrator_id')
+        )
+        links[order] = narrator.pk
+        if find_duplicate_sanad(sanad.hadith_id, [links[key] for key in sorted(links)], exclude_id=sanad.pk):
+            raise forms.ValidationError(_('هذا السند مسجل مسبقاً لهذا الحديث'))
+        if self.instance.pk and self.instance.sanad_id != sanad.pk:
+            # The link leaves its current sanad, whose remaining chain must stay unique too
+            previous = self.instance.sanad
+            remaining = list(
+                SanadNarrator.objects.filter(sanad=previous).exclude(pk=self.instance.pk)
+                .order_by('order').values_list('narrator_id', flat=True)
+            )
+            if find_duplicate_sanad(previous.hadith_id, remaining, exclude_id=previous.pk):
+                raise forms.ValidationError(_('نقل هذا الراوي يجعل سنده الحالي مطابقاً لسند آخر للحديث'))
+        return cleaned_data
+
+
+class SanadNarratorInlineFormSet(BulkInlineFormSet):
+    """
+    Sanad chain editor: narrators of all rows are loaded with one query and
+    the chain's ordering and uniqueness are validated in memory.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.narrator_objects = {}
+
+    def add_fields(self, form, index):
+        super().add_fields(form, index)
+        if isinstance(form.fields.get('narrator'), forms.ModelChoiceField):
+            form.fields['narrator'] = PrefetchedModelChoiceField.from_field(
+                form.fields['narrator'], self.narrator_objects
+            )
+
+    def full_clean(self):
+        if self.is_bound:
+            submitted = {self.data.get(form.add_prefix('narrator')) for form in self.forms}
+            ids = [int(value) for value in submitted if value and str(value).isdigit()]
+            self.narrator_objects.update(
+                (str(pk), narrator) for pk, narrator in get_narrators(ids).items()
+            )
+        super().full_clean()
+
+    def clean(self):
+        super().clean()
+        links = []
+        for form in self.forms:
+            if not hasattr(form, 'cleaned_data') or not form.cleaned_data:
+                continue
+            if self.can_delete and self._should_delete_form(form):
+                continue
+            if form.cleaned_data.get('order') is None or form.cleaned_data.get('narrator') is None:
+                continue
+            links.append((form.cleaned_data['order'], form.cleaned_data['narrator'].pk))
+
+        orders = [order for order, _ in links]
+        if any(order < 1 for order in orders):
+            raise forms.ValidationError(_('يجب أن يكون ترتيب الراوي رقماً موجباً'))
+        if len(set(orders)) != len(orders):
+            raise forms.ValidationError(_('لا يمكن تكرار ترتيب الراوي في السند نفسه'))
+        if self.instance.hadith_id and links:
+            duplicate = find_duplicate_sanad(
+                self.instance.hadith_id,
+                [narrator_id for _, narrator_id in sorted(links)],
+                exclude_id=self.instance.pk,
+            )
+            if duplicate:
+                raise forms.ValidationError(_('هذا السند مسجل مسبقاً لهذا الحديث'))
+
+    def bulk_update(self, objects, fields):
+        if 'order' not in fields:
+            return super().bulk_update(objects, fields)
+        # Write the new orders negated first, then flip them, so swapping two
+        # positions never collides with the unique (sanad, order) constraint
+        for obj in objects:
+            obj.order = -obj.order
+        super().bulk_update(objects, fields)
+        SanadNarrator.objects.filter(pk__in=[obj.pk for obj in objects]).update(order=-F('order'))
+        for obj in objects:
+            obj.order = -obj.order
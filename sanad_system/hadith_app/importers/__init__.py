@@ -0,0 +1,7 @@
+from .readers import iter_records, detect_format, SUPPORTED_FORMATS
+from .collection import CollectionImporter, prepare_record, prepare_chunk
+from .book_parser import parse_book, iter_paragraphs, prepare_paragraphs
+from .pipeline import map_chunks, default_workers
+from .validation import validate_records, ValidationReport
+from .narrators import NarratorImporter, iter_narrator_rows, NARRATOR_FORMATS
+from .synthetic import CorpusGenerator
@@ -0,0 +1,157 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..utils.sanad_utils import TRANSMISSION_TERM_RE, parse_sanad_chain
+from ..utils.text_utils import ARABIC_DIACRITICS_RE
+from .collection import prepare_record
+
+# The matn usually starts where the Prophet is mentioned after the isnad
+MATN_START_RE = re.compile(
+    r'(?:(?:قال|يقول|أن|إن|عن|سمعت)\s+)?(?:رسول الله|النبي)'
+)
+HADITH_NUMBER_RE = re.compile(r'^\s*([0-9٠-٩]+)\s*[-–—.)]\s*')
+OPENITI_PAGE_RE = re.compile(r'\s*(?:PageV\d+P\d+|ms\d+)\s*')
+
+ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+
+# A paragraph is treated as a hadith when a transmission term appears this early
+ISNAD_SEARCH_WINDOW = 80
+
+
+def iter_paragraphs(lines: Iterable[str]) -> Iterator[str]:
+    """
+    Group the lines of a book into paragraphs, one line at a time.
+
+    Understands OpenITI mARkdown (``#META#`` header, ``# `` paragraph starts,
+    ``~~`` continuation lines, ``### `` headings, page/milestone markers) and
+    plain text where paragraphs are separated by blank lines or start with a
+    hadith number.
+    """
+    in_header = False
+    current: List[str] = []
+
+    def flush():
+        text = ' '.join(current).strip()
+        current.clear()
+        return text
+
+    for raw in lines:
+        line = raw.rstrip('\n')
+        if line.startswith('######OpenITI#'):
+            continue
+        if line.startswith('#META#'):
+            in_header = not line.startswith('#META#Header#End')
+            continue
+        if in_header:
+            continue
+
+        line = OPENITI_PAGE_RE.sub(' ', line).strip()
+        if line.startswith('~~'):
+            current.append(line[2:].strip())
+            continue
+
+        starts_paragraph = (
+            not line
+            or line.startswith('#')
+            or HADITH_NUMBER_RE.match(line) is not None
+        )
+        if starts_paragraph and current:
+            text = flush()
+            if text:
+                yield text
+        if line.startswith('###'):
+            # Headings (kitab/bab titles) never belong to a hadith
+            continue
+        if line.startswith('#'):
+            line = line.lstrip('#').strip()
+        if line:
+            current.append(line)
+
+    text = flush()
+    if text:
+        yield text
+
+
+def split_isnad_matn(text: str) -> Tuple[str, str]:
+    """
+    Split a hadith paragraph into its isnad and matn.
+
+    The isnad runs from the first transmission term up to the first mention of
+    the Prophet after the last narrator; everything from there on is the matn.
+
+    Returns:
+        tuple: ``(isnad, matn)``; ``isnad`` is empty when none was found
+    """
+    first_term = TRANSMISSION_TERM_RE.search(text)
+    if not first_term or first_term.start() > ISNAD_SEARCH_WINDOW:
+        return '', text
+
+    matn_start = MATN_START_RE.search(text, first_term.end())
+    if matn_start:
+        return text[:matn_start.start()].strip(), text[matn_start.start():].strip()
+
+    # No Prophet mention (mawquf reports): the matn follows the last "qala:"
+    colon = text.rfind(':')
+    if colon > first_term.end():
+        return text[:colon].strip(), text[colon + 1:].strip()
+    return '', text
+
+
+def parse_paragraph(paragraph: str, source: str) -> Optional[Dict[str, object]]:
+    """
+    Turn one paragraph into a hadith record.
+
+    Returns:
+        dict: A collection record accepted by ``CollectionImporter``, or
+        ``None`` when the paragraph has no isnad or no matn
+    """
+    number: Optional[str] = None
+    match = HADITH_NUMBER_RE.match(paragraph)
+    if match:
+        number = match.group(1).translate(ARABIC_DIGITS)
+        paragraph = paragraph[match.end():]
+
+    plain = ARABIC_DIACRITICS_RE.sub('', paragraph)
+    isnad, matn = split_isnad_matn(plain)
+    links = parse_sanad_chain(isnad, leading_name=False) if isnad else []
+    if not links or not matn:
+        return None
+
+    return {
+        'text': matn,
+        'source': source,
+        'source_hadith_number': number,
+        'asanid': [[{'name': name, 'method': method} for name, method in links]],
+    }
+
+
+def parse_book(lines: Iterable[str], source: str) -> Iterator[Dict[str, object]]:
+    """
+    Stream hadith records out of a book, one paragraph at a time.
+
+    Args:
+        lines: An iterable of text lines (e.g. an open file)
+        source: The book title stored as each hadith's source
+
+    Yields:
+        dict: Collection records accepted by ``CollectionImporter``
+    """
+    for paragraph in iter_paragraphs(lines):
+        record = parse_paragraph(paragraph, source)
+        if record:
+            yield record
+
+
+def prepare_paragraphs(paragraphs: List[str], source: str) -> List[Dict[str, object]]:
+    """
+    Parse and prepare a chunk of paragraphs; runs in the import worker processes.
+
+    Paragraph grouping stays sequential in the reading process, the isnad/matn
+    split and name normalization of each chunk happen here.
+    """
+    records = []
+    for paragraph in paragraphs:
+        record = parse_paragraph(paragraph, source)
+        if record:
+            records.append(prepare_record(record))
+    return records
@@ -0,0 +1,337 @@
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Hadith, HadithCategory, Narrator, NarratorAlias, Sanad, SanadNarrator, SanadSegment
+from ..signals import narrators_changed
+from ..utils.lookup_utils import forget_all_hadiths, forget_all_narrator_names
+from ..utils.sanad_utils import build_sanad_segments, chain_fingerprint, parse_sanad_chain
+from ..utils.stats_utils import reconcile_stats
+from ..utils.text_utils import normalize_arabic
+from .pipeline import map_chunks
+
+HADITH_FIELDS = (
+    'text', 'source', 'source_page', 'source_hadith_number', 'grade',
+    'context', 'reference_page', 'reference_edition',
+)
+GRADES = {choice for choice, _ in Hadith._meta.get_field('grade').choices}
+AUTO_NARRATOR_BIOGRAPHY = 'تمت إضافة الراوي تلقائياً من خلال استيراد مجموعة أحاديث'
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield lists of up to ``size`` items from an iterable."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chain(chain: Any) -> List[Tuple[str, Optional[str], str]]:
+    """
+    Normalize one sanad from a record into ``(name, narration_method, key)`` links.
+
+    A chain may be a list of names, a list of ``{"name", "method"}`` objects
+    or a single string understood by ``parse_sanad_chain``.
+    ``key`` is the normalized name used to match existing narrators.
+    """
+    if isinstance(chain, str):
+        return [(name, method, normalize_arabic(name)[:100]) for name, method in parse_sanad_chain(chain)]
+    links = []
+    for link in chain or []:
+        if isinstance(link, dict):
+            name = (link.get('name') or '').strip()
+            method = (link.get('method') or link.get('narration_method') or '').strip() or None
+        else:
+            name, method = str(link).strip(), None
+        key = normalize_arabic(name)[:100]
+        if key:
+            links.append((name[:100], method, key))
+    return links
+
+
+def prepare_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Clean a raw collection record into the shape the writer expects.
+
+    Returns:
+        dict: Hadith field values plus ``categories`` (names) and ``asanid``
+        (lists of ``(name, method, key)`` links)
+    """
+    prepared = {}
+    for field in HADITH_FIELDS:
+        value = record.get(field)
+        value = str(value).strip() if value is not None else ''
+        prepared[field] = value or None
+    prepared['text'] = prepared['text'] or ''
+    prepared['source'] = prepared['source'] or ''
+    prepared['source_key'] = Hadith.make_source_key(prepared['source'])
+    if prepared['grade'] not in GRADES:
+        prepared['grade'] = None
+
+    categories = record.get('categories') or []
+    if isinstance(categories, str):
+        categories = categories.split('|')
+    prepared['categories'] = [c.strip() for c in categories if c and c.strip()]
+
+    asanid = record.get('asanid')
+    if asanid is None:
+        asanid = [record['sanad']] if record.get('sanad') else []
+    elif isinstance(asanid, str):
+        asanid = [asanid]
+    prepared['asanid'] = [links for links in (parse_chain(chain) for chain in asanid) if links]
+    return prepared
+
+
+def prepare_chunk(records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Prepare a chunk of raw records; runs in the import worker processes."""
+    return [prepare_record(record) for record in records]
+
+
+def natural_key(record: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """Return the ``(source_key, source_hadith_number)`` key of a prepared record, if it has one."""
+    if record['source_key'] and record['source_hadith_number']:
+        return record['source_key'], record['source_hadith_number']
+    return None
+
+
+class CollectionImporter:
+    """
+    Bulk writer for hadith collections.
+
+    Narrator and category names are resolved against in-memory maps loaded
+    once per run; each chunk of records is written with a handful of
+    ``bulk_create`` calls inside one transaction.
+
+    In upsert mode (the default) records are matched to existing hadiths on
+    their natural key (normalized source, hadith number): changed fields are
+    written with ``bulk_update`` and only new asanid and categories are added,
+    so re-importing an unchanged collection writes nothing.
+    """
+
+    # Statistics counting written rows that the site statistics are computed from
+    WRITE_STATS = ('narrators_created', 'hadiths_created', 'hadiths_updated')
+
+    def __init__(self, chunk_size: int = 1000, created_by=None, upsert: bool = True):
+        self.chunk_size = chunk_size
+        self.created_by = created_by
+        self.upsert = upsert
+        self.stats = Counter()
+        self.narrator_ids: Dict[str, int] = {}
+        self.category_ids: Dict[str, int] = {}
+        self._maps_loaded = False
+
+    def load_maps(self) -> None:
+        """Load the normalized narrator name map (with merge aliases) and the category name map."""
+        for pk, normalized_name in Narrator.objects.order_by('pk').values_list('pk', 'normalized_name').iterator():
+            self.narrator_ids.setdefault(normalized_name, pk)
+        for normalized_name, narrator_id in NarratorAlias.objects.values_list('normalized_name', 'narrator_id'):
+            self.narrator_ids.setdefault(normalized_name, narrator_id)
+        for pk, name in HadithCategory.objects.order_by('pk').values_list('pk', 'name'):
+            self.category_ids.setdefault(name, pk)
+        self._maps_loaded = True
+
+    def resolve_narrators(self, links: Iterable[Tuple[str, Optional[str], str]]) -> None:
+        """Create the narrators missing from the name map in one bulk insert."""
+        missing = {}
+        for name, _, normalized in links:
+            if normalized not in self.narrator_ids and normalized not in missing:
+                missing[normalized] = name
+        if not missing:
+            return
+        created = Narrator.objects.bulk_create([
+            Narrator(
+                name=name,
+                normalized_name=normalized,
+                reliability='unknown',
+                biography=AUTO_NARRATOR_BIOGRAPHY,
+            )
+            for normalized, name in missing.items()
+        ], batch_size=1000)
+        for narrator in created:
+            self.narrator_ids[narrator.normalized_name] = narrator.pk
+        # Cached misses of the new names would outlive the import
+        forget_all_narrator_names()
+        narrators_changed.send(sender=Narrator, narrator_ids=[narrator.pk for narrator in created])
+        self.stats['narrators_created'] += len(created)
+
+    def resolve_categories(self, names: Iterable[str]) -> None:
+        """Create the categories missing from the name map in one bulk insert."""
+        missing = sorted({name[:100] for name in names} - set(self.category_ids))
+        if not missing:
+            return
+        created = HadithCategory.objects.bulk_create([HadithCategory(name=name) for name in missing])
+        for category in created:
+            self.category_ids[category.name] = category.pk
+        self.stats['categories_created'] += len(created)
+
+    def build_hadith(self, record: Dict[str, Any]) -> Hadith:
+        return Hadith(
+            created_by=self.created_by,
+            source_key=record['source_key'],
+            **{field: record[field] for field in HADITH_FIELDS}
+        )
+
+    def fetch_existing(self, records: Sequence[Dict[str, Any]]) -> Dict[Tuple[str, str], Hadith]:
+        """Load the hadiths matching the natural keys of a chunk in one query."""
+        keys = {natural_key(record) for record in records} - {None}
+        if not keys:
+            return {}
+        queryset = Hadith.objects.filter(
+            source_key__in={source_key for source_key, _ in keys},
+            source_hadith_number__in={number for _, number in keys},
+        ).order_by().only('id', 'source_key', *HADITH_FIELDS)
+        existing = {}
+        for hadith in queryset:
+            key = (hadith.source_key, hadith.source_hadith_number)
+            if key in keys:
+                existing[key] = hadith
+        return existing
+
+    def update_hadiths(self, pairs: Sequence[Tuple[Hadith, Dict[str, Any]]]) -> None:
+        """Write the changed fields of existing hadiths, one ``bulk_update`` per set of changed fields."""
+        groups = defaultdict(list)
+        now = timezone.now()
+        for hadith, record in pairs:
+            changed = tuple(
+                field for field in HADITH_FIELDS
+                if (getattr(hadith, field) or None) != (record[field] or None)
+            )
+            if not changed:
+                continue
+            for field in changed:
+                setattr(hadith, field, record[field])
+            hadith.updated_at = now
+            groups[changed].append(hadith)
+            if 'text' in changed:
+                self.stats['texts_changed'] += 1
+        for fields, hadiths in groups.items():
+            Hadith.objects.bulk_update(hadiths, [*fields, 'updated_at'], batch_size=1000)
+            self.stats['hadiths_updated'] += len(hadiths)
+        if groups:
+            forget_all_hadiths()
+        self.stats['hadiths_unchanged'] += len(pairs) - sum(len(hadiths) for hadiths in groups.values())
+
+    def write_chains(self, pairs: Sequence[Tuple[Hadith, Dict[str, Any]]],
+                     existing_ids: Iterable[int] = ()) -> None:
+        """
+        Bulk insert the asanid, chain links, segments and category links of saved hadiths.
+
+        Args:
+            pairs: ``(hadith, prepared record)`` pairs
+            existing_ids: Ids of hadiths that were already stored; their
+                current asanid and categories are looked up and skipped
+        """
+        existing_ids = set(existing_ids)
+        known_chains, known_categories = defaultdict(set), set()
+        if existing_ids:
+            for hadith_id, fingerprint in Sanad.objects.filter(hadith_id__in=existing_ids).values_list(
+                    'hadith_id', 'chain_fingerprint'):
+                known_chains[hadith_id].add(fingerprint)
+            known_categories = set(
+                Hadith.categories.through.objects.filter(hadith_id__in=existing_ids)
+                .values_list('hadith_id', 'hadithcategory_id')
+            )
+
+        sanads, chains = [], []
+        for hadith, record in pairs:
+            seen = known_chains[hadith.pk]
+            for links in record['asanid']:
+                narrator_ids = [self.narrator_ids[key] for _, _, key in links]
+                fingerprint = chain_fingerprint(narrator_ids)
+                if fingerprint in seen:
+                    if hadith.pk not in existing_ids:
+                        self.stats['duplicate_sanads_skipped'] += 1
+                    continue
+                seen.add(fingerprint)
+                sanads.append(Sanad(hadith_id=hadith.pk, chain_fingerprint=fingerprint))
+                chains.append((narrator_ids, [method for _, method, _ in links]))
+        Sanad.objects.bulk_create(sanads, batch_size=1000)
+
+        links, segments = [], []
+        for sanad, (narrator_ids, methods) in zip(sanads, chains):
+            links.extend(
+                SanadNarrator(sanad_id=sanad.pk, narrator_id=narrator_id, order=order, narration_method=method)
+                for order, (narrator_id, method) in enumerate(zip(narrator_ids, methods), start=1)
+            )
+            segments.extend(build_sanad_segments(sanad.pk, sanad.hadith_id, narrator_ids))
+        SanadNarrator.objects.bulk_create(links, batch_size=5000)
+        SanadSegment.objects.bulk_create(segments, batch_size=5000)
+
+        Through = Hadith.categories.through
+        Through.objects.bulk_create([
+            Through(hadith_id=hadith.pk, hadithcategory_id=category_id)
+            for hadith, record in pairs
+            for category_id in dict.fromkeys(self.category_ids[name[:100]] for name in record['categories'])
+            if (hadith.pk, category_id) not in known_categories
+        ], batch_size=5000, ignore_conflicts=True)
+
+        self.stats['sanads_created'] += len(sanads)
+        self.stats['links_created'] += len(links)
+
+    def write_chunk(self, records: Sequence[Dict[str, Any]]) -> None:
+        """Write one chunk of prepared records in a single transaction."""
+        unique, seen = [], set()
+        for record in records:
+            if not record['text']:
+                continue
+            key = natural_key(record)
+            if key:
+                if key in seen:
+                    self.stats['duplicate_records_skipped'] += 1
+                    continue
+                seen.add(key)
+            unique.append(record)
+        if not unique:
+            return
+
+        with transaction.atomic():
+            existing = self.fetch_existing(unique) if self.upsert else {}
+            new_records = [record for record in unique if natural_key(record) not in existing]
+            updates = [(existing[natural_key(record)], record) for record in unique
+                       if natural_key(record) in existing]
+
+            self.resolve_narrators(link for record in unique for links in record['asanid'] for link in links)
+            self.resolve_categories(name for record in unique for name in record['categories'])
+
+            hadiths = Hadith.objects.bulk_create([self.build_hadith(record) for record in new_records],
+                                                 batch_size=1000)
+            self.update_hadiths(updates)
+            self.write_chains(list(zip(hadiths, new_records)) + updates,
+                              existing_ids=[hadith.pk for hadith, _ in updates])
+        self.stats['hadiths_created'] += len(hadiths)
+
+    def run(self, records: Iterable[Any], progress=None, workers: int = 1,
+            prepare: Callable[[List[Any]], List[Dict[str, Any]]] = prepare_chunk) -> Counter:
+        """
+        Import raw records chunk by chunk.
+
+        With ``workers > 1`` the chunks are prepared by a process pool while
+        this process stays the single writer (see ``map_chunks``).
+
+        Args:
+            records: Raw collection records (e.g. from ``iter_records``)
+            progress: Optional callable receiving the stats after each chunk
+            workers: Number of worker processes preparing chunks
+            prepare: Picklable callable turning a chunk of raw records into
+                prepared records
+
+        Returns:
+            Counter: Import statistics
+        """
+        if not self._maps_loaded:
+            self.load_maps()
+        for prepared in map_chunks(prepare, chunked(records, self.chunk_size), workers=workers):
+            self.write_chunk(prepared)
+            self.stats['records_prepared'] += len(prepared)
+            if progress:
+                progress(self.stats)
+        # The bulk writes bypass the signal handlers that keep the site statistics;
+        # an import that wrote nothing leaves them as they are
+        if any(self.stats[name] for name in self.WRITE_STATS):
+            reconcile_stats()
+        return self.stats
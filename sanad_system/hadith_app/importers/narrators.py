@@ -0,0 +1,256 @@
+import csv
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Narrator, NarratorAlias
+from ..signals import narrators_changed
+from ..utils.lookup_utils import forget_all_narrator_names
+from ..utils.stats_utils import reconcile_stats
+from ..utils.text_utils import normalize_arabic
+from ..utils.validation_utils import validate_year
+from .collection import chunked
+
+NARRATOR_FORMATS = ('csv', 'xlsx')
+NARRATOR_FIELDS = ('birth_year', 'death_year', 'reliability', 'biography')
+
+# Accepted column headers (compared after normalize_arabic)
+COLUMN_ALIASES = {
+    'name': ('name', 'الاسم', 'اسم الراوي'),
+    'birth_year': ('birth_year', 'birth', 'سنة الميلاد', 'المولد'),
+    'death_year': ('death_year', 'death', 'سنة الوفاة', 'الوفاة'),
+    'reliability': ('reliability', 'grade', 'درجة التوثيق', 'الرتبة'),
+    'biography': ('biography', 'bio', 'السيرة الذاتية', 'الترجمة'),
+}
+_HEADERS = {normalize_arabic(alias): field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+RELIABILITY_CHOICES = dict(Narrator._meta.get_field('reliability').choices)
+_RELIABILITY_VALUES = {
+    **{normalize_arabic(key): key for key in RELIABILITY_CHOICES},
+    **{normalize_arabic(label): key for key, label in RELIABILITY_CHOICES.items()},
+}
+
+YEAR_RE = re.compile(r'\d+')
+ARABIC_DIGITS = str.maketrans('٠١٢٣٤٥٦٧٨٩', '0123456789')
+
+
+def _map_header(header: Iterable[Any]) -> List[Optional[str]]:
+    columns = [_HEADERS.get(normalize_arabic(str(cell or ''))) for cell in header]
+    if 'name' not in columns:
+        raise ValueError('The narrator file has no name column')
+    return columns
+
+
+def iter_narrator_rows(path: str, fmt: Optional[str] = None, sheet: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream narrator rows from a CSV or XLSX file.
+
+    The first row holds the column headers, in English or Arabic (see
+    ``COLUMN_ALIASES``); unknown columns are ignored.
+
+    Args:
+        path: Path to the file
+        fmt: ``csv`` or ``xlsx`` (detected from the extension by default)
+        sheet: Worksheet name for XLSX files (the first sheet by default)
+
+    Yields:
+        dict: Raw values keyed by narrator field name
+
+    Raises:
+        ValueError: For an unsupported format, a missing name column or a
+            missing ``openpyxl`` when reading XLSX
+    """
+    fmt = fmt or os.path.splitext(path)[1].lower().lstrip('.')
+    if fmt not in NARRATOR_FORMATS:
+        raise ValueError(f'Unsupported narrator file format: {fmt or path}')
+
+    if fmt == 'csv':
+        with open(path, newline='', encoding='utf-8-sig') as fp:
+            reader = csv.reader(fp)
+            columns = _map_header(next(reader, []))
+            for row in reader:
+                yield {field: value for field, value in zip(columns, row) if field}
+        return
+
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Reading XLSX files requires the openpyxl package')
+    # read_only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        columns = _map_header(next(rows, ()))
+        for row in rows:
+            yield {field: value for field, value in zip(columns, row) if field}
+    finally:
+        workbook.close()
+
+
+def parse_year(value: Any) -> Optional[int]:
+    """Read a year such as ``179``, ``"١٧٩"`` or ``"179 هـ"``."""
+    if value in (None, ''):
+        return None
+    if isinstance(value, (int, float)):
+        year = int(value)
+    else:
+        match = YEAR_RE.search(str(value).translate(ARABIC_DIGITS))
+        if not match:
+            raise ValidationError(f'{value} is not a year')
+        year = int(match.group())
+    validate_year(year)
+    return year
+
+
+def prepare_narrator_row(row: Dict[str, Any], stats: Counter) -> Optional[Dict[str, Any]]:
+    """
+    Clean one raw row into narrator field values.
+
+    Invalid years and unknown reliability grades are dropped (and counted in
+    ``stats``) without rejecting the row.
+
+    Returns:
+        dict: ``name``, ``normalized_name`` and the non-empty narrator fields,
+        or ``None`` for a row without a name
+    """
+    name = str(row.get('name') or '').strip()[:100]
+    normalized_name = normalize_arabic(name)[:100]
+    if not normalized_name:
+        return None
+
+    values = {'name': name, 'normalized_name': normalized_name}
+    for field in ('birth_year', 'death_year'):
+        try:
+            year = parse_year(row.get(field))
+        except ValidationError:
+            stats['invalid_years'] += 1
+            continue
+        if year is not None:
+            values[field] = year
+    reliability = str(row.get('reliability') or '').strip()
+    if reliability:
+        key = _RELIABILITY_VALUES.get(normalize_arabic(reliability))
+        if key:
+            values['reliability'] = key
+        else:
+            stats['invalid_reliability'] += 1
+    biography = str(row.get('biography') or '').strip()
+    if biography:
+        values['biography'] = biography
+    return values
+
+
+class NarratorImporter:
+    """
+    Bulk create or update narrators from rijal rows.
+
+    Rows are matched on their normalized name (and merge aliases) against a
+    map loaded once per run; each chunk is written with one ``bulk_create``
+    and one ``bulk_update`` per set of changed fields.
+    """
+
+    def __init__(self, chunk_size: int = 2000, keep_existing: bool = False):
+        self.chunk_size = chunk_size
+        self.keep_existing = keep_existing
+        self.stats = Counter()
+        self.narrator_ids: Dict[str, int] = {}
+
+    def load_map(self) -> None:
+        for pk, normalized_name in Narrator.objects.order_by('pk').values_list('pk', 'normalized_name').iterator():
+            self.narrator_ids.setdefault(normalized_name, pk)
+        for normalized_name, narrator_id in NarratorAlias.objects.values_list('normalized_name', 'narrator_id'):
+            self.narrator_ids.setdefault(normalized_name, narrator_id)
+
+    def write_chunk(self, rows: List[Dict[str, Any]]) -> None:
+        # Later rows for the same narrator complete earlier ones
+        merged: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            merged.setdefault(row['normalized_name'], {}).update(row)
+
+        existing_rows = {self.narrator_ids[key]: row for key, row in merged.items() if key in self.narrator_ids}
+        new_rows = [row for key, row in merged.items() if key not in self.narrator_ids]
+
+        with transaction.atomic():
+            created = Narrator.objects.bulk_create([
+                Narrator(
+                    name=row['name'],
+                    normalized_name=row['normalized_name'],
+                    reliability=row.get('reliability', 'unknown'),
+                    birth_year=row.get('birth_year'),
+                    death_year=row.get('death_year'),
+                    biography=row.get('biography'),
+                )
+                for row in new_rows
+            ], batch_size=1000)
+            for narrator in created:
+                self.narrator_ids[narrator.normalized_name] = narrator.pk
+            if created:
+                # Cached misses of the new names would outlive the import
+                forget_all_narrator_names()
+                narrators_changed.send(sender=Narrator, narrator_ids=[narrator.pk for narrator in created])
+            self.stats['created'] += len(created)
+
+            groups = defaultdict(list)
+            now = timezone.now()
+            for narrator in Narrator.objects.filter(pk__in=list(existing_rows)).only('id', *NARRATOR_FIELDS):
+                row = existing_rows[narrator.pk]
+                changed = tuple(
+                    field for field in NARRATOR_FIELDS
+                    if field in row and getattr(narrator, field) != row[field]
+                    and not (self.keep_existing and self._has_value(narrator, field))
+                )
+                if not changed:
+                    self.stats['unchanged'] += 1
+                    continue
+                for field in changed:
+                    setattr(narrator, field, row[field])
+                narrator.updated_at = now
+                groups[changed].append(narrator)
+            for fields, narrators in groups.items():
+                Narrator.objects.bulk_update(narrators, [*fields, 'updated_at'], batch_size=1000)
+                narrators_changed.send(sender=Narrator, narrator_ids=[narrator.pk for narrator in narrators])
+                self.stats['updated'] += len(narrators)
+
+    @staticmethod
+    def _has_value(narrator: Narrator, field: str) -> bool:
+        value = getattr(narrator, field)
+        if field == 'reliability':
+            return value != 'unknown'
+        return value not in (None, '')
+
+    def run(self, rows: Iterable[Dict[str, Any]], progress=None) -> Counter:
+        """
+        Import raw narrator rows chunk by chunk.
+
+        Args:
+            rows: Raw rows (e.g. from ``iter_narrator_rows``)
+            progress: Optional callable receiving the stats after each chunk
+
+        Returns:
+            Counter: Import statistics
+        """
+        if not self.narrator_ids:
+            self.load_map()
+        for chunk in chunked(rows, self.chunk_size):
+            self.stats['rows_read'] += len(chunk)
+            prepared = []
+            for row in chunk:
+                values = prepare_narrator_row(row, self.stats)
+                if values is None:
+                    self.stats['skipped'] += 1
+                else:
+                    prepared.append(values)
+            self.write_chunk(prepared)
+            if progress:
+                progress(self.stats)
+        # The bulk writes bypass the signal handlers that keep the site statistics;
+        # an import that wrote nothing leaves them as they are
+        if self.stats['created'] or self.stats['updated']:
+            reconcile_stats()
+        return self.stats
@@ -0,0 +1,65 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, TypeVar
+
+from django.db import connections
+
+T = TypeVar('T')
+
+# Chunks submitted ahead of the writer per worker; bounds the memory held by
+# prepared-but-unwritten chunks when the database is the bottleneck
+PENDING_CHUNKS_PER_WORKER = 2
+
+
+def default_workers() -> int:
+    """Leave one core to the writer process."""
+    return max((os.cpu_count() or 1) - 1, 1)
+
+
+def _init_worker() -> None:
+    # Spawned workers (macOS, Windows) start without a configured Django
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def map_chunks(func: Callable[[Any], T], chunks: Iterable[Any], workers: int = 1,
+               max_pending: Optional[int] = None) -> Iterator[T]:
+    """
+    Apply ``func`` to every chunk in a process pool, yielding results in input order.
+
+    The caller consumes the results in this process, which makes it the single
+    database writer. At most ``max_pending`` chunks are in flight at a time, so
+    reading the input pauses while the writer catches up (backpressure).
+
+    Args:
+        func: A picklable, database-free callable (module-level function or
+            ``functools.partial`` of one)
+        chunks: The input chunks
+        workers: Number of worker processes; ``1`` runs ``func`` in-process
+        max_pending: Maximum number of chunks submitted but not yet consumed
+
+    Yields:
+        The result of ``func`` for each chunk
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield func(chunk)
+        return
+
+    max_pending = max_pending or workers * PENDING_CHUNKS_PER_WORKER
+    # Forked workers must not inherit the writer's open database connections
+    connections.close_all()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    pending = deque()
+    try:
+        for chunk in chunks:
+            pending.append(pool.submit(func, chunk))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
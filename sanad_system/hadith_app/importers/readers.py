@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterator
+
+READ_BLOCK_SIZE = 1 << 16
+
+SUPPORTED_FORMATS = ('json', 'jsonl', 'csv')
+
+
+def detect_format(path: str) -> str:
+    """
+    Guess the collection format from a file extension.
+
+    Raises:
+        ValueError: If the extension is not a supported format
+    """
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext == 'ndjson':
+        ext = 'jsonl'
+    if ext not in SUPPORTED_FORMATS:
+        raise ValueError(f'Unsupported collection format: {ext or path}')
+    return ext
+
+
+def iter_json_array(fp, block_size: int = READ_BLOCK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the objects of a top-level JSON array without loading the file.
+
+    Args:
+        fp: A text file object positioned at the start of the array
+        block_size: Number of characters read per block
+
+    Yields:
+        dict: One decoded array element at a time
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators between elements
+        position = 0
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        buffer = buffer[position:]
+
+        if not started and buffer:
+            if buffer[0] != '[':
+                raise ValueError('Expected a JSON array of hadith records')
+            buffer = buffer[1:]
+            started = True
+            continue
+        if started and buffer.startswith(']'):
+            return
+
+        if buffer:
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                yield item
+                buffer = buffer[end:]
+                continue
+
+        if eof:
+            if started:
+                raise ValueError('Unterminated JSON array')
+            return
+        block = fp.read(block_size)
+        if not block:
+            eof = True
+        buffer += block
+
+
+def iter_jsonl(fp) -> Iterator[Dict[str, Any]]:
+    """Stream the records of a JSON Lines file."""
+    for line_number, line in enumerate(fp, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            raise ValueError(f'Invalid JSON on line {line_number}: {exc}') from exc
+
+
+def iter_csv(fp) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the records of a CSV file with a header row.
+
+    ``categories`` cells hold ``|``-separated names and ``asanid`` cells hold
+    ``|``-separated chains.
+    """
+    for row in csv.DictReader(fp):
+        record = {key.strip(): (value or '').strip() for key, value in row.items() if key}
+        record['categories'] = [c.strip() for c in record.get('categories', '').split('|') if c.strip()]
+        record['asanid'] = [chain for chain in record.get('asanid', '').split('|') if chain.strip()]
+        yield record
+
+
+def iter_records(path: str, fmt: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream hadith records from a JSON, JSON Lines or CSV collection file.
+
+    Args:
+        path: Path to the collection file
+        fmt: One of ``SUPPORTED_FORMATS``; detected from the extension if omitted
+
+    Yields:
+        dict: Raw hadith records
+    """
+    fmt = fmt or detect_format(path)
+    readers = {'json': iter_json_array, 'jsonl': iter_jsonl, 'csv': iter_csv}
+    newline = '' if fmt == 'csv' else None
+    with open(path, encoding='utf-8-sig', newline=newline) as fp:
+        yield from readers[fmt](fp)
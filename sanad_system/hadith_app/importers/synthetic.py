@@ -0,0 +1,310 @@
+import bisect
+import random
+from collections import deque
+from itertools import accumulate
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from ..models import Hadith, HadithCategory
+from ..utils.text_utils import normalize_arabic
+from .collection import HADITH_FIELDS
+
+GIVEN_NAMES = (
+    'محمد', 'أحمد', 'عبد الله', 'عبد الرحمن', 'عمر', 'علي', 'عثمان', 'إبراهيم', 'إسماعيل', 'يحيى',
+    'سفيان', 'مالك', 'سعيد', 'سليمان', 'يزيد', 'هشام', 'حماد', 'شعبة', 'الحسن', 'الحسين',
+    'قتادة', 'عطاء', 'نافع', 'سالم', 'عروة', 'الزهري', 'موسى', 'عيسى', 'يوسف', 'زيد',
+    'عبد الملك', 'عبد العزيز', 'عبد الوهاب', 'عبد الرزاق', 'وكيع', 'الليث', 'أيوب', 'منصور', 'الأعمش', 'جعفر',
+    'خالد', 'بشر', 'حفص', 'مسلم', 'عمرو', 'أنس', 'جابر', 'معاذ', 'أبي', 'حذيفة',
+)
+FATHER_NAMES = (
+    'محمد', 'أحمد', 'عبد الله', 'عمر', 'علي', 'سعيد', 'يحيى', 'إبراهيم', 'سليمان', 'عبد الرحمن',
+    'حرب', 'حنبل', 'إسحاق', 'يوسف', 'عيينة', 'أنس', 'زيد', 'عمرو', 'الحارث', 'مسعود',
+    'عباس', 'عوف', 'ثابت', 'خالد', 'مهدي', 'هارون', 'جرير', 'عامر', 'حبيب', 'دينار',
+)
+NISBAS = (
+    'البصري', 'الكوفي', 'المدني', 'المكي', 'الشامي', 'المصري', 'البغدادي', 'الواسطي', 'اليماني', 'الخراساني',
+    'الأنصاري', 'القرشي', 'التميمي', 'الثقفي', 'الأزدي', 'الهذلي', 'الزبيري', 'المخزومي', 'السلمي', 'الأسدي',
+    'الحافظ', 'الفقيه', 'القاضي', 'الزاهد', 'المقرئ',
+)
+NARRATION_METHODS = ('حدثنا', 'أخبرنا', 'عن', 'سمعت', 'أنبأنا', 'قال')
+METHOD_WEIGHTS = (40, 20, 30, 4, 3, 3)
+MATN_OPENINGS = (
+    'قال رسول الله صلى الله عليه وسلم',
+    'أن النبي صلى الله عليه وسلم قال',
+    'سمعت رسول الله صلى الله عليه وسلم يقول',
+    'كان رسول الله صلى الله عليه وسلم',
+)
+VOCABULARY = (
+    'إن', 'من', 'في', 'على', 'إلى', 'عن', 'لا', 'ما', 'قال', 'كان', 'الله', 'الناس', 'المؤمن', 'المسلم',
+    'الصلاة', 'الزكاة', 'الصوم', 'الحج', 'الجنة', 'النار', 'العلم', 'العمل', 'النية', 'القلب', 'الإيمان',
+    'الإسلام', 'الإحسان', 'الصدقة', 'الرحمة', 'الخير', 'الشر', 'يوم', 'القيامة', 'أحدكم', 'فإن', 'ثم',
+    'حتى', 'إذا', 'فقال', 'يا', 'رسول', 'أخيه', 'لنفسه', 'يحب', 'بالنيات', 'الأعمال', 'وإنما', 'لكل',
+    'امرئ', 'نوى', 'فمن', 'هجرته', 'دنيا', 'يصيبها', 'امرأة', 'ينكحها', 'والذي', 'نفسي', 'بيده', 'لقد',
+    'رأيت', 'أتى', 'رجل', 'فسأله', 'عن', 'الساعة', 'وصلى', 'ركعتين', 'فلما', 'سلم', 'أقبل', 'علينا',
+    'بوجهه', 'أنه', 'قد', 'كل', 'بدعة', 'ضلالة', 'الدين', 'النصيحة', 'لمن', 'ولكتابه', 'ولرسوله', 'وأئمة',
+    'المسلمين', 'وعامتهم', 'الطهور', 'شطر', 'والحمد', 'تملأ', 'الميزان', 'وسبحان', 'البر', 'حسن', 'الخلق',
+    'والإثم', 'حاك', 'صدرك', 'وكرهت', 'أن', 'يطلع', 'عليه', 'اتق', 'حيثما', 'كنت', 'وأتبع', 'السيئة',
+    'الحسنة', 'تمحها', 'وخالق', 'بخلق', 'احفظ', 'يحفظك', 'تجده', 'تجاهك', 'سألت', 'فاسأل', 'استعنت',
+    'فاستعن', 'بالله', 'واعلم', 'الأمة', 'لو', 'اجتمعت', 'ينفعوك', 'بشيء', 'كتبه', 'لك', 'رفعت', 'الأقلام',
+    'وجفت', 'الصحف', 'البيت', 'المسجد', 'الماء', 'الطعام', 'الثوب', 'السوق', 'الليل', 'النهار', 'الفجر',
+)
+GRADES = (('sahih', 45), ('hasan', 25), ('daif', 25), ('mawdu', 5))
+RELIABILITY = (('thiqa', 45), ('saduq', 30), ('weak', 15), ('unknown', 10))
+CATEGORY_BOOKS = (
+    'الإيمان', 'العلم', 'الطهارة', 'الصلاة', 'الزكاة', 'الصوم', 'الحج', 'البيوع', 'النكاح', 'الطلاق',
+    'الجهاد', 'الأطعمة', 'الأشربة', 'الطب', 'اللباس', 'الأدب', 'الرقاق', 'الفتن', 'الأحكام', 'التفسير',
+)
+DOCUMENT_TYPES = ('كتاب', 'مخطوطة', 'بحث علمي')
+
+# Narrator generations (tabaqat), from the Companions (1) to the compilers
+GENERATIONS = 10
+# Relative frequency of chain lengths (number of narrators)
+CHAIN_LENGTHS = {3: 4, 4: 12, 5: 24, 6: 26, 7: 16, 8: 10, 9: 5, 10: 3}
+# Chance of picking a narrator's first, second, ... teacher when building a chain
+TEACHER_WEIGHTS = (60, 25, 10, 5)
+
+
+def _weighted(items: Sequence[Tuple[Any, int]]) -> Tuple[List[Any], List[int]]:
+    return [item for item, _ in items], list(accumulate(weight for _, weight in items))
+
+
+class CorpusGenerator:
+    """
+    Seeded generator of a synthetic but realistically shaped hadith corpus.
+
+    Narrators are spread over generations; each narrator reports from a few
+    teachers of the previous generation, drawn with a Zipf-like weight so
+    that well-known narrators anchor many chains. Chains are walks down this
+    teacher graph, which makes sub-chains shared across hadiths the way real
+    isnads share them. Hadith texts follow a log-normal length distribution
+    and a share of them are reworded variants of earlier texts.
+
+    The same seed and sizes always produce the same corpus.
+    """
+
+    def __init__(self, seed: int = 1, narrators: int = 2000, categories: int = 60, sources: int = 6,
+                 variant_ratio: float = 0.15):
+        self.rng = random.Random(seed)
+        self.variant_ratio = variant_ratio
+        self.narrators = self._build_narrators(narrators)
+        self._keys = {narrator['name']: narrator['key'] for narrator in self.narrators}
+        self._build_teacher_graph()
+        self.categories = self._build_categories(categories)
+        parents = {parent for _, parent in self.categories}
+        self.leaf_categories = [name for name, _ in self.categories if name not in parents]
+        self.sources = [f'المصنف التجريبي {index}' for index in range(1, sources + 1)]
+        self.source_keys = {source: Hadith.make_source_key(source) for source in self.sources}
+        self._recent_texts = deque(maxlen=500)
+        self._grades = _weighted(GRADES)
+        self._methods = list(accumulate(METHOD_WEIGHTS))
+        self._lengths = _weighted(list(CHAIN_LENGTHS.items()))
+
+    def _choice(self, weighted: Tuple[List[Any], List[int]]) -> Any:
+        items, cumulative = weighted
+        return items[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+
+    def _build_narrators(self, count: int) -> List[Dict[str, Any]]:
+        rng = self.rng
+        reliability = _weighted(RELIABILITY)
+        narrators, seen = [], set()
+        for index in range(count):
+            # Later generations are larger, as in the rijal books
+            generation = min(GENERATIONS, 1 + int(GENERATIONS * (index / max(count, 1)) ** 0.8))
+            for attempt in range(50):
+                parts = [rng.choice(GIVEN_NAMES), 'بن', rng.choice(FATHER_NAMES)]
+                if attempt > 5:
+                    parts += ['بن', rng.choice(FATHER_NAMES)]
+                parts.append(rng.choice(NISBAS))
+                name = ' '.join(parts)
+                key = normalize_arabic(name)[:100]
+                if key not in seen:
+                    break
+            else:
+                name = f'{name} {index}'
+                key = normalize_arabic(name)[:100]
+            seen.add(key)
+            death = 10 + generation * 25 + rng.randint(-12, 12)
+            narrators.append({
+                'name': name,
+                'key': key,
+                'generation': generation,
+                'birth_year': max(1, death - rng.randint(50, 95)) if generation > 1 else None,
+                'death_year': death,
+                'reliability': self._choice(reliability),
+            })
+        return narrators
+
+    def _build_teacher_graph(self) -> None:
+        by_generation: Dict[int, List[int]] = {}
+        for index, narrator in enumerate(self.narrators):
+            by_generation.setdefault(narrator['generation'], []).append(index)
+        self.by_generation = by_generation
+        # Zipf-like fame inside each generation
+        fame = {
+            generation: list(accumulate(1 / (rank + 1) ** 1.1 for rank in range(len(members))))
+            for generation, members in by_generation.items()
+        }
+        self.teachers: List[List[int]] = []
+        for narrator in self.narrators:
+            generation = narrator['generation'] - 1
+            while generation > 0 and generation not in by_generation:
+                generation -= 1
+            if generation < 1:
+                self.teachers.append([])
+                continue
+            members, cumulative = by_generation[generation], fame[generation]
+            teachers = []
+            for _ in range(self.rng.randint(1, len(TEACHER_WEIGHTS))):
+                teacher = members[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+                if teacher not in teachers:
+                    teachers.append(teacher)
+            self.teachers.append(teachers)
+        self._collectors = {
+            generation: (members, fame[generation]) for generation, members in by_generation.items()
+        }
+
+    def _build_categories(self, count: int) -> List[Tuple[str, Optional[str]]]:
+        """Return ``(name, parent name)`` pairs, parents first: books, chapters and sub-chapters."""
+        books = [f'كتاب {book}' for book in CATEGORY_BOOKS[:max(1, count // 4)]]
+        categories = [(book, None) for book in books]
+        names = set(books)
+        while len(categories) < count:
+            parent, _ = self.rng.choice(categories)
+            words = ' '.join(self.rng.choices(VOCABULARY[10:], k=2))
+            name = f'باب ما جاء في {words}'[:100]
+            if name not in names:
+                names.add(name)
+                categories.append((name, parent))
+        return categories
+
+    def chain(self) -> List[Dict[str, Any]]:
+        """One sanad as ``{"name", "method"}`` links, from the compiler's teacher to a Companion."""
+        length = self._choice(self._lengths)
+        generation = min(GENERATIONS, length)
+        while generation not in self._collectors:
+            generation -= 1
+        members, cumulative = self._collectors[generation]
+        index = members[bisect.bisect(cumulative, self.rng.random() * cumulative[-1])]
+        chain = [index]
+        while len(chain) < length and self.teachers[index]:
+            teachers = self.teachers[index]
+            weights = list(accumulate(TEACHER_WEIGHTS[:len(teachers)]))
+            index = teachers[bisect.bisect(weights, self.rng.random() * weights[-1])]
+            chain.append(index)
+        return [
+            {
+                'name': self.narrators[index]['name'],
+                'method': NARRATION_METHODS[bisect.bisect(self._methods, self.rng.random() * self._methods[-1])],
+            }
+            for index in chain
+        ]
+
+    def text(self) -> str:
+        rng = self.rng
+        if self._recent_texts and rng.random() < self.variant_ratio:
+            # A variant wording: the same matn with a few words replaced
+            words = rng.choice(self._recent_texts).split(' ')
+            for _ in range(max(1, len(words) // 10)):
+                words[rng.randrange(len(words))] = rng.choice(VOCABULARY)
+            return ' '.join(words)
+        length = min(600, max(8, int(rng.lognormvariate(3.5, 0.6))))
+        text = f"{rng.choice(MATN_OPENINGS)}: {' '.join(rng.choices(VOCABULARY, k=length))}"
+        self._recent_texts.append(text)
+        return text
+
+    def records(self, count: int) -> Iterator[Dict[str, Any]]:
+        """Yield ``count`` raw collection records (the ``import_collection`` format)."""
+        rng = self.rng
+        numbers = dict.fromkeys(self.sources, 0)
+        for _ in range(count):
+            source = rng.choice(self.sources)
+            numbers[source] += 1
+            asanid = [self.chain() for _ in range(1 if rng.random() < 0.7 else rng.randint(2, 4))]
+            yield {
+                'text': self.text(),
+                'source': source,
+                'source_hadith_number': str(numbers[source]),
+                'source_page': str(numbers[source] // 4 + 1),
+                'grade': self._choice(self._grades),
+                'categories': rng.sample(self.leaf_categories, k=min(len(self.leaf_categories), rng.randint(1, 2))),
+                'asanid': asanid,
+            }
+
+    def prepare_chunk(self, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Prepare generated records for ``CollectionImporter``.
+
+        Equivalent to ``prepare_chunk`` of the collection importer, but the
+        narrator keys are looked up instead of normalized per link.
+        """
+        keys = self._keys
+        prepared = []
+        for record in records:
+            values = {field: record.get(field) for field in HADITH_FIELDS}
+            values['source_key'] = self.source_keys[record['source']]
+            values['categories'] = record['categories']
+            values['asanid'] = [
+                [(link['name'], link['method'], keys[link['name']]) for link in chain]
+                for chain in record['asanid']
+            ]
+            prepared.append(values)
+        return prepared
+
+    def narrator_rows(self) -> Iterator[Dict[str, Any]]:
+        """Narrator rows in the ``NarratorImporter`` format."""
+        for narrator in self.narrators:
+            yield {
+                'name': narrator['name'],
+                'birth_year': narrator['birth_year'],
+                'death_year': narrator['death_year'],
+                'reliability': narrator['reliability'],
+                'biography': f"راوٍ من الطبقة {narrator['generation']} (بيانات تجريبية)",
+            }
+
+    def create_categories(self) -> int:
+        """Create the category tree, reusing categories that already exist by name."""
+        ids = dict(HadithCategory.objects.filter(name__in=[name for name, _ in self.categories])
+                   .values_list('name', 'pk'))
+        created = 0
+        with transaction.atomic():
+            # Parents come first, so one insert per tree level
+            level = [(name, parent) for name, parent in self.categories if parent is None]
+            while level:
+                new = [HadithCategory(name=name, parent_id=ids.get(parent)) for name, parent in level
+                       if name not in ids]
+                for category in HadithCategory.objects.bulk_create(new):
+                    ids[category.name] = category.pk
+                created += len(new)
+                names = {name for name, _ in level}
+                level = [(name, parent) for name, parent in self.categories if parent in names]
+        return created
+
+    def create_documents(self, count: int) -> int:
+        """Create ``count`` small library documents with text files, skipping existing titles."""
+        from library_app.models import Document, DocumentType
+
+        types = []
+        for name in DOCUMENT_TYPES:
+            document_type, _ = DocumentType.objects.get_or_create(name=name)
+            types.append(document_type)
+        titles = [f'وثيقة تجريبية {index}' for index in range(1, count + 1)]
+        existing = set(Document.objects.filter(title__in=titles).values_list('title', flat=True))
+        documents = []
+        for index, title in enumerate(titles, start=1):
+            body = '\n\n'.join(self.text() for _ in range(self.rng.randint(3, 30)))
+            if title in existing:
+                continue
+            path = default_storage.save(f'library/synthetic/document_{index}.txt',
+                                        ContentFile(body.encode('utf-8')))
+            documents.append(Document(
+                title=title,
+                document_type=self.rng.choice(types),
+                file=path,
+                description=body[:200],
+                is_public=self.rng.random() < 0.8,
+            ))
+        Document.objects.bulk_create(documents)
+        return len(documents)
@@ -0,0 +1,221 @@
+import hashlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.core.exceptions import ValidationError
+
+from ..utils.validation_utils import validate_hadith_text, validate_sanad_text, validate_year
+from .collection import GRADES, chunked, natural_key, parse_chain, prepare_record
+from .pipeline import map_chunks
+
+# Per-record problems kept in the report; the counts always cover every record
+MAX_REPORTED_RECORDS = 1000
+
+
+def _messages(validator, value) -> List[str]:
+    try:
+        validator(value)
+    except ValidationError as exc:
+        return [str(message) for message in exc.messages]
+    return []
+
+
+def _year(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _text_key(prepared: Dict[str, Any]) -> bytes:
+    # A stable digest: str hashes differ between worker processes
+    data = f"{prepared['source_key']}\x00{prepared['text']}".encode('utf-8')
+    return hashlib.blake2b(data, digest_size=12).digest()
+
+
+def _raw_chains(record: Dict[str, Any]) -> List[Any]:
+    asanid = record.get('asanid')
+    if asanid is None:
+        return [record['sanad']] if record.get('sanad') else []
+    return [asanid] if isinstance(asanid, str) else list(asanid)
+
+
+def check_chain_continuity(chain: Any) -> List[Dict[str, Any]]:
+    """
+    Check that consecutive narrators of a raw chain could have met.
+
+    Links given as objects may carry ``birth_year`` and ``death_year``. The
+    chain runs from the compiler to the Companion, so each narrator must have
+    been born before the death of the narrator he reports from.
+    """
+    problems = []
+    if isinstance(chain, str):
+        return problems
+    links = [link for link in chain or [] if isinstance(link, dict)]
+    for link in links:
+        for field in ('birth_year', 'death_year'):
+            year = _year(link.get(field))
+            if link.get(field) not in (None, '') and year is None:
+                problems.append({'code': 'invalid_year', 'field': field, 'message': f"{link.get('name')}: {link[field]}"})
+            elif year is not None:
+                problems.extend(
+                    {'code': 'invalid_year', 'field': field, 'message': f"{link.get('name')}: {message}"}
+                    for message in _messages(validate_year, year)
+                )
+    for student, teacher in zip(links, links[1:]):
+        born, teacher_died = _year(student.get('birth_year')), _year(teacher.get('death_year'))
+        if born is not None and teacher_died is not None and born > teacher_died:
+            problems.append({
+                'code': 'broken_chain',
+                'field': 'asanid',
+                'message': f"{student.get('name')} (b. {born}) cannot narrate from "
+                           f"{teacher.get('name')} (d. {teacher_died})",
+            })
+    return problems
+
+
+def validate_record(index: int, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run every record-level check on one raw collection record.
+
+    Args:
+        index: 1-based position of the record in the input
+        record: The raw record
+
+    Returns:
+        dict: ``index``, ``key`` (natural key or None), ``text_key``,
+        ``errors`` and ``warnings`` (lists of ``{code, field, message}``)
+    """
+    errors, warnings = [], []
+    try:
+        prepared = prepare_record(record)
+    except (AttributeError, TypeError) as exc:
+        return {
+            'index': index, 'key': None, 'text_key': None, 'warnings': [],
+            'errors': [{'code': 'malformed', 'field': None, 'message': str(exc)}],
+        }
+
+    errors.extend({'code': 'hadith_text', 'field': 'text', 'message': message}
+                  for message in _messages(validate_hadith_text, prepared['text']))
+    if not prepared['source']:
+        errors.append({'code': 'missing_source', 'field': 'source', 'message': 'Source is empty.'})
+    if not prepared['source_hadith_number']:
+        warnings.append({'code': 'missing_number', 'field': 'source_hadith_number',
+                         'message': 'Without a hadith number the record cannot be matched on re-import.'})
+    grade = record.get('grade')
+    if grade not in (None, '') and str(grade).strip() not in GRADES:
+        warnings.append({'code': 'invalid_grade', 'field': 'grade', 'message': f'Unknown grade: {grade}'})
+
+    raw_chains = _raw_chains(record)
+    if not prepared['asanid']:
+        warnings.append({'code': 'no_sanad', 'field': 'asanid', 'message': 'Record has no sanad.'})
+    seen_chains = set()
+    for raw in raw_chains:
+        links = parse_chain(raw)
+        if not links:
+            continue
+        keys = tuple(key for _, _, key in links)
+        if isinstance(raw, str):
+            errors.extend({'code': 'sanad_text', 'field': 'asanid', 'message': message}
+                          for message in _messages(validate_sanad_text, raw))
+        elif len(keys) < 2:
+            errors.append({'code': 'sanad_text', 'field': 'asanid',
+                           'message': 'A sanad must have at least two narrators.'})
+        if any(a == b for a, b in zip(keys, keys[1:])):
+            errors.append({'code': 'repeated_narrator', 'field': 'asanid',
+                           'message': 'The same narrator appears twice in a row.'})
+        if keys in seen_chains:
+            warnings.append({'code': 'duplicate_sanad', 'field': 'asanid',
+                             'message': 'The same chain is listed twice.'})
+        seen_chains.add(keys)
+        errors.extend(check_chain_continuity(raw))
+
+    return {
+        'index': index,
+        'key': natural_key(prepared),
+        'text_key': _text_key(prepared) if prepared['text'] else None,
+        'errors': errors,
+        'warnings': warnings,
+    }
+
+
+def validate_chunk(items: Sequence[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Validate a chunk of ``(index, record)`` pairs; runs in the import worker processes."""
+    return [validate_record(index, record) for index, record in items]
+
+
+class ValidationReport:
+    """Aggregates per-record results and runs the cross-record duplicate checks."""
+
+    def __init__(self, max_records: int = MAX_REPORTED_RECORDS):
+        self.max_records = max_records
+        self.total = 0
+        self.valid = 0
+        self.error_counts = Counter()
+        self.warning_counts = Counter()
+        self.records: List[Dict[str, Any]] = []
+        self._keys: Dict[Tuple[str, str], int] = {}
+        self._texts: Dict[bytes, int] = {}
+        self.reported = 0
+
+    def add(self, result: Dict[str, Any]) -> None:
+        errors, warnings = list(result['errors']), list(result['warnings'])
+        key = result['key']
+        if key is not None:
+            first = self._keys.setdefault(key, result['index'])
+            if first != result['index']:
+                errors.append({'code': 'duplicate_key', 'field': 'source_hadith_number',
+                               'message': f'Hadith number {key[1]} already used by record {first}.'})
+        if result['text_key'] is not None:
+            first = self._texts.setdefault(result['text_key'], result['index'])
+            if first != result['index']:
+                warnings.append({'code': 'duplicate_text', 'field': 'text',
+                                 'message': f'Same text and source as record {first}.'})
+
+        self.total += 1
+        self.valid += not errors
+        self.error_counts.update(error['code'] for error in errors)
+        self.warning_counts.update(warning['code'] for warning in warnings)
+        if not (errors or warnings):
+            return
+        self.reported += 1
+        if len(self.records) < self.max_records:
+            self.records.append({'record': result['index'], 'errors': errors, 'warnings': warnings})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'total_records': self.total,
+            'valid_records': self.valid,
+            'invalid_records': self.total - self.valid,
+            'errors': dict(self.error_counts.most_common()),
+            'warnings': dict(self.warning_counts.most_common()),
+            'records': self.records,
+            'records_truncated': self.reported > len(self.records),
+        }
+
+
+def validate_records(records: Iterable[Dict[str, Any]], chunk_size: int = 1000, workers: int = 1,
+                     progress=None, max_records: int = MAX_REPORTED_RECORDS) -> ValidationReport:
+    """
+    Validate a collection without touching the database.
+
+    Record checks run in worker processes; duplicate natural keys and texts
+    across the whole input are detected while the results are aggregated.
+
+    Args:
+        records: Raw collection records (e.g. from ``iter_records``)
+        chunk_size: Number of records per worker task
+        workers: Number of worker processes
+        progress: Optional callable receiving the report after each chunk
+        max_records: Maximum number of per-record entries kept in the report
+
+    Returns:
+        ValidationReport: The aggregated report
+    """
+    report = ValidationReport(max_records=max_records)
+    for results in map_chunks(validate_chunk, chunked(enumerate(records, start=1), chunk_size), workers=workers):
+        for result in results:
+            report.add(result)
+        if progress:
+            progress(report)
+    return report
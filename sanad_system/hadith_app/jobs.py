@@ -0,0 +1,423 @@
+"""
+Database-backed background jobs.
+
+Handlers are registered with the ``@register`` decorator in a ``jobs`` module of
+any installed app and queued with ``enqueue``; the ``run_workers``
+management command runs them in worker processes. A worker claims a job
+with a conditional ``UPDATE ... WHERE status = 'queued'``, so several
+workers can poll the same table on SQLite and PostgreSQL without a broker.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Any, Callable, Dict, Optional
+
+from django.db import OperationalError, connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Queued jobs fetched per claim attempt; the first one still queued is taken
+CLAIM_BATCH_SIZE = 10
+
+# A failed attempt is retried after RETRY_DELAY * 2 ** (attempts - 1) seconds
+RETRY_DELAY = 30
+
+# A running job whose worker has not reported for this long is requeued
+STALE_AFTER = 30 * 60
+
+# Seconds between a worker's checks for stale jobs
+STALE_CHECK_INTERVAL = 60
+
+# Seconds between the lock refreshes of a running job (at most a third of stale_after)
+HEARTBEAT_INTERVAL = 60
+
+# Finished jobs are deleted this many seconds after they end; workers prune
+# at most once per PRUNE_INTERVAL seconds
+JOB_RETENTION = 7 * 24 * 60 * 60
+PRUNE_INTERVAL = 60 * 60
+
+# SQLite lets one writer in at a time; a write that finds the database locked
+# is retried this many times, after LOCKED_RETRY_DELAY * 2 ** n seconds
+LOCKED_RETRIES = 6
+LOCKED_RETRY_DELAY = 0.2
+
+_registry: Dict[str, Callable] = {}
+_discovered = False
+
+
+def register(name: Optional[str] = None, max_attempts: int = 3,
+             viewable_by: Optional[Callable[..., bool]] = None):
+    """
+    Register a job handler.
+
+    The handler is called as ``handler(job, **job.payload)``; it may report
+    progress with ``job.set_progress(done, total, message)`` and its return
+    value (JSON-serializable) is stored as the job result.
+
+    A job's status is shown to the user who queued it and to staff; for jobs
+    shared between users (e.g. one conversion of a public document),
+    ``viewable_by(user, **payload)`` grants it to other users as well.
+    """
+    def decorator(func):
+        func.job_name = name or f'{func.__module__}.{func.__name__}'
+        func.max_attempts = max_attempts
+        func.viewable_by = viewable_by
+        _registry[func.job_name] = func
+        return func
+    return decorator
+
+
+def discover_handlers() -> None:
+    """Import the ``jobs`` module of every installed app."""
+    global _discovered
+    if not _discovered:
+        autodiscover_modules('jobs')
+        _discovered = True
+
+
+def get_handler(name: str) -> Optional[Callable]:
+    if name not in _registry:
+        discover_handlers()
+    return _registry.get(name)
+
+
+def enqueue(handler, payload: Optional[Dict[str, Any]] = None, *, priority: int = 0,
+            delay: float = 0, max_attempts: Optional[int] = None, user=None) -> Job:
+    """
+    Queue a job.
+
+    Args:
+        handler: A registered handler or its name
+        payload: JSON-serializable keyword arguments for the handler
+        priority: Higher priorities are claimed first
+        delay: Seconds to wait before the job may run
+        max_attempts: Attempts before the job is marked failed (the
+            handler's default otherwise)
+        user: The user the job runs for, if any
+
+    Returns:
+        Job: The queued job
+
+    Raises:
+        LookupError: If no handler is registered under that name
+    """
+    name = getattr(handler, 'job_name', handler)
+    func = get_handler(name)
+    if func is None:
+        raise LookupError(f'No job handler registered as {name!r}')
+    return Job.objects.create(
+        name=name,
+        payload=payload or {},
+        priority=priority,
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or func.max_attempts,
+        created_by=user if getattr(user, 'is_authenticated', False) else None,
+    )
+
+
+def find_active_job(handler, **payload) -> Optional[Job]:
+    """Return a queued or running job of ``handler`` with exactly this payload."""
+    name = getattr(handler, 'job_name', handler)
+    jobs = Job.objects.filter(name=name, status__in=[Job.QUEUED, Job.RUNNING])
+    return next((active for active in jobs.order_by('pk') if active.payload == payload), None)
+
+
+def can_view_job(job: Job, user) -> bool:
+    """Whether ``user`` may read the status of ``job`` (see ``register``)."""
+    if user.is_staff or (job.created_by_id is not None and job.created_by_id == user.pk):
+        return True
+    handler = get_handler(job.name)
+    viewable_by = getattr(handler, 'viewable_by', None)
+    return bool(viewable_by and viewable_by(user, **job.payload))
+
+
+def is_locked_error(exc: OperationalError) -> bool:
+    return 'locked' in str(exc)
+
+
+def retry_locked(func: Callable, *args, **kwargs):
+    """
+    Call ``func``, retrying with exponential backoff while the database is locked.
+
+    Raises:
+        OperationalError: If the database stays locked, or on any other error
+    """
+    for attempt in range(LOCKED_RETRIES):
+        try:
+            return func(*args, **kwargs)
+        except OperationalError as exc:
+            if not is_locked_error(exc) or attempt == LOCKED_RETRIES - 1:
+                raise
+        time.sleep(LOCKED_RETRY_DELAY * 2 ** attempt)
+
+
+def claim_job(worker: str) -> Optional[Job]:
+    """
+    Claim the next due job for ``worker``.
+
+    Candidates are read without locking, then claimed one at a time with a
+    conditional UPDATE; when another worker won the race the row no longer
+    matches ``status = 'queued'`` and the next candidate is tried.
+    """
+    now = timezone.now()
+    candidates = (Job.objects.filter(status=Job.QUEUED, run_after__lte=now)
+                  .order_by('-priority', 'run_after', 'pk')
+                  .values_list('pk', flat=True)[:CLAIM_BATCH_SIZE])
+    for pk in list(candidates):
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            worker=worker,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            locked_at=now,
+            progress=0,
+            progress_message='',
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _finish_failed(job: Job, error: str) -> None:
+    now = timezone.now()
+    update = {'error': error, 'worker': '', 'locked_at': None}
+    if job.attempts < job.max_attempts:
+        update.update(status=Job.QUEUED,
+                      run_after=now + timedelta(seconds=RETRY_DELAY * 2 ** max(job.attempts - 1, 0)))
+    else:
+        update.update(status=Job.FAILED, finished_at=now)
+    Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update(**update)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Refresh the lock of a running job from its worker while the handler runs.
+
+    Handlers that never call ``set_progress`` would otherwise look stale to
+    ``requeue_stale_jobs`` once they run longer than ``stale_after`` and be
+    run a second time.
+    """
+
+    def __init__(self, job: Job, interval: float = HEARTBEAT_INTERVAL):
+        super().__init__(name=f'job-{job.pk}-heartbeat', daemon=True)
+        self.job = job
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    Job.objects.filter(pk=self.job.pk, status=Job.RUNNING, worker=self.job.worker).update(
+                        locked_at=timezone.now(),
+                    )
+                except OperationalError as exc:
+                    if not is_locked_error(exc):
+                        raise
+                    # The handler holds the write lock; the next beat will get through
+        finally:
+            # The thread has its own database connection
+            connections.close_all()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+def run_job(job: Job, heartbeat_interval: float = HEARTBEAT_INTERVAL) -> bool:
+    """
+    Run a claimed job and record its outcome.
+
+    A failed attempt is requeued with exponential backoff until the job has
+    used ``max_attempts``, then marked failed with the traceback. The job's
+    lock is refreshed every ``heartbeat_interval`` seconds while it runs.
+
+    Returns:
+        bool: Whether the handler succeeded
+    """
+    handler = get_handler(job.name)
+    if handler is None:
+        retry_locked(_finish_failed, job, f'No job handler registered as {job.name!r}')
+        return False
+    try:
+        with Heartbeat(job, heartbeat_interval):
+            result = handler(job, **job.payload)
+    except Exception:
+        retry_locked(_finish_failed, job, traceback.format_exc())
+        return False
+    retry_locked(
+        Job.objects.filter(pk=job.pk, status=Job.RUNNING, worker=job.worker).update,
+        status=Job.SUCCEEDED,
+        result=result,
+        error='',
+        progress=100,
+        finished_at=timezone.now(),
+        locked_at=None,
+    )
+    return True
+
+
+def requeue_stale_jobs(stale_after: float = STALE_AFTER) -> int:
+    """Release running jobs whose worker stopped reporting (e.g. was killed)."""
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    count = 0
+    for stale in Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff):
+        _finish_failed(stale, stale.error or f'Worker {stale.worker} stopped responding')
+        count += 1
+    return count
+
+
+def prune_jobs(retention: float = JOB_RETENTION) -> int:
+    """
+    Delete jobs that finished more than ``retention`` seconds ago.
+
+    Home page refreshes and statistics reconciles queue a job on every
+    trigger, so the table would otherwise grow without bound.
+
+    Returns:
+        int: Number of jobs deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    deleted, _ = Job.objects.filter(status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=cutoff).delete()
+    return deleted
+
+
+def worker_name(index: int = 0) -> str:
+    return f'{socket.gethostname()}:{os.getpid()}:{index}'
+
+
+def work(worker: str, burst: bool = False, poll_interval: float = 1.0,
+         stale_after: float = STALE_AFTER, should_stop: Callable[[], bool] = lambda: False,
+         log: Optional[Callable[[str], None]] = None) -> int:
+    """
+    Claim and run jobs until ``should_stop()`` is true.
+
+    Args:
+        worker: Name recorded on claimed jobs
+        burst: Return once no job is due instead of polling
+        poll_interval: Seconds to sleep when the queue is empty
+        stale_after: Seconds after which another worker's silent job is requeued
+        should_stop: Checked between jobs
+        log: Optional callable receiving one line per finished job
+
+    Returns:
+        int: Number of jobs run
+    """
+    processed = 0
+    last_stale_check = last_prune = float('-inf')
+    heartbeat_interval = min(HEARTBEAT_INTERVAL, stale_after / 3)
+    while not should_stop():
+        try:
+            if time.monotonic() - last_stale_check > STALE_CHECK_INTERVAL:
+                retry_locked(requeue_stale_jobs, stale_after)
+                last_stale_check = time.monotonic()
+            if time.monotonic() - last_prune > PRUNE_INTERVAL:
+                retry_locked(prune_jobs)
+                last_prune = time.monotonic()
+            claimed = retry_locked(claim_job, worker)
+        except OperationalError as exc:
+            if not is_locked_error(exc):
+                raise
+            # Still locked after the retries: try again on the next poll
+            if log:
+                log(f'{worker} database locked, waiting')
+            time.sleep(poll_interval)
+            continue
+        if claimed is None:
+            if burst:
+                break
+            time.sleep(poll_interval)
+            continue
+        started = time.monotonic()
+        try:
+            succeeded = run_job(claimed, heartbeat_interval)
+        except OperationalError as exc:
+            if not is_locked_error(exc):
+                raise
+            # The outcome could not be recorded; the job is requeued once stale
+            succeeded = False
+        processed += 1
+        if log:
+            log(f"{worker} {claimed.name} #{claimed.pk} "
+                f"{'succeeded' if succeeded else 'failed'} in {time.monotonic() - started:.2f}s")
+    return processed
+
+
+def run_worker_process(index: int, stop_event, options: Dict[str, Any]) -> None:
+    """Entry point of a ``run_workers`` worker process."""
+    # Ctrl+C reaches the whole process group; the parent sets stop_event so
+    # the current job can finish
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        # Spawned workers (macOS, Windows) start without a configured Django
+        django.setup()
+    try:
+        work(worker_name(index), should_stop=stop_event.is_set, log=logger.info, **options)
+    finally:
+        connections.close_all()
+
+
+# Avatars are shown at most this large (pixels per side)
+AVATAR_MAX_SIZE = 512
+
+
+@register('hadith_app.resize_avatar')
+def resize_avatar(job, profile_id):
+    """Downscale an uploaded avatar in place so pages do not serve multi-megabyte images."""
+    from io import BytesIO
+
+    from django.core.files.base import ContentFile
+    from PIL import Image, ImageOps
+
+    from .models import UserProfile
+
+    profile = UserProfile.objects.filter(pk=profile_id).first()
+    if profile is None or not profile.avatar:
+        return {'resized': False}
+    with profile.avatar.open('rb') as fp:
+        image = Image.open(fp)
+        image_format = image.format or 'PNG'
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if max(image.size) <= AVATAR_MAX_SIZE:
+        return {'resized': False}
+
+    image.thumbnail((AVATAR_MAX_SIZE, AVATAR_MAX_SIZE))
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=image_format)
+    name = profile.avatar.name
+    profile.avatar.storage.delete(name)
+    profile.avatar.storage.save(name, ContentFile(buffer.getvalue()))
+    return {'resized': True, 'size': list(image.size)}
+
+
+@register('hadith_app.reconcile_stats', max_attempts=1)
+def reconcile_stats(job):
+    """Recompute the site statistics counters (queued by ``get_site_stats`` when they are stale)."""
+    from .utils.stats_utils import reconcile_stats as reconcile
+    return reconcile()
+
+
+@register('hadith_app.refresh_home_snapshot', max_attempts=1)
+def refresh_home_snapshot(job):
+    """Rebuild the cached home page snapshot (queued by writes and by stale reads)."""
+    from .utils.home_utils import refresh_home_snapshot as refresh
+    return {'built_at': refresh()['built_at']}
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hadith_app.models import Hadith, HadithMatnBand
+from hadith_app.utils.lookup_utils import forget_all_hadiths
+from hadith_app.utils.matn_utils import (
+    SIMILARITY_THRESHOLD, cluster_matns, signature_bands, signature_to_bytes,
+)
+
+
+class Command(BaseCommand):
+    help = 'Clusters variant wordings of the same hadith using MinHash/LSH over normalized shingles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Number of texts per vectorized signature batch')
+        parser.add_argument('--threshold', type=float, default=SIMILARITY_THRESHOLD,
+                            help='Minimum estimated Jaccard similarity to join a cluster')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        started = time.monotonic()
+
+        rows = Hadith.objects.order_by('pk').values_list('id', 'text').iterator(chunk_size=batch_size)
+        clusters, signatures = cluster_matns(rows, batch_size=batch_size, threshold=options['threshold'])
+        self.stdout.write(f'Computed {len(signatures)} signatures in {time.monotonic() - started:.1f}s')
+
+        hadith_ids = sorted(signatures)
+        for start in range(0, len(hadith_ids), batch_size):
+            chunk = hadith_ids[start:start + batch_size]
+            with transaction.atomic():
+                Hadith.objects.bulk_update(
+                    [
+                        Hadith(
+                            pk=hadith_id,
+                            matn_signature=signature_to_bytes(signatures[hadith_id]),
+                            matn_cluster=clusters[hadith_id],
+                        )
+                        for hadith_id in chunk
+                    ],
+                    ['matn_signature', 'matn_cluster'],
+                    batch_size=500,
+                )
+                HadithMatnBand.objects.filter(hadith_id__in=chunk).delete()
+                HadithMatnBand.objects.bulk_create(
+                    [
+                        HadithMatnBand(hadith_id=hadith_id, band=band, bucket=bucket)
+                        for hadith_id in chunk
+                        for band, bucket in enumerate(signature_bands(signatures[hadith_id]))
+                    ],
+                    batch_size=5000,
+                )
+                forget_all_hadiths()
+
+        cluster_count = len(set(clusters.values()))
+        self.stdout.write(self.style.SUCCESS(
+            f'Clustered {len(hadith_ids)} hadiths into {cluster_count} groups '
+            f'in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hadith_app.models import Sanad
+from hadith_app.utils.sanad_utils import fold_duplicate_sanads
+
+
+class Command(BaseCommand):
+    help = 'Fills sanad chain fingerprints and merges duplicate sanads of the same hadith'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Number of hadiths processed per transaction')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Report duplicates without changing the database')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        dry_run = options['dry_run']
+
+        hadith_ids = list(
+            Sanad.objects.order_by('hadith_id').values_list('hadith_id', flat=True).distinct()
+        )
+        merged = updated = 0
+        for start in range(0, len(hadith_ids), batch_size):
+            chunk = hadith_ids[start:start + batch_size]
+            with transaction.atomic():
+                chunk_merged, chunk_updated = fold_duplicate_sanads(chunk, dry_run)
+            merged += chunk_merged
+            updated += chunk_updated
+
+        verb = 'Would merge' if dry_run else 'Merged'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {merged} duplicate sanads; {updated} fingerprints updated'
+        ))
@@ -0,0 +1,57 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hadith_app.exporters import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, iter_export, iter_hadith_records
+from hadith_app.models import Hadith
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports every hadith with its asanid (ordered narrators and narration methods) and '
+        'categories as JSON Lines or CSV, in the layout import_collection reads. '
+        'Hadiths are streamed in chunks, so memory use does not grow with the corpus.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file, or "-" for standard output')
+        parser.add_argument('--format', choices=EXPORT_FORMATS,
+                            help='Output format (detected from the file extension by default)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of hadiths read (with their chains) per batch of queries')
+        parser.add_argument('--source', help='Only export hadiths from this source')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if not fmt:
+            ext = os.path.splitext(path)[1].lower().lstrip('.')
+            fmt = 'jsonl' if ext == 'ndjson' else ext
+        if fmt not in EXPORT_FORMATS:
+            raise CommandError(f'Unsupported export format: {fmt or path}; use --format')
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        queryset = Hadith.objects.all()
+        if options['source']:
+            queryset = queryset.filter(source_key=Hadith.make_source_key(options['source']))
+
+        started = time.monotonic()
+        count = 0
+
+        def counted(records):
+            nonlocal count
+            for count, record in enumerate(records, start=1):
+                yield record
+
+        lines = iter_export(counted(iter_hadith_records(queryset, options['chunk_size'])), fmt)
+        if path == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(path, 'w', encoding='utf-8', newline='') as fp:
+            fp.writelines(lines)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {count} hadiths to {path} in {time.monotonic() - started:.1f}s'
+        ))
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hadith_app.exporters import EXPORT_CHUNK_SIZE, find_book, iter_tei, source_queryset
+from hadith_app.models import HadithBook
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports the hadiths of one source as a TEI P5 document: each hadith with its asanid '
+        '(narrators marked as persName, linked to a listPerson in the header) and its matn. '
+        'The document is written incrementally, so memory use does not grow with the book.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Output file, or "-" for standard output')
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--source', help='Source name of the hadiths to export')
+        target.add_argument('--book', type=int,
+                            help='Id of the HadithBook whose title names the source; '
+                                 'its author, date and description fill the TEI header')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Number of hadiths read (with their chains) per batch of queries')
+
+    def handle(self, *args, **options):
+        if options['book']:
+            try:
+                book = HadithBook.objects.get(pk=options['book'])
+            except HadithBook.DoesNotExist:
+                raise CommandError(f"Book {options['book']} does not exist")
+            source = book.title
+        else:
+            source = options['source']
+            book = find_book(source)
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+        count = source_queryset(source).count()
+        if not count:
+            raise CommandError(f"No hadiths found for source '{source}'")
+
+        started = time.monotonic()
+        fragments = iter_tei(source, book, options['chunk_size'])
+        path = options['path']
+        if path == '-':
+            for fragment in fragments:
+                self.stdout.write(fragment, ending='')
+            return
+        with open(path, 'w', encoding='utf-8') as fp:
+            fp.writelines(fragments)
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {count} hadiths of {source} to {path} in {time.monotonic() - started:.1f}s'
+        ))
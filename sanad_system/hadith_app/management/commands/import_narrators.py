@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hadith_app.importers import NARRATOR_FORMATS, NarratorImporter, iter_narrator_rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports narrators from a CSV or XLSX rijal file. The first row names the columns '
+        '(name, birth_year, death_year, reliability, biography, or their Arabic headers); '
+        'rows are matched to existing narrators by normalized name.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the narrators file')
+        parser.add_argument('--format', choices=NARRATOR_FORMATS,
+                            help='Input format (detected from the file extension by default)')
+        parser.add_argument('--sheet', help='Worksheet name for XLSX files')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Number of rows written per transaction')
+        parser.add_argument('--keep-existing', action='store_true',
+                            help='Only fill empty fields of existing narrators')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(stats):
+            self.stdout.write(
+                f"{stats['rows_read']} rows, {stats['created']} created, {stats['updated']} updated"
+            )
+
+        importer = NarratorImporter(chunk_size=options['chunk_size'], keep_existing=options['keep_existing'])
+        try:
+            rows = iter_narrator_rows(options['path'], options['format'], options['sheet'])
+            stats = importer.run(rows, progress=progress)
+        except (OSError, KeyError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {stats['rows_read']} rows in {time.monotonic() - started:.1f}s: "
+            f"{stats['created']} narrators created, {stats['updated']} updated, "
+            f"{stats['unchanged']} unchanged, {stats['skipped']} rows without a name"
+        ))
+        if stats['invalid_years'] or stats['invalid_reliability']:
+            self.stdout.write(self.style.WARNING(
+                f"Ignored {stats['invalid_years']} invalid years and "
+                f"{stats['invalid_reliability']} unknown reliability grades"
+            ))
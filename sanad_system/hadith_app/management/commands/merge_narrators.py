@@ -0,0 +1,64 @@
+import csv
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hadith_app.utils.narrator_utils import find_duplicate_narrators, merge_narrator_groups
+
+
+class Command(BaseCommand):
+    help = (
+        'Merges duplicate narrators: re-points their chain links to the kept narrator, '
+        'folds asanid that become identical and records the merged names as aliases'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--into', type=int, help='Id of the narrator to keep')
+        parser.add_argument('narrators', nargs='*', type=int, help='Ids of the narrators merged into --into')
+        parser.add_argument('--file', help='CSV file of "target_id,narrator_id" rows to merge')
+        parser.add_argument('--auto', action='store_true',
+                            help='Merge narrators whose names normalize to the same form into the oldest one')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of merge groups per transaction')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the merges')
+
+    def handle(self, *args, **options):
+        groups = self.collect_groups(options)
+        total = sum(len(ids) for ids in groups.values())
+        if options['dry_run'] or not groups:
+            self.stdout.write(self.style.SUCCESS(f'{total} narrators would be merged into {len(groups)} narrators'))
+            return
+
+        stats = Counter()
+        items = list(groups.items())
+        batch_size = options['batch_size']
+        for start in range(0, len(items), batch_size):
+            try:
+                stats.update(merge_narrator_groups(dict(items[start:start + batch_size])))
+            except ValueError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f"{stats['narrators_merged']}/{total} narrators merged")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Merged {stats['narrators_merged']} narrators into {len(groups)}: "
+            f"{stats['links_repointed']} links re-pointed, {stats['links_collapsed']} repeated links removed, "
+            f"{stats['sanads_merged']} duplicate asanid folded, {stats['aliases_recorded']} aliases recorded"
+        ))
+
+    def collect_groups(self, options):
+        if options['auto']:
+            return find_duplicate_narrators()
+        if options['file']:
+            groups = {}
+            try:
+                with open(options['file'], newline='', encoding='utf-8-sig') as fp:
+                    for row in csv.reader(fp):
+                        if not row or not row[0].strip().isdigit():
+                            continue  # header or blank line
+                        groups.setdefault(int(row[0]), []).append(int(row[1]))
+            except (OSError, IndexError, ValueError) as exc:
+                raise CommandError(f'Invalid merge file: {exc}')
+            return groups
+        if options['into'] and options['narrators']:
+            return {options['into']: options['narrators']}
+        raise CommandError('Give --into with narrator ids, --file or --auto')
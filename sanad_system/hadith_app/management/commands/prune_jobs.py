@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from hadith_app.jobs import JOB_RETENTION, prune_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes finished background jobs older than the retention period. Running workers do this '
+        'every hour; run it from cron when no worker runs for long periods.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=float, default=JOB_RETENTION / (24 * 60 * 60),
+                            help='Keep jobs that finished within this many days')
+
+    def handle(self, *args, **options):
+        if options['days'] < 0:
+            raise CommandError('--days must not be negative')
+        deleted = prune_jobs(options['days'] * 24 * 60 * 60)
+        self.stdout.write(self.style.SUCCESS(f'{deleted} finished jobs deleted'))
@@ -0,0 +1,43 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hadith_app.models import Sanad, SanadNarrator, SanadSegment
+from hadith_app.utils.sanad_utils import build_sanad_segments
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the contiguous sub-chain index used for shared-segment sanad searches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Number of sanads processed per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        sanad_ids = list(Sanad.objects.order_by('pk').values_list('pk', flat=True))
+        total = 0
+
+        for start in range(0, len(sanad_ids), batch_size):
+            chunk = sanad_ids[start:start + batch_size]
+            hadith_ids = dict(Sanad.objects.filter(pk__in=chunk).values_list('pk', 'hadith_id'))
+            chains = defaultdict(list)
+            for sanad_id, narrator_id in (SanadNarrator.objects.filter(sanad_id__in=chunk)
+                                          .order_by('sanad_id', 'order')
+                                          .values_list('sanad_id', 'narrator_id')):
+                chains[sanad_id].append(narrator_id)
+
+            segments = [
+                segment
+                for sanad_id in chunk
+                for segment in build_sanad_segments(sanad_id, hadith_ids[sanad_id], chains[sanad_id])
+            ]
+            with transaction.atomic():
+                SanadSegment.objects.filter(sanad_id__in=chunk).delete()
+                SanadSegment.objects.bulk_create(segments, batch_size=5000)
+            total += len(segments)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {total} sub-chain segments for {len(sanad_ids)} sanads'
+        ))
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from hadith_app.utils.stats_utils import reconcile_stats
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes the site statistics counters from the tables. The counters are kept up to date '
+        'by signal handlers; run this periodically (e.g. from cron) to correct writes that bypass them.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counters = reconcile_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {len(counters)} counters ({counters['hadiths']} hadiths, "
+            f"{counters['narrators']} narrators) in {time.monotonic() - started:.2f}s"
+        ))
@@ -0,0 +1,60 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from hadith_app.jobs import STALE_AFTER, discover_handlers, run_worker_process, work, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background jobs (document conversion, avatar processing, ...) in worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1, help='Number of worker processes')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds a worker sleeps when no job is due')
+        parser.add_argument('--stale-after', type=float, default=STALE_AFTER,
+                            help='Seconds after which a running job without progress reports is requeued')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due instead of polling for new ones')
+
+    def handle(self, *args, **options):
+        workers = options['workers']
+        if workers < 1:
+            raise CommandError('--workers must be at least 1')
+        work_options = {
+            'burst': options['burst'],
+            'poll_interval': options['poll_interval'],
+            'stale_after': options['stale_after'],
+        }
+        # Import every app's jobs module before forking
+        discover_handlers()
+
+        stop_event = multiprocessing.Event()
+
+        def stop(signum, frame):
+            # Workers finish their current job before exiting
+            stop_event.set()
+        previous = {signum: signal.signal(signum, stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+        try:
+            if workers == 1:
+                processed = work(worker_name(), should_stop=stop_event.is_set, log=self.stdout.write, **work_options)
+                self.stdout.write(self.style.SUCCESS(f'{processed} jobs run'))
+                return
+
+            # Forked workers must not inherit this process's database connections
+            connections.close_all()
+            processes = [
+                multiprocessing.Process(target=run_worker_process, args=(index, stop_event, work_options))
+                for index in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            self.stdout.write(f'Started {workers} workers; stop with Ctrl+C or SIGTERM')
+            for process in processes:
+                process.join()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        self.stdout.write(self.style.SUCCESS('All workers stopped'))
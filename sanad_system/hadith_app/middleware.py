@@ -1,5 +1,13 @@
 from django.utils import translation
 from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.regex_helper import _lazy_re_compile
+
+try:
+    import brotli
+except ImportError:  # optional: responses are gzipped instead
+    brotli = None
 
 class ForceDefaultLanguageMiddleware:
     """
@@ -20,3 +28,87 @@ class ForceDefaultLanguageMiddleware:
         # Set the Content-Language header
         response['Content-Language'] = language
         return response
+
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+# Brotli quality for responses compressed on the fly; higher levels cost
+# much more CPU for a few percent (static files are precompressed at 11)
+BROTLI_QUALITY = getattr(settings, 'COMPRESSION_BROTLI_QUALITY', 5)
+
+# Media types worth compressing; PDFs, images, archives and Office files
+# (the library's documents) are already compressed and are sent as they are
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/x-ndjson', 'application/xml', 'image/svg+xml',
+}
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return (media_type.startswith('text/') or media_type in COMPRESSIBLE_TYPES
+            or media_type.endswith(('+xml', '+json')))
+
+
+def may_carry_secrets(request, response) -> bool:
+    """
+    Whether a response may hold a secret next to attacker-influenced text.
+
+    HTML pages show the user's data and forms; any response that used the
+    CSRF token may embed it. Such responses are only gzipped, with the
+    random-length padding ``GZipMiddleware`` adds against BREACH, which the
+    Brotli format has no header field for.
+    """
+    media_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+    return media_type in ('text/html', 'application/xhtml+xml') or bool(request.META.get('CSRF_COOKIE_NEEDS_UPDATE'))
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress text responses with Brotli when the client accepts it (and the
+    brotli package is installed), with gzip otherwise.
+
+    Pages are large RTL HTML whose Arabic text takes two bytes per letter
+    in UTF-8, so they shrink to a fraction of their size. Responses of any
+    other media type are left alone, and static files are served already
+    compressed by WhiteNoise before reaching this middleware. Pages and
+    other responses that may carry secrets always get gzip with Django's
+    BREACH mitigation (see ``may_carry_secrets``); Brotli is used for data
+    such as JSON and the exports.
+    """
+
+    def process_response(self, request, response):
+        if not is_compressible(response.get('Content-Type', '')):
+            return response
+        if (brotli is None or not re_accepts_brotli.search(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+                or response.has_header('Content-Encoding') or (response.streaming and response.is_async)
+                or may_carry_secrets(request, response)):
+            return super().process_response(request, response)
+        if not response.streaming and len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = self._compress_sequence(response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=BROTLI_QUALITY)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # A compressed representation only matches the uncompressed one weakly
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+    @staticmethod
+    def _compress_sequence(sequence):
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        for chunk in sequence:
+            data = compressor.process(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
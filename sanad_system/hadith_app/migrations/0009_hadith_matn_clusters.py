@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0008_alter_hadith_created_by'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hadith',
+            name='matn_cluster',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True, verbose_name='مجموعة روايات المتن'),
+        ),
+        migrations.AddField(
+            model_name='hadith',
+            name='matn_signature',
+            field=models.BinaryField(blank=True, null=True, verbose_name='بصمة المتن'),
+        ),
+        migrations.CreateModel(
+            name='HadithMatnBand',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='رقم الشريحة')),
+                ('bucket', models.BigIntegerField(verbose_name='مفتاح الدلو')),
+                ('hadith', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matn_bands', to='hadith_app.hadith', verbose_name='الحديث')),
+            ],
+            options={
+                'verbose_name': 'شريحة بصمة المتن',
+                'verbose_name_plural': 'شرائح بصمات المتون',
+                'indexes': [models.Index(fields=['bucket', 'band'], name='hadith_app__bucket_f578ce_idx')],
+                'unique_together': {('hadith', 'band')},
+            },
+        ),
+    ]
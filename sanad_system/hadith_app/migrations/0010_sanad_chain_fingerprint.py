@@ -0,0 +1,22 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0009_hadith_matn_clusters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sanad',
+            name='chain_fingerprint',
+            field=models.CharField(blank=True, default='', editable=False, help_text='تجزئة معرفات الرواة بالترتيب', max_length=40, verbose_name='بصمة السلسلة'),
+        ),
+        migrations.AddConstraint(
+            model_name='sanad',
+            constraint=models.UniqueConstraint(condition=models.Q(('chain_fingerprint', ''), _negated=True), fields=('hadith', 'chain_fingerprint'), name='unique_sanad_chain_per_hadith'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0010_sanad_chain_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SanadSegment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start', models.PositiveSmallIntegerField(verbose_name='موضع البداية')),
+                ('length', models.PositiveSmallIntegerField(verbose_name='طول المقطع')),
+                ('key', models.BigIntegerField(verbose_name='مفتاح المقطع')),
+                ('hadith', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='hadith_app.hadith', verbose_name='الحديث')),
+                ('sanad', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='segments', to='hadith_app.sanad', verbose_name='السند')),
+            ],
+            options={
+                'verbose_name': 'مقطع سند',
+                'verbose_name_plural': 'مقاطع الأسانيد',
+                'indexes': [models.Index(fields=['key', 'sanad'], name='hadith_app__key_71bf76_idx'), models.Index(fields=['key', 'hadith'], name='hadith_app__key_b95293_idx')],
+            },
+        ),
+    ]
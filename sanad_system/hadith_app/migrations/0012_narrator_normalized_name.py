@@ -0,0 +1,53 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:43
+
+import re
+
+from django.db import migrations, models
+
+
+# A frozen copy of utils.text_utils.normalize_arabic as of this migration, so
+# replaying it gives the same keys whatever the app code later becomes
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+NON_WORD_RE = re.compile(r'[\W_]+')
+ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+BATCH_SIZE = 2000
+
+
+def normalize_arabic(text):
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', text)
+    text = text.translate(ARABIC_LETTER_MAP)
+    text = NON_WORD_RE.sub(' ', text)
+    return ' '.join(text.lower().split())
+
+
+def fill_normalized_names(apps, schema_editor):
+    Narrator = apps.get_model('hadith_app', 'Narrator')
+    batch = []
+    for narrator in Narrator.objects.order_by('pk').only('id', 'name').iterator(chunk_size=BATCH_SIZE):
+        narrator.normalized_name = normalize_arabic(narrator.name)[:100]
+        batch.append(narrator)
+        if len(batch) == BATCH_SIZE:
+            Narrator.objects.bulk_update(batch, ['normalized_name'])
+            batch = []
+    Narrator.objects.bulk_update(batch, ['normalized_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0011_sanad_segment_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='narrator',
+            name='normalized_name',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100, verbose_name='الاسم الموحد'),
+        ),
+        migrations.RunPython(fill_normalized_names, migrations.RunPython.noop),
+    ]
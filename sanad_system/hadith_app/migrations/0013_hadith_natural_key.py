@@ -0,0 +1,65 @@
+# Generated by Django 4.2.30 on 2026-10-19 02:57
+
+import re
+
+from django.db import migrations, models
+
+
+# A frozen copy of utils.text_utils.normalize_arabic (see 0012), so replaying
+# this migration gives the same keys whatever the app code later becomes
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+NON_WORD_RE = re.compile(r'[\W_]+')
+ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+BATCH_SIZE = 2000
+
+
+def normalize_arabic(text):
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', text)
+    text = text.translate(ARABIC_LETTER_MAP)
+    text = NON_WORD_RE.sub(' ', text)
+    return ' '.join(text.lower().split())
+
+
+def fill_source_keys(apps, schema_editor):
+    Hadith = apps.get_model('hadith_app', 'Hadith')
+    seen = set()
+    batch = []
+    hadiths = Hadith.objects.order_by('pk').only('id', 'source', 'source_hadith_number')
+    for hadith in hadiths.iterator(chunk_size=BATCH_SIZE):
+        key = normalize_arabic(hadith.source or '')[:200]
+        if hadith.source_hadith_number:
+            # Pre-existing duplicates stay unkeyed; the oldest row owns the key
+            if (key, hadith.source_hadith_number) in seen:
+                key = ''
+            seen.add((key, hadith.source_hadith_number))
+        hadith.source_key = key
+        batch.append(hadith)
+        if len(batch) == BATCH_SIZE:
+            Hadith.objects.bulk_update(batch, ['source_key'])
+            batch = []
+    Hadith.objects.bulk_update(batch, ['source_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0012_narrator_normalized_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hadith',
+            name='source_key',
+            field=models.CharField(blank=True, default='', editable=False, help_text='اسم المصدر بعد التوحيد، يكوّن مع رقم الحديث مفتاحه الطبيعي', max_length=200, verbose_name='المصدر الموحد'),
+        ),
+        migrations.RunPython(fill_source_keys, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hadith',
+            constraint=models.UniqueConstraint(condition=models.Q(('source_hadith_number__isnull', False), models.Q(('source_hadith_number', ''), _negated=True), models.Q(('source_key', ''), _negated=True)), fields=('source_key', 'source_hadith_number'), name='unique_hadith_number_per_source'),
+        ),
+    ]
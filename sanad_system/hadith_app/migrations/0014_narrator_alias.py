@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0013_hadith_natural_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NarratorAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='الاسم البديل')),
+                ('normalized_name', models.CharField(editable=False, max_length=100, unique=True, verbose_name='الاسم الموحد')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('narrator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='hadith_app.narrator', verbose_name='الراوي')),
+            ],
+            options={
+                'verbose_name': 'اسم بديل للراوي',
+                'verbose_name_plural': 'الأسماء البديلة للرواة',
+                'ordering': ['name'],
+            },
+        ),
+    ]
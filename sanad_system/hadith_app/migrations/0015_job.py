@@ -0,0 +1,46 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('hadith_app', '0014_narrator_alias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='المهمة')),
+                ('payload', models.JSONField(blank=True, default=dict, verbose_name='المدخلات')),
+                ('status', models.CharField(choices=[('queued', 'في الانتظار'), ('running', 'قيد التنفيذ'), ('succeeded', 'مكتملة'), ('failed', 'فاشلة')], default='queued', max_length=20, verbose_name='الحالة')),
+                ('priority', models.SmallIntegerField(default=0, verbose_name='الأولوية')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='عدد المحاولات')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='أقصى عدد للمحاولات')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='موعد التنفيذ')),
+                ('progress', models.PositiveSmallIntegerField(default=0, verbose_name='نسبة الإنجاز')),
+                ('progress_message', models.CharField(blank=True, default='', max_length=200, verbose_name='رسالة التقدم')),
+                ('result', models.JSONField(blank=True, null=True, verbose_name='النتيجة')),
+                ('error', models.TextField(blank=True, default='', verbose_name='الخطأ')),
+                ('worker', models.CharField(blank=True, default='', max_length=100, verbose_name='العامل')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='آخر نبض للعامل')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='تاريخ الإنشاء')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='بداية التنفيذ')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='نهاية التنفيذ')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='أنشأها')),
+            ],
+            options={
+                'verbose_name': 'مهمة خلفية',
+                'verbose_name_plural': 'المهام الخلفية',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='hadith_app__status_c2f2e8_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0015_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='الاسم')),
+                ('value', models.BigIntegerField(default=0, verbose_name='القيمة')),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True, verbose_name='آخر مطابقة')),
+            ],
+            options={
+                'verbose_name': 'عداد إحصائي',
+                'verbose_name_plural': 'العدادات الإحصائية',
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hadith_app', '0016_stats_counter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hadithcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,8 +1,10 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils.translation import gettext_lazy as _
+from django.utils import timezone
 from django.utils.text import slugify
 import os
 
@@ -15,6 +17,14 @@ def user_avatar_path(instance, filename):
 
 class Narrator(models.Model):
     name = models.CharField(max_length=100, verbose_name="اسم الراوي")
+    normalized_name = models.CharField(
+        max_length=100,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="الاسم الموحد"
+    )
     birth_year = models.IntegerField(null=True, blank=True, verbose_name="سنة الميلاد")
     death_year = models.IntegerField(null=True, blank=True, verbose_name="سنة الوفاة")
     biography = models.TextField(null=True, blank=True, verbose_name="السيرة الذاتية")
@@ -39,6 +49,35 @@ class Narrator(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        from .utils.text_utils import normalize_arabic
+        self.normalized_name = normalize_arabic(self.name)[:100]
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'normalized_name'}
+        super().save(*args, **kwargs)
+
+
+class NarratorAlias(models.Model):
+    """Alternative spelling of a narrator's name, recorded when narrators are merged"""
+    narrator = models.ForeignKey(Narrator, on_delete=models.CASCADE, related_name='aliases', verbose_name="الراوي")
+    name = models.CharField(max_length=100, verbose_name="الاسم البديل")
+    normalized_name = models.CharField(max_length=100, unique=True, editable=False, verbose_name="الاسم الموحد")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "اسم بديل للراوي"
+        verbose_name_plural = "الأسماء البديلة للرواة"
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        from .utils.text_utils import normalize_arabic
+        self.normalized_name = normalize_arabic(self.name)[:100]
+        super().save(*args, **kwargs)
+
 
 class Hadith(models.Model):
     text = models.TextField(verbose_name="نص الحديث")
@@ -71,21 +110,103 @@ class Hadith(models.Model):
         related_name='created_hadiths',
         editable=False
     )
+    source_key = models.CharField(
+        max_length=200,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="المصدر الموحد",
+        help_text="اسم المصدر بعد التوحيد، يكوّن مع رقم الحديث مفتاحه الطبيعي"
+    )
+    matn_signature = models.BinaryField(null=True, blank=True, editable=False, verbose_name="بصمة المتن")
+    matn_cluster = models.BigIntegerField(
+        null=True,
+        blank=True,
+        db_index=True,
+        editable=False,
+        verbose_name="مجموعة روايات المتن"
+    )
 
     class Meta:
         verbose_name = "حديث"
         verbose_name_plural = "الأحاديث"
         ordering = ['-created_at']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source_key', 'source_hadith_number'],
+                condition=(
+                    models.Q(source_hadith_number__isnull=False)
+                    & ~models.Q(source_hadith_number='')
+                    & ~models.Q(source_key='')
+                ),
+                name='unique_hadith_number_per_source',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:50] + "..." if len(self.text) > 50 else self.text
 
+    @staticmethod
+    def make_source_key(source):
+        from .utils.text_utils import normalize_arabic
+        return normalize_arabic(source or '')[:200]
+
+    def clean(self):
+        super().clean()
+        if not self.source_hadith_number:
+            return
+        duplicate = Hadith.objects.filter(
+            source_key=self.make_source_key(self.source),
+            source_hadith_number=self.source_hadith_number,
+        ).exclude(pk=self.pk)
+        if self.source and duplicate.exists():
+            raise ValidationError({
+                'source_hadith_number': _('يوجد حديث آخر بهذا الرقم في المصدر نفسه.'),
+            })
+
+    def save(self, *args, **kwargs):
+        self.source_key = self.make_source_key(self.source)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'source' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'source_key'}
+        super().save(*args, **kwargs)
+
+    def get_matn_variants(self):
+        """Other hadiths in the same matn cluster (variant wordings)."""
+        if self.matn_cluster is None:
+            return Hadith.objects.none()
+        return Hadith.objects.filter(matn_cluster=self.matn_cluster).exclude(pk=self.pk)
+
+
+class HadithMatnBand(models.Model):
+    """LSH band bucket of a hadith's MinHash signature"""
+    hadith = models.ForeignKey(Hadith, on_delete=models.CASCADE, related_name='matn_bands', verbose_name="الحديث")
+    band = models.PositiveSmallIntegerField(verbose_name="رقم الشريحة")
+    bucket = models.BigIntegerField(verbose_name="مفتاح الدلو")
+
+    class Meta:
+        verbose_name = "شريحة بصمة المتن"
+        verbose_name_plural = "شرائح بصمات المتون"
+        unique_together = ('hadith', 'band')
+        indexes = [models.Index(fields=['bucket', 'band'])]
+
+    def __str__(self):
+        return f"{self.hadith_id}:{self.band}"
+
 
 class Sanad(models.Model):
     hadith = models.ForeignKey(Hadith, on_delete=models.CASCADE, related_name='asanid', verbose_name="الحديث")
     narrators = models.ManyToManyField(Narrator, through='SanadNarrator', verbose_name="الرواة")
     is_mutawatir = models.BooleanField(default=False, verbose_name="متواتر")
     notes = models.TextField(null=True, blank=True, verbose_name="ملاحظات")
+    chain_fingerprint = models.CharField(
+        max_length=40,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="بصمة السلسلة",
+        help_text="تجزئة معرفات الرواة بالترتيب"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -93,6 +214,13 @@ class Sanad(models.Model):
         verbose_name = "سند"
         verbose_name_plural = "الأسانيد"
         ordering = ['hadith']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hadith', 'chain_fingerprint'],
+                condition=~models.Q(chain_fingerprint=''),
+                name='unique_sanad_chain_per_hadith',
+            ),
+        ]
 
     def __str__(self):
         return f"سند الحديث: {self.hadith.id}"
@@ -120,10 +248,31 @@ class SanadNarrator(models.Model):
         return f"{self.narrator.name} (ترتيب: {self.order})"
 
 
+class SanadSegment(models.Model):
+    """Contiguous sub-chain (n-gram of narrator ids) of a sanad"""
+    sanad = models.ForeignKey(Sanad, on_delete=models.CASCADE, related_name='segments', verbose_name="السند")
+    hadith = models.ForeignKey(Hadith, on_delete=models.CASCADE, related_name='+', verbose_name="الحديث")
+    start = models.PositiveSmallIntegerField(verbose_name="موضع البداية")
+    length = models.PositiveSmallIntegerField(verbose_name="طول المقطع")
+    key = models.BigIntegerField(verbose_name="مفتاح المقطع")
+
+    class Meta:
+        verbose_name = "مقطع سند"
+        verbose_name_plural = "مقاطع الأسانيد"
+        indexes = [
+            models.Index(fields=['key', 'sanad']),
+            models.Index(fields=['key', 'hadith']),
+        ]
+
+    def __str__(self):
+        return f"{self.sanad_id}[{self.start}:{self.start + self.length}]"
+
+
 class HadithCategory(models.Model):
     name = models.CharField(max_length=100, verbose_name="اسم التصنيف")
     description = models.TextField(null=True, blank=True, verbose_name="الوصف")
     parent = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, verbose_name="التصنيف الأب")
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "تصنيف الحديث"
@@ -147,6 +296,79 @@ class HadithBook(models.Model):
         return self.title
 
 
+class Job(models.Model):
+    """Background job run by the ``run_workers`` command (see ``hadith_app.jobs``)"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'في الانتظار'),
+        (RUNNING, 'قيد التنفيذ'),
+        (SUCCEEDED, 'مكتملة'),
+        (FAILED, 'فاشلة'),
+    ]
+
+    name = models.CharField(max_length=100, verbose_name="المهمة")
+    payload = models.JSONField(default=dict, blank=True, verbose_name="المدخلات")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED, verbose_name="الحالة")
+    priority = models.SmallIntegerField(default=0, verbose_name="الأولوية")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="عدد المحاولات")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="أقصى عدد للمحاولات")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="موعد التنفيذ")
+    progress = models.PositiveSmallIntegerField(default=0, verbose_name="نسبة الإنجاز")
+    progress_message = models.CharField(max_length=200, blank=True, default='', verbose_name="رسالة التقدم")
+    result = models.JSONField(null=True, blank=True, verbose_name="النتيجة")
+    error = models.TextField(blank=True, default='', verbose_name="الخطأ")
+    worker = models.CharField(max_length=100, blank=True, default='', verbose_name="العامل")
+    locked_at = models.DateTimeField(null=True, blank=True, verbose_name="آخر نبض للعامل")
+    created_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='jobs', verbose_name="أنشأها"
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="تاريخ الإنشاء")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="بداية التنفيذ")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="نهاية التنفيذ")
+
+    class Meta:
+        verbose_name = "مهمة خلفية"
+        verbose_name_plural = "المهام الخلفية"
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self):
+        return self.status in (self.SUCCEEDED, self.FAILED)
+
+    def set_progress(self, done, total=100, message=''):
+        """Record the progress of a running job; also refreshes its worker lock."""
+        self.progress = min(100, int(done * 100 / total)) if total else 0
+        self.progress_message = str(message)[:200]
+        self.locked_at = timezone.now()
+        Job.objects.filter(pk=self.pk, status=self.RUNNING).update(
+            progress=self.progress,
+            progress_message=self.progress_message,
+            locked_at=self.locked_at,
+        )
+
+
+
+class StatsCounter(models.Model):
+    """Site-wide statistic kept up to date by signal handlers (see ``utils.stats_utils``)"""
+    name = models.CharField(max_length=100, unique=True, verbose_name="الاسم")
+    value = models.BigIntegerField(default=0, verbose_name="القيمة")
+    reconciled_at = models.DateTimeField(null=True, blank=True, verbose_name="آخر مطابقة")
+
+    class Meta:
+        verbose_name = "عداد إحصائي"
+        verbose_name_plural = "العدادات الإحصائية"
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
 class UserProfile(models.Model):
     """Extended user profile model"""
     user = models.OneToOneField(
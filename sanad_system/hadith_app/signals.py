@@ -1,7 +1,13 @@
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.db.models.functions import Length
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import Signal, receiver
 from django.contrib.auth.models import User
-from .models import UserProfile
+from .models import UserProfile, Hadith, HadithCategory, Narrator, NarratorAlias, Sanad, SanadNarrator
+
+# Sent by the bulk writers that bypass model signals, with the ids they changed
+sanad_chain_changed = Signal()  # sanad_ids
+narrators_changed = Signal()  # narrator_ids
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -11,3 +17,243 @@ def create_user_profile(sender, instance, created, **kwargs):
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
     instance.profile.save()
+
+@receiver(post_save, sender=Hadith)
+def update_matn_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Keep the hadith's MinHash signature and matn cluster in sync with its text."""
+    if raw or (update_fields is not None and 'text' not in update_fields):
+        return
+    from .utils.matn_utils import update_hadith_matn_index
+    update_hadith_matn_index(instance)
+
+
+# Lookup cache (see utils.lookup_utils): writes drop the cached objects and
+# name lookups they change
+
+@receiver(post_save, sender=Narrator)
+@receiver(post_delete, sender=Narrator)
+def forget_narrator_lookups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .utils.lookup_utils import forget_narrator_names, forget_narrators
+    forget_narrators([instance.pk])
+    forget_narrator_names([instance.normalized_name, instance.__dict__.pop('_normalized_name_before', '')])
+
+
+@receiver(pre_save, sender=NarratorAlias)
+def remember_alias_name(sender, instance, raw=False, **kwargs):
+    if not raw and not instance._state.adding:
+        instance._normalized_name_before = (
+            NarratorAlias.objects.filter(pk=instance.pk).values_list('normalized_name', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=NarratorAlias)
+@receiver(post_delete, sender=NarratorAlias)
+def forget_alias_lookups(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .utils.lookup_utils import forget_narrator_names
+    forget_narrator_names([instance.normalized_name, instance.__dict__.pop('_normalized_name_before', None) or ''])
+
+
+@receiver(narrators_changed)
+def forget_changed_narrator_lookups(sender, narrator_ids, **kwargs):
+    from .utils.lookup_utils import forget_narrators
+    forget_narrators(narrator_ids)
+
+
+@receiver(post_save, sender=Hadith)
+@receiver(post_delete, sender=Hadith)
+def forget_hadith_lookup(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    from .utils.lookup_utils import forget_hadiths
+    forget_hadiths([instance.pk])
+
+
+@receiver(post_save, sender=Sanad)
+@receiver(post_delete, sender=Sanad)
+def invalidate_sanad_fragments(sender, instance, raw=False, **kwargs):
+    """Drop the cached timeline of a saved or deleted sanad (ids can be reused)."""
+    if raw:
+        return
+    from .utils.cache_utils import bump_versions
+    bump_versions('sanad', [instance.pk])
+
+
+# No delete receiver for chain links: it would disable fast-delete on every
+# cascade from Sanad, Hadith and Narrator. Those deletions bump the sanad
+# versions themselves (Sanad post_delete, resync_deleted_narrator_chains) and
+# the bulk link writers send sanad_chain_changed.
+@receiver(post_save, sender=SanadNarrator)
+def invalidate_link_fragments(sender, instance, raw=False, **kwargs):
+    """Drop the cached timeline of the sanad a chain link was saved to."""
+    if raw:
+        return
+    from .utils.cache_utils import bump_versions
+    bump_versions('sanad', [instance.sanad_id])
+
+
+@receiver(sanad_chain_changed)
+def invalidate_chain_fragments(sender, sanad_ids, **kwargs):
+    from .utils.cache_utils import bump_versions
+    bump_versions('sanad', sanad_ids)
+
+
+@receiver(post_save, sender=Narrator)
+@receiver(post_delete, sender=Narrator)
+def invalidate_narrator_fragments(sender, instance, raw=False, **kwargs):
+    """Drop the cached cards of a saved or deleted narrator."""
+    if raw:
+        return
+    from .utils.cache_utils import bump_versions
+    bump_versions('narrator', [instance.pk])
+
+
+@receiver(pre_delete, sender=Narrator)
+def resync_deleted_narrator_chains(sender, instance, **kwargs):
+    """
+    The narrator's chain links are about to be deleted with it: refresh the
+    fingerprints and segments of its asanid once the delete is committed.
+    """
+    sanad_ids = list(SanadNarrator.objects.filter(narrator_id=instance.pk).values_list('sanad_id', flat=True).distinct())
+    if sanad_ids:
+        from .utils.sanad_utils import resync_sanad_chains
+        transaction.on_commit(lambda: resync_sanad_chains(sanad_ids))
+
+
+@receiver(narrators_changed)
+def invalidate_changed_narrator_fragments(sender, narrator_ids, **kwargs):
+    from .utils.cache_utils import bump_versions
+    bump_versions('narrator', narrator_ids)
+
+
+@receiver(post_save, sender=Narrator)
+@receiver(post_delete, sender=Narrator)
+@receiver(narrators_changed)
+def invalidate_similar_narrators(sender, raw=False, **kwargs):
+    """Drop the similar-name lists, which are computed from every narrator name."""
+    if raw:
+        return
+    from .utils.cache_utils import bump_versions
+    bump_versions('narrator-names', ['all'])
+
+
+# Site statistics (see utils.stats_utils): each save applies the difference
+# between the row's old and new contribution to the counters
+
+HADITH_STATS_FIELDS = {'grade', 'text'}
+NARRATOR_STATS_FIELDS = {'reliability', 'birth_year', 'death_year'}
+
+
+def _tracks_stats(raw, update_fields, fields):
+    return not raw and (update_fields is None or not fields.isdisjoint(update_fields))
+
+
+@receiver(pre_save, sender=Hadith)
+def remember_hadith_counters(sender, instance, raw=False, update_fields=None, **kwargs):
+    if instance._state.adding or not _tracks_stats(raw, update_fields, HADITH_STATS_FIELDS):
+        return
+    from .utils.stats_utils import hadith_counters
+    row = (Hadith.objects.filter(pk=instance.pk).annotate(text_length=Length('text'))
+           .values_list('grade', 'text_length').first())
+    instance._counters_before = hadith_counters(*row) if row else None
+
+
+@receiver(post_save, sender=Hadith)
+def update_hadith_counters(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not _tracks_stats(raw, update_fields, HADITH_STATS_FIELDS):
+        return
+    from .utils.stats_utils import apply_counter_deltas, counter_deltas, hadith_counters
+    before = instance.__dict__.pop('_counters_before', None)
+    apply_counter_deltas(counter_deltas(
+        [hadith_counters(instance.grade, len(instance.text or ''))], [before] if before else [],
+    ))
+
+
+@receiver(post_delete, sender=Hadith)
+def remove_hadith_counters(sender, instance, **kwargs):
+    from .utils.stats_utils import apply_counter_deltas, counter_deltas, hadith_counters
+    apply_counter_deltas(counter_deltas(before=[hadith_counters(instance.grade, len(instance.text or ''))]))
+
+
+@receiver(pre_save, sender=Narrator)
+def remember_narrator_state(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Record the narrator's counters and normalized name before the save, with one query."""
+    tracks_stats = _tracks_stats(raw, update_fields, NARRATOR_STATS_FIELDS)
+    renames = not raw and (update_fields is None or 'normalized_name' in update_fields)
+    if instance._state.adding or not (tracks_stats or renames):
+        return
+    from .utils.stats_utils import narrator_counters
+    row = (Narrator.objects.filter(pk=instance.pk)
+           .values_list('normalized_name', 'reliability', 'birth_year', 'death_year').first())
+    if tracks_stats:
+        instance._counters_before = narrator_counters(*row[1:]) if row else None
+    if row:
+        instance._normalized_name_before = row[0]
+
+
+@receiver(post_save, sender=Narrator)
+def update_narrator_counters(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if not _tracks_stats(raw, update_fields, NARRATOR_STATS_FIELDS):
+        return
+    from .utils.stats_utils import apply_counter_deltas, counter_deltas, narrator_counters
+    before = instance.__dict__.pop('_counters_before', None)
+    apply_counter_deltas(counter_deltas(
+        [narrator_counters(instance.reliability, instance.birth_year, instance.death_year)],
+        [before] if before else [],
+    ))
+
+
+@receiver(post_delete, sender=Narrator)
+def remove_narrator_counters(sender, instance, **kwargs):
+    from .utils.stats_utils import apply_counter_deltas, counter_deltas, narrator_counters
+    apply_counter_deltas(counter_deltas(
+        before=[narrator_counters(instance.reliability, instance.birth_year, instance.death_year)],
+    ))
+
+
+@receiver(post_save, sender=User)
+def count_created_user(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        from .utils.stats_utils import apply_counter_deltas
+        apply_counter_deltas({'users': 1})
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user(sender, instance, **kwargs):
+    from .utils.stats_utils import apply_counter_deltas
+    apply_counter_deltas({'users': -1})
+
+
+# Home page snapshot (see utils.home_utils): writes to what it shows queue a refresh
+
+def _queue_home_refresh():
+    from .utils.home_utils import HOME_REFRESH_DELAY, schedule_home_refresh
+    transaction.on_commit(lambda: schedule_home_refresh(HOME_REFRESH_DELAY))
+
+
+@receiver(post_save, sender=Hadith)
+@receiver(post_delete, sender=Hadith)
+@receiver(post_save, sender=Narrator)
+@receiver(post_delete, sender=Narrator)
+@receiver(post_save, sender=HadithCategory)
+@receiver(post_delete, sender=HadithCategory)
+@receiver(post_delete, sender=Sanad)
+@receiver(post_save, sender=SanadNarrator)
+def refresh_home_on_save(sender, raw=False, **kwargs):
+    if not raw:
+        _queue_home_refresh()
+
+
+@receiver(m2m_changed, sender=Hadith.categories.through)
+def refresh_home_on_categories(sender, action, **kwargs):
+    if action.startswith('post_'):
+        _queue_home_refresh()
+
+
+@receiver(sanad_chain_changed)
+@receiver(narrators_changed)
+def refresh_home_on_bulk_write(sender, **kwargs):
+    _queue_home_refresh()
@@ -1,3 +1,516 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import IntegrityError, OperationalError, transaction
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import SanadNarratorAdmin
+from .admin_site import admin_site
+from .cache_backends import MAX_LOG_READ
+from .forms import SanadNarratorAdminForm
+from .importers.collection import CollectionImporter
+from .importers.readers import iter_records
+from .jobs import claim_job, enqueue, prune_jobs, register, requeue_stale_jobs, retry_locked, run_job
+from .models import Hadith, HadithCategory, Job, Narrator, Sanad, SanadNarrator, SanadSegment, StatsCounter
+from .utils.hadith_utils import load_hadith
+from .utils.narrator_utils import merge_narrators
+from .utils.sanad_utils import chain_fingerprint, create_sanad, find_duplicate_sanad, fold_duplicate_sanads
+
+# The page fragments and lookups are cached; keep the tests off the shared cache
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'hadith_app.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+    },
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'hadith-app-tests',
+    },
+}
+
+
+@override_settings(CACHES=TEST_CACHES)
+class HadithDetailQueryTests(TestCase):
+    """Loading a hadith for display costs the same number of queries whatever its number of asanid."""
+
+    @classmethod
+    def setUpTestData(cls):
+        narrators = [Narrator.objects.create(name=f'الراوي {i}') for i in range(10)]
+        categories = [HadithCategory.objects.create(name=f'التصنيف {i}') for i in range(3)]
+        cls.short = Hadith.objects.create(text='إنما الأعمال بالنيات', source='صحيح البخاري', grade='sahih')
+        cls.short.categories.set(categories[:1])
+        create_sanad(cls.short, [narrator.pk for narrator in narrators[:3]], ['حدثنا', 'عن', 'عن'])
+        cls.long = Hadith.objects.create(text='المسلم من سلم المسلمون من لسانه ويده', source='صحيح مسلم',
+                                         grade='sahih')
+        cls.long.categories.set(categories)
+        for start in range(5):
+            chain = narrators[start:start + 5]
+            create_sanad(cls.long, [narrator.pk for narrator in chain], ['أخبرنا'] * len(chain))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_load_hadith_prefetches_chains(self):
+        for hadith in (self.short, self.long):
+            with self.assertNumQueries(4):
+                loaded = load_hadith(hadith.pk)
+                chains = [[link.narrator.name for link in sanad.chain] for sanad in loaded.asanid.all()]
+                list(loaded.categories.all())
+            self.assertEqual(len(chains), hadith.asanid.count())
+        self.assertEqual(chains[1], [f'الراوي {i}' for i in range(1, 6)])
+        self.assertIsNone(load_hadith(0))
+
+    def test_detail_view_queries_do_not_grow_with_asanid(self):
+        for hadith in (self.short, self.long):
+            url = reverse('hadith_app:hadith_detail', args=[hadith.pk])
+            cache.clear()
+            # State, hadith, categories, asanid, variants, cold chains and narrators
+            with self.assertNumQueries(7):
+                response = self.client.get(url, secure=True)
+            self.assertEqual(response.status_code, 200)
+            # Warm: the timelines come from the fragment cache
+            with self.assertNumQueries(5):
+                self.client.get(url, secure=True)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class MatnClusterTests(TestCase):
+    """Variant wordings share a cluster that follows edits to its root."""
+
+    TEXT = 'إنما الأعمال بالنيات وإنما لكل امرئ ما نوى فمن كانت هجرته إلى الله ورسوله فهجرته إلى الله ورسوله'
+
+    def create(self, text):
+        return Hadith.objects.create(text=text, source='صحيح البخاري', grade='sahih')
+
+    def test_variants_join_the_root_cluster(self):
+        root = self.create(self.TEXT)
+        variant = self.create(self.TEXT + ' ومن كانت هجرته لدنيا يصيبها')
+        self.assertEqual(root.matn_cluster, root.pk)
+        self.assertEqual(variant.matn_cluster, root.pk)
+
+    def test_edited_root_hands_its_cluster_to_the_lowest_member(self):
+        root = self.create(self.TEXT)
+        first = self.create(self.TEXT + ' ومن كانت هجرته لدنيا يصيبها')
+        second = self.create(self.TEXT + ' أو امرأة ينكحها')
+
+        root.text = 'الطهور شطر الإيمان والحمد لله تملأ الميزان وسبحان الله والحمد لله تملآن ما بين السماوات والأرض'
+        root.save()
+        self.assertEqual(root.matn_cluster, root.pk)
+        self.assertEqual(
+            dict(Hadith.objects.filter(pk__in=[first.pk, second.pk]).values_list('pk', 'matn_cluster')),
+            {first.pk: first.pk, second.pk: first.pk},
+        )
+
+
+@override_settings(CACHES=TEST_CACHES)
+class SanadDedupTests(TestCase):
+    """A hadith keeps one sanad per ordered chain of narrators."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.narrators = [Narrator.objects.create(name=f'الراوي {i}') for i in range(4)]
+        cls.ids = [narrator.pk for narrator in cls.narrators]
+        cls.hadith = Hadith.objects.create(text='الدين النصيحة', source='صحيح مسلم', grade='sahih')
+        cls.other = Hadith.objects.create(text='الحياء من الإيمان', source='صحيح مسلم', grade='sahih')
+
+    def setUp(self):
+        cache.clear()
+
+    def add_unindexed_sanad(self, hadith, narrator_ids, **fields):
+        """Store a chain without a fingerprint, as rows written before the dedup index were."""
+        sanad = Sanad.objects.create(hadith=hadith, **fields)
+        SanadNarrator.objects.bulk_create([
+            SanadNarrator(sanad=sanad, narrator_id=narrator_id, order=order)
+            for order, narrator_id in enumerate(narrator_ids, start=1)
+        ])
+        return sanad
+
+    def test_fingerprint_depends_on_order(self):
+        self.assertEqual(chain_fingerprint(self.ids), chain_fingerprint(list(self.ids)))
+        self.assertNotEqual(chain_fingerprint(self.ids), chain_fingerprint(self.ids[::-1]))
+        self.assertNotEqual(chain_fingerprint([1, 23]), chain_fingerprint([12, 3]))
+        self.assertEqual(chain_fingerprint([]), '')
+
+    def test_create_sanad_returns_the_existing_chain(self):
+        sanad, created = create_sanad(self.hadith, self.ids[:3])
+        self.assertTrue(created)
+        duplicate, created = create_sanad(self.hadith, self.ids[:3], ['عن'] * 3)
+        self.assertFalse(created)
+        self.assertEqual(duplicate, sanad)
+        self.assertEqual(find_duplicate_sanad(self.hadith.pk, self.ids[:3]), sanad)
+        self.assertIsNone(find_duplicate_sanad(self.hadith.pk, self.ids[:3], exclude_id=sanad.pk))
+        # The same chain under another hadith, or reversed, is a different sanad
+        self.assertTrue(create_sanad(self.other, self.ids[:3])[1])
+        self.assertTrue(create_sanad(self.hadith, self.ids[:3][::-1])[1])
+        self.assertEqual(self.hadith.asanid.count(), 2)
+
+    def test_unique_constraint_ignores_empty_fingerprints(self):
+        sanad, _ = create_sanad(self.hadith, self.ids)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Sanad.objects.create(hadith=self.hadith, chain_fingerprint=sanad.chain_fingerprint)
+        Sanad.objects.create(hadith=self.hadith)
+        Sanad.objects.create(hadith=self.hadith)
+        self.assertEqual(self.hadith.asanid.filter(chain_fingerprint='').count(), 2)
+
+    def test_fold_duplicates_into_the_oldest_sanad(self):
+        keeper = self.add_unindexed_sanad(self.hadith, self.ids, notes='رواية الأصل')
+        self.add_unindexed_sanad(self.hadith, self.ids, is_mutawatir=True, notes='طريق آخر')
+        distinct = self.add_unindexed_sanad(self.hadith, self.ids[:2])
+        elsewhere = self.add_unindexed_sanad(self.other, self.ids)
+
+        self.assertEqual(fold_duplicate_sanads([self.hadith.pk, self.other.pk], dry_run=True), (1, 3))
+        self.assertEqual(Sanad.objects.count(), 4)
+
+        self.assertEqual(fold_duplicate_sanads([self.hadith.pk, self.other.pk]), (1, 3))
+        self.assertEqual(list(self.hadith.asanid.order_by('pk')), [keeper, distinct])
+        keeper.refresh_from_db()
+        self.assertTrue(keeper.is_mutawatir)
+        self.assertEqual(keeper.notes, 'رواية الأصل\nطريق آخر')
+        self.assertEqual(keeper.chain_fingerprint, chain_fingerprint(self.ids))
+        elsewhere.refresh_from_db()
+        self.assertEqual(elsewhere.chain_fingerprint, keeper.chain_fingerprint)
+
+    def test_dedup_sanads_command(self):
+        self.add_unindexed_sanad(self.hadith, self.ids)
+        self.add_unindexed_sanad(self.hadith, self.ids)
+        out = StringIO()
+        call_command('dedup_sanads', stdout=out)
+        self.assertIn('Merged 1 duplicate sanads; 1 fingerprints updated', out.getvalue())
+        self.assertEqual(self.hadith.asanid.count(), 1)
+        # A second run finds nothing left to do
+        out = StringIO()
+        call_command('dedup_sanads', stdout=out)
+        self.assertIn('Merged 0 duplicate sanads; 0 fingerprints updated', out.getvalue())
+
+@override_settings(CACHES=TEST_CACHES)
+class SanadNarratorAdminTests(TestCase):
+    """Editing single chain links never makes two asanid of a hadith identical."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ids = [Narrator.objects.create(name=f'الراوي {i}').pk for i in range(4)]
+        cls.hadith = Hadith.objects.create(text='الطهور شطر الإيمان', source='صحيح مسلم', grade='sahih')
+
+    def setUp(self):
+        cache.clear()
+        self.first, _ = create_sanad(self.hadith, self.ids[:3])
+        self.second, _ = create_sanad(self.hadith, [self.ids[0], self.ids[3], self.ids[2]])
+        self.model_admin = SanadNarratorAdmin(SanadNarrator, admin_site)
+        self.request = RequestFactory().post('/')
+        self.request._messages = CookieStorage(self.request)
+
+    def link(self, sanad, order):
+        return SanadNarrator.objects.get(sanad=sanad, order=order)
+
+    def test_edit_making_a_duplicate_chain_is_rejected(self):
+        link = self.link(self.second, 2)
+        form = SanadNarratorAdminForm(instance=link, data={
+            'sanad': self.second.pk, 'narrator': self.ids[1], 'order': 2, 'narration_method': '',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('هذا السند مسجل مسبقاً لهذا الحديث', form.non_field_errors())
+
+        form = SanadNarratorAdminForm(instance=link, data={
+            'sanad': self.second.pk, 'narrator': self.ids[0], 'order': 2, 'narration_method': '',
+        })
+        self.assertTrue(form.is_valid(), form.errors)
+        self.model_admin.save_model(self.request, form.save(commit=False), form, change=True)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.chain_fingerprint, chain_fingerprint([self.ids[0], self.ids[0], self.ids[2]]))
+
+    def test_delete_making_a_duplicate_chain_folds_it(self):
+        # Both chains become [0, 2]
+        self.model_admin.delete_model(self.request, self.link(self.first, 2))
+        self.model_admin.delete_queryset(self.request, SanadNarrator.objects.filter(pk=self.link(self.second, 2).pk))
+        self.assertEqual(list(self.hadith.asanid.all()), [self.first])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.chain_fingerprint, chain_fingerprint([self.ids[0], self.ids[2]]))
+        self.assertEqual(SanadSegment.objects.filter(sanad=self.first).count(), 1)
+
+    def test_deleting_a_narrator_resyncs_its_chains(self):
+        # Both chains become [0, 2] once their middle narrators are gone
+        with self.captureOnCommitCallbacks(execute=True):
+            Narrator.objects.filter(pk=self.ids[1]).delete()
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.chain_fingerprint, chain_fingerprint([self.ids[0], self.ids[2]]))
+        self.assertEqual(SanadSegment.objects.filter(sanad=self.first).count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Narrator.objects.filter(pk=self.ids[3]).delete()
+        self.assertEqual(list(self.hadith.asanid.all()), [self.first])
+        self.assertIsNone(find_duplicate_sanad(self.hadith.pk, [self.ids[0], self.ids[2]], exclude_id=self.first.pk))
+
+@override_settings(CACHES=TEST_CACHES)
+class NarratorMergeTests(TestCase):
+    """Merging duplicate narrators rewrites their chains without clashes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.target, cls.duplicate, cls.second, cls.third = [
+            Narrator.objects.create(name=name) for name in ('أبو هريرة', 'عبد الرحمن بن صخر', 'الأعرج', 'أبو الزناد')
+        ]
+        cls.hadith = Hadith.objects.create(text='لا يقبل الله صلاة بغير طهور', source='صحيح مسلم', grade='sahih')
+
+    def setUp(self):
+        cache.clear()
+        ids = self.target.pk, self.duplicate.pk, self.second.pk, self.third.pk
+        self.first, _ = create_sanad(self.hadith, [ids[0], ids[2], ids[3]])
+        self.folded, _ = create_sanad(self.hadith, [ids[1], ids[2], ids[3]])
+        self.repeated, _ = create_sanad(self.hadith, [ids[0], ids[1], ids[3]])
+
+    def test_merge_repoints_collapses_and_folds(self):
+        updated_before = self.target.updated_at
+        stats = merge_narrators(self.target, [self.duplicate])
+
+        self.assertEqual(stats['links_repointed'], 2)
+        self.assertEqual(stats['links_collapsed'], 1)
+        self.assertEqual(stats['sanads_merged'], 1)
+        self.assertEqual(stats['aliases_recorded'], 1)
+        self.assertFalse(Narrator.objects.filter(pk=self.duplicate.pk).exists())
+        self.assertFalse(SanadNarrator.objects.filter(narrator_id=self.duplicate.pk).exists())
+        self.assertEqual(list(self.target.aliases.values_list('name', flat=True)), ['عبد الرحمن بن صخر'])
+        self.target.refresh_from_db()
+        self.assertGreater(self.target.updated_at, updated_before)
+
+        # [duplicate, second, third] became the first chain and was folded into it
+        self.assertEqual(list(self.hadith.asanid.order_by('pk')), [self.first, self.repeated])
+        self.repeated.refresh_from_db()
+        self.assertEqual(
+            list(SanadNarrator.objects.filter(sanad=self.repeated).order_by('order').values_list('narrator_id', 'order')),
+            [(self.target.pk, 1), (self.third.pk, 2)],
+        )
+        self.assertEqual(self.repeated.chain_fingerprint, chain_fingerprint([self.target.pk, self.third.pk]))
+        self.assertEqual(SanadSegment.objects.filter(sanad=self.repeated).count(), 1)
+
+
+@override_settings(CACHES=TEST_CACHES)
+class CollectionUpsertTests(TestCase):
+    """Re-importing a collection matches hadiths on (source, hadith number) instead of duplicating them."""
+
+    records = [
+        {
+            'source': 'صحيح البخاري', 'source_hadith_number': '1', 'grade': 'sahih',
+            'text': 'إنما الأعمال بالنيات', 'categories': ['الإيمان'],
+            'asanid': ['حدثنا الحميدي عن سفيان عن يحيى بن سعيد'],
+        },
+        {
+            'source': 'صحيح البخاري', 'source_hadith_number': '2', 'grade': 'sahih',
+            'text': 'بني الإسلام على خمس', 'categories': ['الإيمان', 'الأركان'],
+            'asanid': ['حدثنا عبيد الله بن موسى عن حنظلة عن عكرمة'],
+        },
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def import_records(self, records):
+        with tempfile.NamedTemporaryFile('w', suffix='.json', encoding='utf-8', delete=False) as fp:
+            json.dump(records, fp, ensure_ascii=False)
+        self.addCleanup(os.remove, fp.name)
+        return CollectionImporter().run(iter_records(fp.name))
+
+    def test_unchanged_reimport_writes_nothing(self):
+        stats = self.import_records(self.records)
+        self.assertEqual(stats['records_prepared'], 2)
+        self.assertEqual(stats['hadiths_created'], 2)
+        self.assertEqual(stats['links_created'], 6)
+        counters = list(StatsCounter.objects.order_by('name').values_list('name', 'value', 'reconciled_at'))
+        self.assertTrue(counters)
+
+        stats = self.import_records(self.records)
+        for name in ('hadiths_created', 'hadiths_updated', 'narrators_created', 'categories_created',
+                     'sanads_created', 'links_created'):
+            self.assertEqual(stats[name], 0, name)
+        self.assertEqual(stats['hadiths_unchanged'], 2)
+        self.assertEqual(Hadith.objects.count(), 2)
+        self.assertEqual(SanadNarrator.objects.count(), 6)
+        # The site statistics are not reconciled after an import that wrote nothing
+        self.assertEqual(
+            list(StatsCounter.objects.order_by('name').values_list('name', 'value', 'reconciled_at')), counters,
+        )
+
+    def test_changed_record_is_updated_in_place(self):
+        self.import_records(self.records)
+        hadith = Hadith.objects.get(source_hadith_number='1')
+        changed = [dict(self.records[0], grade='hasan',
+                        asanid=[*self.records[0]['asanid'], 'أخبرنا مالك عن نافع عن ابن عمر']),
+                   self.records[1]]
+
+        stats = self.import_records(changed)
+        self.assertEqual(stats['hadiths_created'], 0)
+        self.assertEqual(stats['hadiths_updated'], 1)
+        self.assertEqual(stats['hadiths_unchanged'], 1)
+        # Only the new sanad is added; the existing one is recognised by its fingerprint
+        self.assertEqual(stats['sanads_created'], 1)
+        self.assertEqual(stats['narrators_created'], 3)
+        self.assertEqual(Hadith.objects.count(), 2)
+        hadith.refresh_from_db()
+        self.assertEqual(hadith.grade, 'hasan')
+        self.assertEqual(Sanad.objects.filter(hadith=hadith).count(), 2)
+
+
+# Two processes: each two-tier cache has its own local tier and generation,
+# and both shared aliases are views of the same LocMemCache
+TWO_TIER_CACHES = {
+    'default': TEST_CACHES['shared'],
+    'process-a': {
+        'BACKEND': 'hadith_app.cache_backends.TwoTierCache',
+        'LOCATION': 'shared-a',
+        'OPTIONS': {'LOCAL_TIMEOUT': 60, 'SYNC_INTERVAL': 0},
+    },
+    'process-b': {
+        'BACKEND': 'hadith_app.cache_backends.TwoTierCache',
+        'LOCATION': 'shared-b',
+        'OPTIONS': {'LOCAL_TIMEOUT': 60, 'SYNC_INTERVAL': 0},
+    },
+    'shared-a': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-tests'},
+    'shared-b': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'two-tier-tests'},
+}
+
+
+@register('hadith_app.tests.fail')
+def failing_job(job):
+    raise RuntimeError('boom')
+
+
+@register('hadith_app.tests.wait')
+def waiting_job(job, seconds):
+    time.sleep(seconds)
+    row = Job.objects.get(pk=job.pk)
+    return {'beat': row.locked_at > row.started_at}
+
+
+class JobQueueTests(TestCase):
+    """Jobs are claimed by one worker, retried with backoff and reclaimed when stale."""
+
+    def make_due(self, job):
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+
+    def test_two_workers_never_claim_the_same_job(self):
+        jobs = [enqueue(waiting_job, {'seconds': 0}) for _ in range(2)]
+        claimed = [claim_job('worker-a'), claim_job('worker-b')]
+        self.assertEqual(sorted(job.pk for job in claimed), [job.pk for job in jobs])
+        self.assertEqual([job.worker for job in claimed], ['worker-a', 'worker-b'])
+        self.assertIsNone(claim_job('worker-c'))
+
+    def test_failed_attempts_are_retried_then_failed(self):
+        job = enqueue(failing_job, max_attempts=2)
+        self.assertFalse(run_job(claim_job('worker-a')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.worker), (Job.QUEUED, 1, ''))
+        self.assertIn('boom', job.error)
+        # Backoff: not due again yet
+        self.assertIsNone(claim_job('worker-a'))
+
+        self.make_due(job)
+        self.assertFalse(run_job(claim_job('worker-b')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+
+    def test_stale_job_is_reclaimed_by_another_worker(self):
+        job = enqueue(waiting_job, {'seconds': 0})
+        stale = claim_job('worker-a')
+        Job.objects.filter(pk=job.pk).update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale_jobs(stale_after=60), 1)
+
+        self.make_due(job)
+        reclaimed = claim_job('worker-b')
+        self.assertEqual((reclaimed.pk, reclaimed.attempts), (job.pk, 2))
+        # The first worker finishing late does not overwrite the new attempt
+        self.assertTrue(run_job(stale))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, 'worker-b'))
+
+    def test_prune_deletes_only_old_finished_jobs(self):
+        old, recent, queued = [enqueue(waiting_job, {'seconds': 0}) for _ in range(3)]
+        Job.objects.filter(pk=old.pk).update(status=Job.SUCCEEDED, finished_at=timezone.now() - timedelta(days=8))
+        Job.objects.filter(pk=recent.pk).update(status=Job.FAILED, finished_at=timezone.now())
+        self.assertEqual(prune_jobs(), 1)
+        self.assertEqual(set(Job.objects.values_list('pk', flat=True)), {recent.pk, queued.pk})
+
+    @mock.patch('hadith_app.jobs.LOCKED_RETRY_DELAY', 0)
+    def test_locked_database_writes_are_retried(self):
+        calls = []
+
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(retry_locked(write), 'done')
+        self.assertEqual(len(calls), 3)
+        with self.assertRaises(OperationalError):
+            retry_locked(mock.Mock(side_effect=OperationalError('no such table: x')))
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    """The heartbeat thread writes through its own connection, so rows must be committed."""
+
+    def test_heartbeat_refreshes_the_lock_of_a_running_job(self):
+        job = enqueue(waiting_job, {'seconds': 0.3})
+        self.assertTrue(run_job(claim_job('worker-a'), heartbeat_interval=0.05))
+        job.refresh_from_db()
+        self.assertEqual(job.result, {'beat': True})
+        self.assertIsNone(job.locked_at)
+
+
+@override_settings(CACHES=TWO_TIER_CACHES)
+class TwoTierCacheTests(SimpleTestCase):
+    """Writes in one process drop the local copies held by the others."""
+
+    def setUp(self):
+        self.a, self.b, self.shared = caches['process-a'], caches['process-b'], caches['shared-a']
+        self.a.clear()
+        # Both processes catch up with the clear before each test
+        self.a.get('warm-up')
+        self.b.get('warm-up')
+        self.a.reset_stats()
+
+    def test_local_tier_serves_repeated_reads(self):
+        self.b.set('hadith', 'v1')
+        self.assertEqual(self.a.get('hadith'), 'v1')
+        # Deleted from the shared tier without going through a two-tier cache
+        self.shared.delete('hadith')
+        self.assertEqual(self.a.get('hadith'), 'v1')
+        stats = self.a.stats()
+        self.assertEqual((stats['local']['hits'], stats['shared']['hits']), (1, 1))
+
+    def test_write_in_another_process_invalidates_local_copy(self):
+        self.a.set('hadith', 'v1')
+        self.assertEqual(self.a.get('hadith'), 'v1')
+        self.b.set('hadith', 'v2')
+        self.assertEqual(self.a.get('hadith'), 'v2')
+        self.b.delete('hadith')
+        self.assertIsNone(self.a.get('hadith'))
+        self.b.set_many({'hadith': 'v3', 'narrator': 'n1'})
+        self.assertEqual(self.a.get_many(['hadith', 'narrator']), {'hadith': 'v3', 'narrator': 'n1'})
+        self.assertEqual(self.a.stats()['local_flushes'], 0)
+
+    def test_local_tier_flushed_when_too_far_behind(self):
+        self.a.set('hadith', 'v1')
+        self.assertEqual(self.a.get('hadith'), 'v1')
+        for index in range(MAX_LOG_READ + 1):
+            self.b.set(f'narrator:{index}', index)
+        # Changed behind the invalidation log: only a flush reveals it
+        self.shared.set('hadith', 'v2')
+        self.assertEqual(self.a.get('hadith'), 'v2')
+        self.assertEqual(self.a.stats()['local_flushes'], 1)
+
+    def test_clear_drops_every_local_copy(self):
+        self.a.set_many({'hadith': 'v1', 'narrator': 'n1'})
+        self.assertEqual(self.a.get('hadith'), 'v1')
+        self.b.clear()
+        self.assertIsNone(self.a.get('hadith'))
+        self.assertIsNone(self.a.get('narrator'))
+        self.assertEqual(self.a.stats()['local_flushes'], 1)
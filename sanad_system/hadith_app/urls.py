@@ -3,17 +3,18 @@ from django.views.generic import TemplateView
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import views as auth_views
 from .views import (
-    HadithListView, HadithDetailView, HadithCreateView, HadithUpdateView, HadithDeleteView,
+    HomeView, HadithListView, HadithDetailView, HadithCreateView, HadithUpdateView, HadithDeleteView,
     NarratorListView, NarratorDetailView, NarratorCreateView, NarratorUpdateView, NarratorDeleteView,
     RegisterView, ProfileView, ProfileUpdateView,
-    SearchView, set_theme, SanadCreateView
+    SearchView, set_theme, SanadCreateView, subchain_search, job_status,
+    export_hadiths, export_tei, cache_stats
 )
 
 app_name = 'hadith_app'
 
 urlpatterns = [
     # Home
-    path('', TemplateView.as_view(template_name='hadith_app/home.html'), name='home'),
+    path('', HomeView.as_view(), name='home'),
     
     # Authentication
     path('accounts/register/', RegisterView.as_view(), name='register'),
@@ -52,6 +53,8 @@ urlpatterns = [
     path('hadith/create/', HadithCreateView.as_view(), name='hadith_create'),
     path('hadith/<int:pk>/update/', HadithUpdateView.as_view(), name='hadith_update'),
     path('hadith/<int:pk>/delete/', HadithDeleteView.as_view(), name='hadith_delete'),
+    path('hadith/export/', export_hadiths, name='hadith_export'),
+    path('hadith/export/tei/', export_tei, name='hadith_export_tei'),
     
     # Narrator URLs
     path('narrators/', NarratorListView.as_view(), name='narrator_list'),
@@ -64,7 +67,8 @@ urlpatterns = [
     path('search/', SearchView.as_view(), name='search'),
     
     # Sanad URLs
-    path('sanad/add/', SanadCreateView.as_view(), name='sanad_add'),
+    path('hadith/<int:hadith_id>/sanad/add/', SanadCreateView.as_view(), name='sanad_create'),
+    path('sanad/subchain/', subchain_search, name='sanad_subchain_search'),
     
     # Profile
     path('profile/', ProfileView.as_view(), name='profile'),
@@ -73,6 +77,12 @@ urlpatterns = [
     # Theme
     path('theme/set/', set_theme, name='set_theme'),
     
+    # Background jobs
+    path('jobs/<int:pk>/', job_status, name='job_status'),
+    
+    # Cache statistics
+    path('cache/stats/', cache_stats, name='cache_stats'),
+    
     # Error Pages
     path('404/', TemplateView.as_view(template_name='404.html'), name='404'),
     path('500/', TemplateView.as_view(template_name='500.html'), name='500'),
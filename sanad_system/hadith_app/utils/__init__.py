@@ -3,3 +3,11 @@ from .text_utils import *
 from .search_utils import *
 from .validation_utils import *
 from .user_utils import *
+from .matn_utils import *
+from .narrator_utils import *
+from .conditional_utils import *
+from .cache_utils import *
+from .stats_utils import *
+from .home_utils import *
+from .lookup_utils import *
+from .hadith_utils import *
@@ -0,0 +1,140 @@
+import hashlib
+import uuid
+from typing import Dict, Iterable, List, Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from ..models import Narrator, SanadNarrator
+from .text_utils import get_similar_narrators
+
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 60 * 60 * 24)
+# Versions expire too, so a version left over from a flushed database cannot
+# match fragments of the new rows for longer than this
+VERSION_TIMEOUT = FRAGMENT_CACHE_TIMEOUT
+NARRATOR_CARD_TEMPLATE = 'hadith_app/includes/narrator_card.html'
+
+
+def _version_key(kind: str, pk) -> str:
+    return f'fragment-version:{kind}:{pk}'
+
+
+def _new_version() -> str:
+    # Random rather than incremented: a version evicted from the cache and
+    # recreated must not match fragments cached under an earlier value
+    return uuid.uuid4().hex[:16]
+
+
+def get_versions(kind: str, pks: Iterable) -> Dict:
+    """Return the current fragment version of each object, creating missing ones."""
+    keys = {_version_key(kind, pk): pk for pk in pks}
+    found = cache.get_many(keys)
+    for key in keys.keys() - found.keys():
+        version = _new_version()
+        # add() keeps a version another process set in the meantime
+        if not cache.add(key, version, VERSION_TIMEOUT):
+            version = cache.get(key, version)
+        found[key] = version
+    return {keys[key]: version for key, version in found.items()}
+
+
+def bump_versions(kind: str, pks: Iterable) -> None:
+    """
+    Invalidate the cached fragments of the given objects (``kind`` is 'sanad',
+    'narrator' or 'narrator-names').
+
+    Applied once the current transaction commits, so a page rendered from the
+    old rows in the meantime is not cached under the new version.
+    """
+    versions = {_version_key(kind, pk): _new_version() for pk in pks}
+    if versions:
+        transaction.on_commit(lambda: cache.set_many(versions, VERSION_TIMEOUT))
+
+
+def _chain_key(sanad_id, version) -> str:
+    return f'fragment:sanad-chain:{sanad_id}:{version}'
+
+
+def _card_key(narrator_id, version, method) -> str:
+    # Cache keys must stay ASCII for memcached; the method is Arabic text
+    method_key = hashlib.md5((method or '').encode(), usedforsecurity=False).hexdigest()[:8]
+    return f'fragment:narrator-card:{narrator_id}:{version}:{method_key}'
+
+
+def render_sanad_timelines(sanads: Sequence) -> None:
+    """
+    Set ``sanad.timeline`` to the rendered narrator timeline of each sanad.
+
+    Timelines are assembled from two kinds of cached fragments: the chain of
+    each sanad (its ``(narrator id, narration method)`` links) and the card
+    of each narrator, each keyed by a version that the signal handlers bump
+    when the sanad's chain or the narrator changes. A warm render costs four
+    cache lookups for any number of asanid and runs no chain queries; a cold
+    one loads the missing chains and narrators with one query each.
+    """
+    if not sanads:
+        return
+    sanad_versions = get_versions('sanad', [sanad.pk for sanad in sanads])
+    chain_keys = {sanad.pk: _chain_key(sanad.pk, sanad_versions[sanad.pk]) for sanad in sanads}
+    cached_chains = cache.get_many(chain_keys.values())
+    chains: Dict[int, List] = {}
+    missing = []
+    for sanad in sanads:
+        if chain_keys[sanad.pk] in cached_chains:
+            chains[sanad.pk] = cached_chains[chain_keys[sanad.pk]]
+        else:
+            missing.append(sanad.pk)
+            chains[sanad.pk] = []
+    if missing:
+        for sanad_id, narrator_id, method in (SanadNarrator.objects.filter(sanad_id__in=missing)
+                                              .order_by('sanad_id', 'order')
+                                              .values_list('sanad_id', 'narrator_id', 'narration_method')):
+            chains[sanad_id].append((narrator_id, method))
+        cache.set_many({chain_keys[pk]: chains[pk] for pk in missing}, FRAGMENT_CACHE_TIMEOUT)
+
+    links = {link for chain in chains.values() for link in chain}
+    narrator_versions = get_versions('narrator', {narrator_id for narrator_id, _ in links})
+    card_keys = {(narrator_id, method): _card_key(narrator_id, narrator_versions[narrator_id], method)
+                 for narrator_id, method in links}
+    cards = cache.get_many(card_keys.values())
+    missing_links = [link for link, key in card_keys.items() if key not in cards]
+    if missing_links:
+        narrators = Narrator.objects.in_bulk({narrator_id for narrator_id, _ in missing_links})
+        rendered = {}
+        for narrator_id, method in missing_links:
+            narrator = narrators.get(narrator_id)
+            if narrator is not None:
+                rendered[card_keys[(narrator_id, method)]] = render_to_string(
+                    NARRATOR_CARD_TEMPLATE, {'narrator': narrator, 'narration_method': method}
+                )
+        cache.set_many(rendered, FRAGMENT_CACHE_TIMEOUT)
+        cards.update(rendered)
+
+    for sanad in sanads:
+        sanad.timeline = mark_safe(''.join(
+            cards.get(card_keys[link], '') for link in chains[sanad.pk]
+        ))
+
+
+def narrator_names_version() -> str:
+    """Return the version of the set of narrator names, bumped when a narrator is added, saved or removed."""
+    return get_versions('narrator-names', ['all'])['all']
+
+
+def get_cached_similar_narrators(name: str) -> List[Dict]:
+    """
+    Return ``get_similar_narrators(name)``, cached under the narrator names version.
+
+    The matches are computed from every narrator name, so they are kept until
+    any narrator changes rather than recomputed on each narrator page.
+    """
+    name_hash = hashlib.md5(name.encode(), usedforsecurity=False).hexdigest()
+    key = f'fragment:similar-narrators:{narrator_names_version()}:{name_hash}'
+    similar = cache.get(key)
+    if similar is None:
+        similar = get_similar_narrators(name)
+        cache.set(key, similar, FRAGMENT_CACHE_TIMEOUT)
+    return similar
@@ -0,0 +1,152 @@
+import hashlib
+from functools import wraps
+from typing import Callable, Optional, Sequence, Tuple
+
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from ..models import Hadith, HadithCategory, Narrator
+from .cache_utils import narrator_names_version
+
+# (last modified time, anything else the page depends on) of the object shown on a page
+PageState = Tuple[object, tuple]
+
+
+def hadith_page_state(pk) -> Optional[PageState]:
+    """
+    Return what the hadith detail page of ``pk`` depends on, in one query.
+
+    The page shows the hadith and its asanid with the narrators' names, so
+    it changes with the hadith's ``updated_at``, the latest ``updated_at``
+    of its asanid (bumped by ``sync_sanad_chain`` on every chain change)
+    and of their narrators, and the numbers of asanid and links (deletions).
+    It also shows the hadith's categories (their latest ``updated_at`` and
+    count) and the other versions in its matn cluster (the members' latest
+    ``updated_at``, count and id sum, as clustering writes bypass
+    ``updated_at``).
+    """
+    categories = HadithCategory.objects.filter(hadith=OuterRef('pk')).order_by().values('hadith')
+    variants = Hadith.objects.filter(matn_cluster=OuterRef('matn_cluster')).order_by().values('matn_cluster')
+    row = Hadith.objects.filter(pk=pk).annotate(
+        sanads_updated=Max('asanid__updated_at'),
+        narrators_updated=Max('asanid__sanadnarrator__narrator__updated_at'),
+        categories_updated=Subquery(categories.annotate(latest=Max('updated_at')).values('latest')),
+        variants_updated=Subquery(variants.annotate(latest=Max('updated_at')).values('latest')),
+        sanad_count=Count('asanid', distinct=True),
+        link_count=Count('asanid__sanadnarrator'),
+        category_count=Subquery(categories.annotate(count=Count('pk')).values('count')),
+        variant_count=Subquery(variants.annotate(count=Count('pk')).values('count')),
+        variant_ids=Subquery(variants.annotate(total=Sum('pk')).values('total')),
+    ).values_list(
+        'updated_at', 'sanads_updated', 'narrators_updated', 'categories_updated', 'variants_updated',
+        'sanad_count', 'link_count', 'category_count', 'variant_count', 'variant_ids', 'matn_cluster',
+    ).first()
+    if row is None:
+        return None
+    return max(value for value in row[:5] if value is not None), row
+
+
+def narrator_page_state(pk) -> Optional[PageState]:
+    """
+    Return what the narrator detail page of ``pk`` depends on, in one query.
+
+    Besides the narrator, the page lists the hadiths narrated through them
+    (their asanid and hadiths' ``updated_at`` and the number of links) and
+    narrators with similar names, which are cached under the narrator names
+    version (see ``get_cached_similar_narrators``), so that part is a cache
+    read rather than a query over every narrator.
+    """
+    row = Narrator.objects.filter(pk=pk).annotate(
+        sanads_updated=Max('narrations__sanad__updated_at'),
+        hadiths_updated=Max('narrations__sanad__hadith__updated_at'),
+        link_count=Count('narrations'),
+    ).values_list('updated_at', 'sanads_updated', 'hadiths_updated', 'link_count').first()
+    if row is None:
+        return None
+    return max(value for value in row[:3] if value is not None), (*row, narrator_names_version())
+
+
+def conditional_page(state_func: Callable[[object], Optional[PageState]], pk_kwarg: str = 'pk'):
+    """
+    Decorate a detail view with ETag/Last-Modified validators and conditional GET.
+
+    ``state_func(pk)`` is called once per request. The ETag also covers who
+    is viewing (the navigation bar shows the user name) and their theme, and
+    no validators are sent while flash messages are waiting to be shown, so
+    a 304 never hides them. Responses are marked ``private, no-cache`` so
+    browsers store them but revalidate on every visit; a matching request
+    gets a 304 without running the view or rendering the template.
+    """
+    def get_state(request, **kwargs):
+        if not hasattr(request, '_page_state'):
+            state = None
+            if not len(get_messages(request)):
+                state = state_func(kwargs[pk_kwarg])
+            request._page_state = state
+        return request._page_state
+
+    def etag(request, *args, **kwargs):
+        state = get_state(request, **kwargs)
+        if state is None:
+            return None
+        user = request.user.pk if request.user.is_authenticated else ''
+        theme = request.session.get('theme', '')
+        key = repr((state[1], user, theme)).encode()
+        return hashlib.md5(key, usedforsecurity=False).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        state = get_state(request, **kwargs)
+        return state[0] if state else None
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if response.has_header('ETag'):
+                patch_cache_control(response, private=True, no_cache=True)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_policy(max_age: Optional[int] = None, public: bool = False, no_cache: bool = False,
+                 no_store: bool = False, stale_while_revalidate: Optional[int] = None,
+                 vary: Sequence[str] = ()):
+    """
+    Decorate a view with its Cache-Control and Vary headers.
+
+    Responses are ``private`` unless ``public`` is set; only successful
+    GET/HEAD responses (200 and 304) get the policy, so errors, redirects
+    and accepted-job replies are never stored. Headers the view set itself
+    are kept (``patch_cache_control`` merges directives).
+
+    Example::
+
+        @cache_policy(max_age=300, public=True)
+        def subchain_search(request): ...
+    """
+    directives = {'public': True} if public else {'private': True}
+    if max_age is not None:
+        directives['max_age'] = max_age
+    if no_cache:
+        directives['no_cache'] = True
+    if no_store:
+        directives['no_store'] = True
+    if stale_while_revalidate is not None:
+        directives['stale_while_revalidate'] = stale_while_revalidate
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                patch_cache_control(response, **directives)
+                if vary:
+                    patch_vary_headers(response, vary)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,49 @@
+from typing import Optional
+
+from django.db.models import Prefetch, QuerySet
+
+from ..models import Hadith, Sanad, SanadNarrator
+
+
+def sanad_chain_prefetch(lookup: str = 'sanadnarrator_set') -> Prefetch:
+    """
+    Prefetch the chain links of asanid in chain order, with their narrators,
+    as ``sanad.chain`` (one query for any number of asanid).
+
+    Args:
+        lookup: Path to the links from the queryset being prefetched, e.g.
+            ``'asanid__sanadnarrator_set'`` from hadiths
+    """
+    return Prefetch(
+        lookup,
+        queryset=SanadNarrator.objects.select_related('narrator').order_by('order'),
+        to_attr='chain',
+    )
+
+
+def hadith_detail_queryset(chains: bool = True) -> QuerySet:
+    """
+    Return hadiths with their categories and asanid prefetched.
+
+    The asanid come in the order they were added. With ``chains`` each
+    sanad also gets its ordered links with their narrators as
+    ``sanad.chain``. Loading any number of hadiths costs a constant number
+    of queries: four with chains, three without.
+    """
+    asanid = Sanad.objects.order_by('pk')
+    if chains:
+        asanid = asanid.prefetch_related(sanad_chain_prefetch())
+    return Hadith.objects.defer('matn_signature').prefetch_related(
+        'categories',
+        Prefetch('asanid', queryset=asanid),
+    )
+
+
+def load_hadith(pk, chains: bool = True) -> Optional[Hadith]:
+    """
+    Load a hadith for display (see ``hadith_detail_queryset``).
+
+    Returns:
+        Hadith or None: The hadith, or None if it does not exist
+    """
+    return hadith_detail_queryset(chains).filter(pk=pk).first()
@@ -0,0 +1,83 @@
+import time
+from typing import Dict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.template.loader import render_to_string
+
+from ..models import Hadith, HadithCategory, Job, Narrator
+from .stats_utils import get_site_stats
+
+# A snapshot older than this (seconds) is still served while a refresh is queued
+HOME_SNAPSHOT_MAX_AGE = getattr(settings, 'HOME_SNAPSHOT_MAX_AGE', 5 * 60)
+# Past this age (no worker ran the refresh) the snapshot is rebuilt during the request
+HOME_SNAPSHOT_MAX_STALE = getattr(settings, 'HOME_SNAPSHOT_MAX_STALE', 60 * 60)
+# Seconds a refresh queued by a write waits, so a burst of writes needs one refresh
+HOME_REFRESH_DELAY = 5
+
+HOME_SNAPSHOT_KEY = 'home:snapshot'
+HOME_REFRESH_QUEUED_KEY = 'home:refresh-queued'
+HOME_SNAPSHOT_TEMPLATE = 'hadith_app/includes/home_snapshot.html'
+REFRESH_JOB = 'hadith_app.refresh_home_snapshot'
+
+LATEST_HADITHS = 6
+POPULAR_NARRATORS = 6
+FEATURED_CATEGORIES = 12
+
+
+def build_home_snapshot() -> Dict:
+    """Render the home page sections that do not depend on the visitor."""
+    context = {
+        'stats': get_site_stats(),
+        'latest_hadiths': Hadith.objects.order_by('-created_at').only('text', 'grade', 'source')[:LATEST_HADITHS],
+        'popular_narrators': (Narrator.objects.annotate(narration_count=Count('narrations'))
+                              .filter(narration_count__gt=0)
+                              .order_by('-narration_count', 'name')[:POPULAR_NARRATORS]),
+        'featured_categories': (HadithCategory.objects.annotate(hadith_count=Count('hadith'))
+                                .filter(hadith_count__gt=0)
+                                .order_by('-hadith_count', 'name')[:FEATURED_CATEGORIES]),
+    }
+    return {'html': render_to_string(HOME_SNAPSHOT_TEMPLATE, context), 'built_at': time.time()}
+
+
+def refresh_home_snapshot() -> Dict:
+    """Rebuild the snapshot and store it for every process."""
+    # Writes from now on may not be in this snapshot; let them queue another refresh
+    cache.delete(HOME_REFRESH_QUEUED_KEY)
+    snapshot = build_home_snapshot()
+    cache.set(HOME_SNAPSHOT_KEY, snapshot, timeout=None)
+    return snapshot
+
+
+def schedule_home_refresh(delay: float = 0) -> None:
+    """
+    Queue a background refresh of the snapshot unless one is already queued.
+
+    The cache flag keeps repeated calls (every write, every stale read) from
+    querying the job table; it expires on its own if no worker is running.
+    """
+    if not cache.add(HOME_REFRESH_QUEUED_KEY, True, timeout=HOME_SNAPSHOT_MAX_AGE):
+        return
+    from ..jobs import enqueue
+    if not Job.objects.filter(name=REFRESH_JOB, status=Job.QUEUED).exists():
+        enqueue(REFRESH_JOB, delay=delay)
+
+
+def get_home_snapshot() -> str:
+    """
+    Return the rendered home page sections, stale-while-revalidate.
+
+    The snapshot comes from the cache, so in steady state the home page runs
+    no queries. Once it is older than ``HOME_SNAPSHOT_MAX_AGE`` it is still
+    served while a background job rebuilds it; relevant writes queue that
+    job too (see ``signals``). It is only built during the request when
+    missing or older than ``HOME_SNAPSHOT_MAX_STALE``.
+    """
+    snapshot = cache.get(HOME_SNAPSHOT_KEY)
+    age = time.time() - snapshot['built_at'] if snapshot else None
+    if age is None or age > HOME_SNAPSHOT_MAX_STALE:
+        return refresh_home_snapshot()['html']
+    if age > HOME_SNAPSHOT_MAX_AGE:
+        schedule_home_refresh()
+    return snapshot['html']
@@ -0,0 +1,178 @@
+import hashlib
+import uuid
+from typing import Dict, Iterable, Mapping, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ..models import Hadith, Narrator, NarratorAlias
+
+# How long (seconds) a found narrator or hadith stays cached; writes drop it earlier
+LOOKUP_CACHE_TIMEOUT = getattr(settings, 'LOOKUP_CACHE_TIMEOUT', 60 * 60 * 24)
+# Misses are cached for less time: creating the object also drops them, but
+# a write that bypasses the signal handlers is seen sooner
+LOOKUP_MISS_TIMEOUT = getattr(settings, 'LOOKUP_MISS_TIMEOUT', 5 * 60)
+
+# Cached in place of a missing object (no cached value is falsy otherwise)
+_NOT_FOUND = 0
+
+
+def _generation_key(kind: str) -> str:
+    return f'lookup:generation:{kind}'
+
+
+def _generation(kind: str) -> str:
+    """Return the generation of a kind of lookup; bulk writers replace it to drop every entry at once."""
+    key = _generation_key(kind)
+    generation = cache.get(key)
+    if generation is None:
+        # Random rather than incremented, like the fragment versions in cache_utils
+        generation = uuid.uuid4().hex[:8]
+        if not cache.add(key, generation, LOOKUP_CACHE_TIMEOUT):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def _name_key(normalized_name: str, generation: str) -> str:
+    # Cache keys must stay ASCII for memcached; names are Arabic text
+    name_hash = hashlib.md5(normalized_name.encode(), usedforsecurity=False).hexdigest()
+    return f'lookup:narrator-name:{generation}:{name_hash}'
+
+
+def _narrator_key(pk) -> str:
+    return f'lookup:narrator:{pk}'
+
+
+def _hadith_key(pk, generation: str) -> str:
+    return f'lookup:hadith:{generation}:{pk}'
+
+
+def _cache_results(found: Mapping[str, object], missed: Iterable[str]) -> None:
+    cache.set_many(dict(found), LOOKUP_CACHE_TIMEOUT)
+    cache.set_many(dict.fromkeys(missed, _NOT_FOUND), LOOKUP_MISS_TIMEOUT)
+
+
+def get_narrator_ids(normalized_names: Iterable[str], cached_misses: bool = True) -> Dict[str, int]:
+    """
+    Return the narrator id of each normalized name that matches a narrator or
+    a merged-narrator alias.
+
+    Names are looked up in the cache first; the others are matched with one
+    query (plus one on aliases if some are unmatched) and the results, found
+    or not, are cached. The oldest narrator wins when normalized names collide.
+
+    Args:
+        normalized_names: Names as returned by ``normalize_arabic``
+        cached_misses: Whether a cached miss is trusted; callers that create
+            the missing narrators pass False so a stale miss never leads to
+            a duplicate
+
+    Returns:
+        dict: ``{normalized name: narrator id}`` for the matched names
+    """
+    generation = _generation('narrator-names')
+    keys = {_name_key(name, generation): name for name in set(normalized_names)}
+    cached = cache.get_many(keys)
+    ids = {keys[key]: pk for key, pk in cached.items() if pk != _NOT_FOUND}
+    unknown = {name for key, name in keys.items()
+               if key not in cached or (cached[key] == _NOT_FOUND and not cached_misses)}
+    if not unknown:
+        return ids
+
+    found = dict(
+        Narrator.objects.filter(normalized_name__in=unknown)
+        .order_by('-pk')  # the oldest narrator wins when normalized names collide
+        .values_list('normalized_name', 'pk')
+    )
+    unmatched = unknown - set(found)
+    if unmatched:
+        # Spellings folded into another narrator by a merge
+        found.update(
+            NarratorAlias.objects.filter(normalized_name__in=unmatched)
+            .values_list('normalized_name', 'narrator_id')
+        )
+    _cache_results({_name_key(name, generation): pk for name, pk in found.items()},
+                   [_name_key(name, generation) for name in unknown - set(found)])
+    ids.update(found)
+    return ids
+
+
+def remember_narrator_ids(ids: Mapping[str, int]) -> None:
+    """Cache ``{normalized name: narrator id}`` for narrators created in the current transaction, once it commits."""
+    if ids:
+        generation = _generation('narrator-names')
+        data = {_name_key(name, generation): pk for name, pk in ids.items()}
+        transaction.on_commit(lambda: cache.set_many(data, LOOKUP_CACHE_TIMEOUT))
+
+
+def get_narrators(pks: Iterable[int]) -> Dict[int, Narrator]:
+    """Return ``{pk: Narrator}`` like ``in_bulk``, loading only the uncached narrators (one query)."""
+    keys = {_narrator_key(pk): pk for pk in set(pks)}
+    cached = cache.get_many(keys)
+    narrators = {keys[key]: narrator for key, narrator in cached.items() if narrator != _NOT_FOUND}
+    unknown = [pk for key, pk in keys.items() if key not in cached]
+    if unknown:
+        found = Narrator.objects.in_bulk(unknown)
+        _cache_results({_narrator_key(pk): narrator for pk, narrator in found.items()},
+                       [_narrator_key(pk) for pk in unknown if pk not in found])
+        narrators.update(found)
+    return narrators
+
+
+def get_narrator(pk: int) -> Optional[Narrator]:
+    """Return the narrator with this id, or None."""
+    return get_narrators([pk]).get(pk)
+
+
+def get_hadith(pk: int) -> Optional[Hadith]:
+    """Return the hadith with this id (its MinHash signature deferred), or None."""
+    key = _hadith_key(pk, _generation('hadiths'))
+    hadith = cache.get(key)
+    if hadith is None:
+        hadith = Hadith.objects.defer('matn_signature').filter(pk=pk).first()
+        if hadith is None:
+            cache.set(key, _NOT_FOUND, LOOKUP_MISS_TIMEOUT)
+            return None
+        cache.set(key, hadith, LOOKUP_CACHE_TIMEOUT)
+    return hadith or None
+
+
+def _forget(keys) -> None:
+    # After the commit, so a read in the meantime does not cache the old row again
+    keys = list(keys)
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def _forget_all(kind: str) -> None:
+    transaction.on_commit(lambda: cache.set(_generation_key(kind), uuid.uuid4().hex[:8], LOOKUP_CACHE_TIMEOUT))
+
+
+def forget_narrator_names(normalized_names: Iterable[str]) -> None:
+    """Drop the cached lookups of these normalized names once the current transaction commits."""
+    names = {name for name in normalized_names if name}
+    if names:
+        generation = _generation('narrator-names')
+        _forget(_name_key(name, generation) for name in names)
+
+
+def forget_all_narrator_names() -> None:
+    """Drop every cached name lookup once the current transaction commits (for bulk writes)."""
+    _forget_all('narrator-names')
+
+
+def forget_narrators(pks: Iterable[int]) -> None:
+    """Drop the cached narrators once the current transaction commits."""
+    _forget(_narrator_key(pk) for pk in set(pks))
+
+
+def forget_hadiths(pks: Iterable[int]) -> None:
+    """Drop the cached hadiths once the current transaction commits."""
+    generation = _generation('hadiths')
+    _forget(_hadith_key(pk, generation) for pk in set(pks))
+
+
+def forget_all_hadiths() -> None:
+    """Drop every cached hadith once the current transaction commits (for bulk writes)."""
+    _forget_all('hadiths')
@@ -0,0 +1,248 @@
+import hashlib
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from django.db import transaction
+
+from ..models import Hadith, HadithMatnBand
+from .text_utils import normalize_arabic
+
+# MinHash/LSH parameters. 16 bands of 4 rows put the 50% candidate
+# probability at a Jaccard similarity of roughly 0.5.
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERMUTATIONS // LSH_BANDS
+SIMILARITY_THRESHOLD = 0.5
+
+# Mersenne prime 2**31 - 1 keeps a * x + b inside uint64 for 32-bit shingles
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.RandomState(20240101)
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=(NUM_PERMUTATIONS, 1)).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=(NUM_PERMUTATIONS, 1)).astype(np.uint64)
+
+# Upper bound on shingles hashed in one vectorized pass (memory ~ 8 * P * N bytes)
+MAX_SHINGLES_PER_BATCH = 100_000
+
+
+def matn_shingles(text: str) -> np.ndarray:
+    """
+    Hash the character shingles of a normalized matn.
+
+    Args:
+        text: The raw hadith text
+
+    Returns:
+        np.ndarray: Unique 32-bit shingle hashes (uint64 dtype)
+    """
+    normalized = normalize_arabic(text)
+    if not normalized:
+        return np.empty(0, dtype=np.uint64)
+    if len(normalized) <= SHINGLE_SIZE:
+        grams = {normalized}
+    else:
+        grams = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    return np.fromiter(
+        (zlib.crc32(g.encode('utf-8')) for g in grams),
+        dtype=np.uint64,
+        count=len(grams),
+    )
+
+
+def compute_signatures(texts: Sequence[str]) -> np.ndarray:
+    """
+    Compute MinHash signatures for a batch of texts.
+
+    All shingles of the batch are hashed under every permutation in one
+    numpy pass and reduced per document with ``np.minimum.reduceat``.
+
+    Args:
+        texts: The hadith texts
+
+    Returns:
+        np.ndarray: A ``(len(texts), NUM_PERMUTATIONS)`` uint32 array. Texts
+        without shingles get an all-max signature.
+    """
+    signatures = np.full((len(texts), NUM_PERMUTATIONS), _MAX_HASH, dtype=np.uint64)
+    shingle_sets = [matn_shingles(text) for text in texts]
+
+    start = 0
+    while start < len(texts):
+        # Grow the batch until it reaches the shingle budget
+        end, total = start, 0
+        while end < len(texts) and (end == start or total + len(shingle_sets[end]) <= MAX_SHINGLES_PER_BATCH):
+            total += len(shingle_sets[end])
+            end += 1
+
+        non_empty = [i for i in range(start, end) if len(shingle_sets[i])]
+        if non_empty:
+            lengths = np.array([len(shingle_sets[i]) for i in non_empty])
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            shingles = np.concatenate([shingle_sets[i] for i in non_empty])
+            hashed = (_PERM_A * shingles + _PERM_B) % _MERSENNE_PRIME
+            signatures[non_empty] = np.minimum.reduceat(hashed, offsets, axis=1).T
+        start = end
+
+    return signatures.astype(np.uint32)
+
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u4').tobytes()
+
+
+def signature_from_bytes(data: Optional[bytes]) -> Optional[np.ndarray]:
+    if not data:
+        return None
+    return np.frombuffer(bytes(data), dtype='<u4')
+
+
+def signature_bands(signature: np.ndarray) -> List[int]:
+    """
+    Split a signature into LSH band bucket keys.
+
+    Args:
+        signature: A MinHash signature
+
+    Returns:
+        list: One signed 64-bit bucket key per band, or an empty list for an
+        empty signature
+    """
+    if (signature == np.uint32(_MAX_HASH)).all():
+        return []
+    data = signature_to_bytes(signature)
+    width = LSH_ROWS * 4
+    return [
+        int.from_bytes(
+            hashlib.blake2b(data[band * width:(band + 1) * width], digest_size=8).digest(),
+            'big',
+            signed=True,
+        )
+        for band in range(LSH_BANDS)
+    ]
+
+
+def estimate_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two MinHash signatures."""
+    return float(np.mean(a == b))
+
+
+def update_hadith_matn_index(hadith: Hadith) -> None:
+    """
+    Recompute a single hadith's signature, LSH bands and cluster.
+
+    The hadith joins the cluster of its most similar LSH candidate, or starts
+    its own cluster when none passes ``SIMILARITY_THRESHOLD``. A cluster rooted
+    at the hadith is first handed to its lowest remaining member, so an edited
+    root does not keep variants its new text no longer matches.
+
+    Args:
+        hadith: A saved Hadith object
+    """
+    signature = compute_signatures([hadith.text])[0]
+    bands = signature_bands(signature)
+
+    with transaction.atomic():
+        members = Hadith.objects.filter(matn_cluster=hadith.pk).exclude(pk=hadith.pk)
+        new_root = members.order_by('pk').values_list('pk', flat=True).first()
+        if new_root is not None:
+            members.update(matn_cluster=new_root)
+
+        cluster = hadith.pk
+        if bands:
+            candidates = (
+                HadithMatnBand.objects
+                .filter(bucket__in=bands)
+                .exclude(hadith_id=hadith.pk)
+                .values_list('hadith_id', 'band', 'bucket')
+            )
+            candidate_ids = {hid for hid, band, bucket in candidates if bands[band] == bucket}
+            best = SIMILARITY_THRESHOLD
+            for other_id, other_cluster, data in Hadith.objects.filter(pk__in=candidate_ids).values_list(
+                    'id', 'matn_cluster', 'matn_signature'):
+                other = signature_from_bytes(data)
+                if other is None:
+                    continue
+                similarity = estimate_similarity(signature, other)
+                if similarity >= best:
+                    best = similarity
+                    cluster = other_cluster or other_id
+
+        Hadith.objects.filter(pk=hadith.pk).update(
+            matn_signature=signature_to_bytes(signature),
+            matn_cluster=cluster,
+        )
+        HadithMatnBand.objects.filter(hadith_id=hadith.pk).delete()
+        HadithMatnBand.objects.bulk_create([
+            HadithMatnBand(hadith_id=hadith.pk, band=band, bucket=bucket)
+            for band, bucket in enumerate(bands)
+        ])
+    hadith.matn_signature = signature_to_bytes(signature)
+    hadith.matn_cluster = cluster
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+
+    def find(self, x: int) -> int:
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            # Keep the smaller id as the root so cluster ids are stable
+            if ra < rb:
+                self.parent[rb] = ra
+            else:
+                self.parent[ra] = rb
+
+
+def cluster_matns(rows: Iterable[Tuple[int, str]], batch_size: int = 2000,
+                  threshold: float = SIMILARITY_THRESHOLD) -> Tuple[Dict[int, int], Dict[int, np.ndarray]]:
+    """
+    Cluster hadith texts into groups of variant wordings.
+
+    Hadiths sharing an LSH bucket are merged when their estimated similarity
+    to the bucket's first member reaches ``threshold``. The cluster id is the
+    smallest hadith id in the group.
+
+    Args:
+        rows: ``(hadith_id, text)`` pairs
+        batch_size: Number of texts per vectorized signature batch
+        threshold: Minimum estimated Jaccard similarity
+
+    Returns:
+        tuple: ``({hadith_id: cluster_id}, {hadith_id: signature})``
+    """
+    signatures: Dict[int, np.ndarray] = {}
+    buckets: Dict[Tuple[int, int], int] = {}
+    union_find = _UnionFind()
+
+    def process(batch: List[Tuple[int, str]]) -> None:
+        batch_signatures = compute_signatures([text for _, text in batch])
+        for (hadith_id, _), signature in zip(batch, batch_signatures):
+            signatures[hadith_id] = signature
+            for band, bucket in enumerate(signature_bands(signature)):
+                first = buckets.setdefault((band, bucket), hadith_id)
+                if first != hadith_id and estimate_similarity(signature, signatures[first]) >= threshold:
+                    union_find.union(first, hadith_id)
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            process(batch)
+            batch = []
+    if batch:
+        process(batch)
+
+    clusters = {hadith_id: union_find.find(hadith_id) for hadith_id in signatures}
+    return clusters, signatures
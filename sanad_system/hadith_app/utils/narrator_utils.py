@@ -0,0 +1,220 @@
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Sequence
+
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Case, Count, F, IntegerField, Value, When
+
+from ..models import Narrator, NarratorAlias, Sanad, SanadNarrator, SanadSegment
+from ..signals import narrators_changed, sanad_chain_changed
+from .lookup_utils import forget_all_narrator_names
+from .sanad_utils import build_sanad_segments, fold_duplicate_sanads
+from .stats_utils import apply_counter_deltas, counter_deltas, narrator_counters
+
+# Ids per statement; keeps every IN (...) list under SQLite's parameter limit
+MERGE_BATCH_SIZE = 500
+
+# Narrator fields copied from a merged narrator when the target has no value
+FILLABLE_FIELDS = ('birth_year', 'death_year', 'biography')
+
+
+def _batches(items: Sequence, size: int = MERGE_BATCH_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _repoint(queryset, field: str, mapping: Dict[int, int]) -> int:
+    """Re-point ``field`` from merged narrators to their targets in one UPDATE."""
+    targets = set(mapping.values())
+    if len(targets) == 1:
+        value = Value(targets.pop())
+    else:
+        value = Case(
+            *[When(**{field: source}, then=Value(target)) for source, target in mapping.items()],
+            output_field=IntegerField(),
+        )
+    return queryset.filter(**{f'{field}__in': list(mapping)}).update(**{field: value})
+
+
+def find_duplicate_narrators() -> Dict[int, List[int]]:
+    """
+    Group narrators whose names normalize to the same form.
+
+    Returns:
+        dict: ``{target_id: [duplicate ids]}`` with the oldest narrator as target
+    """
+    duplicated = (
+        Narrator.objects.exclude(normalized_name='')
+        .values('normalized_name')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+        .values('normalized_name')
+    )
+    groups: Dict[str, List[int]] = {}
+    for pk, normalized_name in (Narrator.objects.filter(normalized_name__in=duplicated)
+                                .order_by('normalized_name', 'pk')
+                                .values_list('pk', 'normalized_name')):
+        groups.setdefault(normalized_name, []).append(pk)
+    return {ids[0]: ids[1:] for ids in groups.values()}
+
+
+def collapse_repeated_links(sanad_ids: Sequence[int]) -> Dict[int, List[int]]:
+    """
+    Remove back-to-back links to the same narrator and close the order gaps.
+
+    Orders are rewritten in two phases (negated, then flipped back) so no
+    intermediate state violates the unique ``(sanad, order)`` constraint.
+
+    Returns:
+        dict: The resulting chains ``{sanad_id: [narrator ids]}``
+    """
+    chains: Dict[int, List[int]] = {}
+    to_delete, to_renumber = [], []
+    previous_sanad = previous_narrator = None
+    for link in (SanadNarrator.objects.filter(sanad_id__in=sanad_ids)
+                 .order_by('sanad_id', 'order')
+                 .only('id', 'sanad_id', 'narrator_id', 'order')):
+        if link.sanad_id == previous_sanad and link.narrator_id == previous_narrator:
+            to_delete.append(link.pk)
+            continue
+        previous_sanad, previous_narrator = link.sanad_id, link.narrator_id
+        chain = chains.setdefault(link.sanad_id, [])
+        chain.append(link.narrator_id)
+        if link.order != len(chain):
+            link.order = -len(chain)
+            to_renumber.append(link)
+
+    if to_delete:
+        SanadNarrator.objects.filter(pk__in=to_delete).delete()
+    if to_renumber:
+        SanadNarrator.objects.bulk_update(to_renumber, ['order'], batch_size=MERGE_BATCH_SIZE)
+        SanadNarrator.objects.filter(pk__in=[link.pk for link in to_renumber]).update(order=-F('order'))
+    return chains
+
+
+def merge_narrator_groups(groups: Mapping[int, Iterable[int]]) -> Counter:
+    """
+    Merge groups of duplicate narrators, each into its target narrator.
+
+    All groups are merged in one transaction. Chain links are re-pointed with
+    one UPDATE per batch of merged narrators, links that became back-to-back
+    repeats are collapsed, the fingerprints and segment index of the touched
+    asanid are rebuilt and asanid that became identical are folded together.
+    The merged names are kept as aliases of the target, then the merged
+    narrators are deleted.
+
+    Args:
+        groups: ``{target_id: [merged narrator ids]}``
+
+    Returns:
+        Counter: Merge statistics
+
+    Raises:
+        ValueError: If a narrator is both a target and merged, is merged into
+            two targets, or does not exist
+    """
+    mapping: Dict[int, int] = {}
+    for target_id, source_ids in groups.items():
+        for source_id in source_ids:
+            if source_id == target_id:
+                continue
+            if source_id in groups or mapping.setdefault(source_id, target_id) != target_id:
+                raise ValueError(f'Narrator {source_id} cannot be merged into two narrators')
+    stats = Counter()
+    if not mapping:
+        return stats
+
+    source_ids = sorted(mapping)
+    with transaction.atomic():
+        narrators = Narrator.objects.in_bulk(source_ids + sorted(set(mapping.values())))
+        missing = (set(mapping) | set(mapping.values())) - set(narrators)
+        if missing:
+            raise ValueError(f'Unknown narrator ids: {sorted(missing)}')
+
+        sanad_ids = set()
+        for batch in _batches(source_ids):
+            sanad_ids.update(SanadNarrator.objects.filter(narrator_id__in=batch).values_list('sanad_id', flat=True))
+            batch_mapping = {source_id: mapping[source_id] for source_id in batch}
+            stats['links_repointed'] += _repoint(SanadNarrator.objects.all(), 'narrator_id', batch_mapping)
+            _repoint(NarratorAlias.objects.all(), 'narrator_id', batch_mapping)
+
+        hadith_ids = set()
+        for batch in _batches(sorted(sanad_ids)):
+            before = SanadNarrator.objects.filter(sanad_id__in=batch).count()
+            chains = collapse_repeated_links(batch)
+            stats['links_collapsed'] += before - sum(len(chain) for chain in chains.values())
+            SanadSegment.objects.filter(sanad_id__in=batch).delete()
+            sanad_hadiths = dict(Sanad.objects.filter(pk__in=batch).values_list('pk', 'hadith_id'))
+            # The chains now show other narrators; lets cached pages see the change
+            Sanad.objects.filter(pk__in=batch).update(updated_at=timezone.now())
+            sanad_chain_changed.send(sender=Sanad, sanad_ids=batch)
+            SanadSegment.objects.bulk_create([
+                segment
+                for sanad_id, chain in chains.items()
+                for segment in build_sanad_segments(sanad_id, sanad_hadiths[sanad_id], chain)
+            ], batch_size=5000)
+            hadith_ids.update(sanad_hadiths.values())
+
+        for batch in _batches(sorted(hadith_ids)):
+            merged, _ = fold_duplicate_sanads(batch)
+            stats['sanads_merged'] += merged
+
+        # Keep the merged spellings and fill the targets' missing details
+        aliases, updated_targets = [], {}
+        targets_before = {
+            target_id: narrator_counters(narrators[target_id].reliability, narrators[target_id].birth_year,
+                                         narrators[target_id].death_year)
+            for target_id in set(mapping.values())
+        }
+        for source_id in source_ids:
+            source, target = narrators[source_id], narrators[mapping[source_id]]
+            if source.normalized_name and source.normalized_name != target.normalized_name:
+                aliases.append(NarratorAlias(
+                    narrator_id=target.pk,
+                    name=source.name,
+                    normalized_name=source.normalized_name,
+                ))
+            for field in FILLABLE_FIELDS:
+                if getattr(target, field) in (None, '') and getattr(source, field) not in (None, ''):
+                    setattr(target, field, getattr(source, field))
+                    updated_targets[target.pk] = target
+            if target.reliability == 'unknown' and source.reliability != 'unknown':
+                target.reliability = source.reliability
+                updated_targets[target.pk] = target
+        NarratorAlias.objects.bulk_create(aliases, ignore_conflicts=True)
+        # The re-pointed and new aliases bypass the signal handlers
+        forget_all_narrator_names()
+        stats['aliases_recorded'] = len(aliases)
+        # Every target gained links or aliases; lets cached pages see the change
+        targets, now = [narrators[target_id] for target_id in targets_before], timezone.now()
+        for target in targets:
+            target.updated_at = now
+        Narrator.objects.bulk_update(targets, [*FILLABLE_FIELDS, 'reliability', 'updated_at'],
+                                     batch_size=MERGE_BATCH_SIZE)
+        narrators_changed.send(sender=Narrator, narrator_ids=[target.pk for target in targets])
+        # bulk_update bypasses the signal handlers that keep the site statistics
+        apply_counter_deltas(counter_deltas(
+            [narrator_counters(target.reliability, target.birth_year, target.death_year)
+             for target in updated_targets.values()],
+            [targets_before[target_id] for target_id in updated_targets],
+        ))
+
+        for batch in _batches(source_ids):
+            Narrator.objects.filter(pk__in=batch).delete()
+        stats['narrators_merged'] = len(source_ids)
+    return stats
+
+
+def merge_narrators(target, narrators: Iterable) -> Counter:
+    """
+    Merge narrators into ``target``.
+
+    Args:
+        target: The Narrator (or id) that is kept
+        narrators: The Narrator objects (or ids) merged into it
+
+    Returns:
+        Counter: Merge statistics (see ``merge_narrator_groups``)
+    """
+    target_id = getattr(target, 'pk', target)
+    return merge_narrator_groups({target_id: [getattr(narrator, 'pk', narrator) for narrator in narrators]})
@@ -1,26 +1,136 @@
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from ..models import Sanad, Narrator, SanadNarrator
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+from ..models import Hadith, Sanad, Narrator, SanadNarrator, SanadSegment
+from ..signals import sanad_chain_changed
+from .lookup_utils import get_narrator_ids, remember_narrator_ids
+from .stats_utils import apply_counter_deltas, counter_deltas, narrator_counters
+from .text_utils import ARABIC_DIACRITICS_RE, normalize_arabic
+import hashlib
 import re
 
-def parse_sanad_chain(sanad_text: str, sanad: Sanad) -> None:
+# Longest contiguous sub-chain stored in the segment index
+SEGMENT_MAX_LENGTH = getattr(settings, 'SANAD_SEGMENT_MAX_LENGTH', 5)
+
+# Transmission terms, as listed in the SanadNarrator.narration_method help text
+TRANSMISSION_TERMS = (
+    'حدثنا', 'حدثني', 'أخبرنا', 'أخبرني', 'أنبأنا', 'أنبأني', 'سمعت', 'سمع', 'عن',
+)
+TRANSMISSION_TERM_RE = re.compile(
+    r'(?<![\w])(' + '|'.join(TRANSMISSION_TERMS) + r')(?![\w])'
+)
+# One pass over a chain: a captured group is a transmission term, an
+# uncaptured match is a separator (newline, Arabic/Latin comma, semicolon)
+CHAIN_TOKEN_RE = re.compile(TRANSMISSION_TERM_RE.pattern + r'|[\n\r،,؛;]+')
+LIST_MARKER_RE = re.compile(r'^\s*(?:[0-9٠-٩]+\s*[-–—.)]|[-*•])\s*')
+NAME_TRIM_RE = re.compile(r'^[\s،,:؛;.«»"]+|[\s،,:؛;.«»"]+$')
+TRAILING_QAL_RE = re.compile(r'\s+(?:قال|قالت|يقول|أنه|أنها)$')
+EULOGY_RE = re.compile(r'\s*(?:رضي الله عن\w*|رحمه الله|عليه السلام)')
+
+AUTO_NARRATOR_BIOGRAPHY = 'تمت إضافة الراوي تلقائياً من خلال إدخال حديث جديد'
+
+
+def clean_narrator_name(name: str) -> str:
+    """Strip list markers, eulogies, punctuation and a trailing "qala" from a name."""
+    name = EULOGY_RE.sub('', LIST_MARKER_RE.sub('', name))
+    name = NAME_TRIM_RE.sub('', name)
+    # The leading space lets a lone "qala" between separators vanish too
+    name = TRAILING_QAL_RE.sub('', ' ' + name)
+    return NAME_TRIM_RE.sub('', name)[:100]
+
+
+def parse_sanad_chain(sanad_text: str, leading_name: bool = True) -> List[Tuple[str, Optional[str]]]:
     """
-    Parse a sanad chain text and create related narrator objects.
-    
+    Parse a sanad chain text into ``(narrator_name, narration_method)`` links.
+
+    Names may be separated by newlines, Arabic or Latin commas, semicolons
+    or transmission terms, in any mix, e.g. ``"حدثنا مالك، عن نافع عن ابن عمر"``.
+    The term preceding a name is recorded as its narration method.
+
     Args:
         sanad_text: The text containing the sanad chain
-        sanad: The Sanad object to associate narrators with
+        leading_name: Whether text before the first transmission term is a
+            narrator name (False for isnads cut out of running text)
+
+    Returns:
+        list: Links in chain order (compiler first)
     """
-    # Split the text into individual narrator names
-    narrator_names = re.split(r'[\n\r]+', sanad_text.strip())
-    
-    # Create or get narrator objects and add them to the sanad
-    for position, name in enumerate(narrator_names, start=1):
-        narrator, created = Narrator.objects.get_or_create(name=name.strip())
-        SanadNarrator.objects.create(
-            sanad=sanad,
-            narrator=narrator,
-            position=position
-        )
+    parts = CHAIN_TOKEN_RE.split(ARABIC_DIACRITICS_RE.sub('', sanad_text or ''))
+    links = []
+    method = None
+    # parts = [name, term-or-None, name, term-or-None, ...]
+    for index, part in enumerate(parts):
+        if index % 2:
+            method = part
+            continue
+        if index == 0 and not leading_name:
+            continue
+        name = clean_narrator_name(part)
+        if name and normalize_arabic(name):
+            links.append((name, method))
+        method = None
+    return links
+
+
+def resolve_narrator_names(names: Sequence[str],
+                           biography: Optional[str] = AUTO_NARRATOR_BIOGRAPHY) -> List[int]:
+    """
+    Resolve narrator names to ids, creating the missing narrators.
+
+    Names are matched on their normalized form through the lookup cache
+    (see ``lookup_utils``), so a chain of known narrators runs no query;
+    uncached names are matched with a single query (plus one on
+    merged-narrator aliases if some are unmatched) and all missing
+    narrators are created with one bulk insert.
+
+    Args:
+        names: Narrator names in chain order
+        biography: Biography recorded on created narrators
+
+    Returns:
+        list: Narrator ids in the order of ``names``
+    """
+    keys = [normalize_arabic(name)[:100] for name in names]
+    # A cached miss may be stale; it is checked again before creating a narrator
+    ids = get_narrator_ids(keys, cached_misses=False)
+    missing = {}
+    for name, key in zip(names, keys):
+        if key not in ids:
+            missing.setdefault(key, name[:100])
+    if missing:
+        created = Narrator.objects.bulk_create([
+            Narrator(name=name, normalized_name=key, reliability='unknown', biography=biography)
+            for key, name in missing.items()
+        ])
+        created_ids = {narrator.normalized_name: narrator.pk for narrator in created}
+        ids.update(created_ids)
+        remember_narrator_ids(created_ids)
+        apply_counter_deltas(counter_deltas([narrator_counters('unknown', None, None)] * len(created)))
+    return [ids[key] for key in keys]
+
+
+def create_sanad_from_text(hadith, sanad_text: str, **fields) -> Tuple[Optional[Sanad], bool]:
+    """
+    Parse a sanad chain text and save it as a sanad of the hadith.
+
+    Args:
+        hadith: The Hadith object (or id)
+        sanad_text: The text containing the sanad chain
+        **fields: Extra Sanad field values (is_mutawatir, notes)
+
+    Returns:
+        tuple: ``(sanad, created)`` as returned by ``create_sanad``, or
+        ``(None, False)`` when the text contains no narrator
+    """
+    links = parse_sanad_chain(sanad_text)
+    if not links:
+        return None, False
+    narrator_ids = resolve_narrator_names([name for name, _ in links])
+    return create_sanad(hadith, narrator_ids, [method for _, method in links], **fields)
+
 
 def validate_sanad_chain(sanad_text: str) -> None:
     """
@@ -35,15 +145,10 @@ def validate_sanad_chain(sanad_text: str) -> None:
     if not sanad_text.strip():
         raise ValidationError(_('Sanad chain cannot be empty'))
     
-    narrator_names = re.split(r'[\n\r]+', sanad_text.strip())
-    if len(narrator_names) < 2:
+    if len(parse_sanad_chain(sanad_text)) < 2:
         raise ValidationError(_(
             'Sanad chain must contain at least two narrators'
         ))
-    
-    # Check for empty narrator names
-    if any(not name.strip() for name in narrator_names):
-        raise ValidationError(_('Narrator names cannot be empty'))
 
 def get_sanad_chain_text(sanad: Sanad) -> str:
     """
@@ -55,7 +160,7 @@ def get_sanad_chain_text(sanad: Sanad) -> str:
     Returns:
         str: Formatted sanad chain text
     """
-    narrators = sanad.narrators.all().order_by('position')
+    narrators = sanad.narrators.all().order_by('sanadnarrator__order')
     return '\n'.join(narrator.name for narrator in narrators)
 
 def get_sanad_chain_length(sanad: Sanad) -> int:
@@ -69,3 +174,307 @@ def get_sanad_chain_length(sanad: Sanad) -> int:
         int: Number of narrators in the chain
     """
     return sanad.narrators.count()
+
+def chain_fingerprint(narrator_ids: Iterable[int]) -> str:
+    """
+    Compute the canonical fingerprint of a sanad chain.
+
+    Args:
+        narrator_ids: Narrator ids in chain order
+
+    Returns:
+        str: SHA-1 hex digest of the ordered ids, or an empty string for an
+        empty chain
+    """
+    key = '-'.join(str(narrator_id) for narrator_id in narrator_ids)
+    if not key:
+        return ''
+    return hashlib.sha1(key.encode('ascii')).hexdigest()
+
+
+def get_chain_narrator_ids(sanad_id: int) -> List[int]:
+    """Return the narrator ids of a sanad in chain order."""
+    return list(
+        SanadNarrator.objects.filter(sanad_id=sanad_id)
+        .order_by('order')
+        .values_list('narrator_id', flat=True)
+    )
+
+
+def find_duplicate_sanad(hadith_id: int, narrator_ids: Sequence[int],
+                         exclude_id: Optional[int] = None) -> Optional[Sanad]:
+    """
+    Find an existing sanad of the hadith with the same ordered chain.
+
+    This is a single lookup on the (hadith, chain_fingerprint) unique index.
+    """
+    fingerprint = chain_fingerprint(narrator_ids)
+    if not fingerprint:
+        return None
+    queryset = Sanad.objects.filter(hadith_id=hadith_id, chain_fingerprint=fingerprint)
+    if exclude_id is not None:
+        queryset = queryset.exclude(pk=exclude_id)
+    return queryset.first()
+
+
+def segment_key(narrator_ids: Sequence[int]) -> int:
+    """Hash an ordered run of narrator ids into a signed 64-bit index key."""
+    data = '-'.join(str(narrator_id) for narrator_id in narrator_ids).encode('ascii')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True)
+
+
+def chain_segments(narrator_ids: Sequence[int],
+                   max_length: int = SEGMENT_MAX_LENGTH) -> Iterator[Tuple[int, int, int]]:
+    """
+    Enumerate the contiguous sub-chains of a chain.
+
+    Args:
+        narrator_ids: Narrator ids in chain order
+        max_length: Longest sub-chain to index
+
+    Yields:
+        tuple: ``(start, length, key)`` for every run of 2..max_length narrators
+    """
+    for length in range(2, min(max_length, len(narrator_ids)) + 1):
+        for start in range(len(narrator_ids) - length + 1):
+            yield start, length, segment_key(narrator_ids[start:start + length])
+
+
+def build_sanad_segments(sanad_id: int, hadith_id: int, narrator_ids: Sequence[int]) -> List[SanadSegment]:
+    """Build (unsaved) SanadSegment rows for a chain."""
+    return [
+        SanadSegment(sanad_id=sanad_id, hadith_id=hadith_id, start=start, length=length, key=key)
+        for start, length, key in chain_segments(narrator_ids)
+    ]
+
+
+def sync_sanad_chain(sanad: Sanad, narrator_ids: Optional[Sequence[int]] = None) -> None:
+    """
+    Refresh the derived chain data of a sanad after its narrators changed.
+
+    Updates the chain fingerprint, rebuilds the sub-chain segment index and
+    invalidates the cached timeline (``sanad_chain_changed``).
+
+    Args:
+        sanad: The Sanad object
+        narrator_ids: The ordered narrator ids if already known, to save a query
+    """
+    if narrator_ids is None:
+        narrator_ids = get_chain_narrator_ids(sanad.pk)
+    sanad.chain_fingerprint = chain_fingerprint(narrator_ids)
+    sanad.updated_at = timezone.now()
+    with transaction.atomic():
+        Sanad.objects.filter(pk=sanad.pk).update(
+            chain_fingerprint=sanad.chain_fingerprint,
+            updated_at=sanad.updated_at,
+        )
+        SanadSegment.objects.filter(sanad_id=sanad.pk).delete()
+        SanadSegment.objects.bulk_create(build_sanad_segments(sanad.pk, sanad.hadith_id, narrator_ids))
+    sanad_chain_changed.send(sender=Sanad, sanad_ids=[sanad.pk])
+
+
+def resync_sanad_chains(sanad_ids: Iterable[int]) -> int:
+    """
+    Refresh the derived chain data of asanid that lost chain links.
+
+    A sanad whose remaining chain now matches another sanad of the same
+    hadith is folded into the oldest of them (see ``fold_duplicate_sanads``)
+    rather than violating the unique chain constraint.
+
+    Args:
+        sanad_ids: The asanid whose links were deleted
+
+    Returns:
+        int: Number of asanid folded into another
+    """
+    sanad_ids = set(sanad_ids)
+    hadith_ids = sorted(set(Sanad.objects.filter(pk__in=sanad_ids).values_list('hadith_id', flat=True)))
+    if not hadith_ids:
+        return 0
+    with transaction.atomic():
+        merged, _ = fold_duplicate_sanads(hadith_ids)
+        for sanad in Sanad.objects.filter(pk__in=sanad_ids):
+            sync_sanad_chain(sanad)
+    return merged
+
+
+def set_sanad_chain(sanad: Sanad, narrator_ids: Sequence[int],
+                    methods: Optional[Sequence[Optional[str]]] = None) -> None:
+    """
+    Replace the narrators of a saved sanad with the given ordered chain.
+
+    Raises:
+        IntegrityError: If another sanad of the same hadith has this chain
+    """
+    methods = methods or [None] * len(narrator_ids)
+    with transaction.atomic():
+        SanadNarrator.objects.filter(sanad=sanad).delete()
+        SanadNarrator.objects.bulk_create([
+            SanadNarrator(sanad=sanad, narrator_id=narrator_id, order=order, narration_method=method)
+            for order, (narrator_id, method) in enumerate(zip(narrator_ids, methods), start=1)
+        ])
+        sync_sanad_chain(sanad, narrator_ids)
+
+
+def create_sanad(hadith, narrator_ids: Sequence[int],
+                 methods: Optional[Sequence[Optional[str]]] = None,
+                 **fields) -> Tuple[Sanad, bool]:
+    """
+    Create a sanad with its ordered chain unless the hadith already has it.
+
+    Args:
+        hadith: The Hadith object (or id) the sanad belongs to
+        narrator_ids: Narrator ids in chain order
+        methods: Optional narration method per link
+        **fields: Extra Sanad field values (is_mutawatir, notes)
+
+    Returns:
+        tuple: ``(sanad, created)``; ``created`` is False when an identical
+        chain already exists for the hadith
+    """
+    hadith_id = getattr(hadith, 'pk', hadith)
+    existing = find_duplicate_sanad(hadith_id, narrator_ids)
+    if existing:
+        return existing, False
+
+    methods = methods or [None] * len(narrator_ids)
+    try:
+        with transaction.atomic():
+            sanad = Sanad.objects.create(
+                hadith_id=hadith_id,
+                chain_fingerprint=chain_fingerprint(narrator_ids),
+                **fields
+            )
+            SanadNarrator.objects.bulk_create([
+                SanadNarrator(sanad=sanad, narrator_id=narrator_id, order=order, narration_method=method)
+                for order, (narrator_id, method) in enumerate(zip(narrator_ids, methods), start=1)
+            ])
+            SanadSegment.objects.bulk_create(build_sanad_segments(sanad.pk, hadith_id, narrator_ids))
+    except IntegrityError:
+        # A concurrent request inserted the same chain first
+        existing = find_duplicate_sanad(hadith_id, narrator_ids)
+        if existing is None:
+            raise
+        return existing, False
+    return sanad, True
+
+
+def _subchain_lookup(narrator_ids: Sequence[int]):
+    """Segment rows matching the chain, keyed on its longest indexed prefix."""
+    narrator_ids = list(narrator_ids)
+    if len(narrator_ids) < 2:
+        raise ValueError('A sub-chain needs at least two narrators')
+    return SanadSegment.objects.filter(key=segment_key(narrator_ids[:SEGMENT_MAX_LENGTH]))
+
+
+def _contains_run(chain: Sequence[int], run: Sequence[int]) -> bool:
+    size = len(run)
+    return any(list(chain[i:i + size]) == list(run) for i in range(len(chain) - size + 1))
+
+
+def find_sanads_by_subchain(narrator_ids: Sequence[int]):
+    """
+    Find the asanid transmitted through an ordered run of narrators.
+
+    Chains up to ``SEGMENT_MAX_LENGTH`` narrators are answered from a single
+    lookup on the segment key index. Longer chains use the index for their
+    first window and verify the remaining links on the candidates.
+
+    Args:
+        narrator_ids: Narrator ids in chain order, e.g. Malik, Nafi, Ibn Umar
+
+    Returns:
+        QuerySet: Matching Sanad objects
+    """
+    segments = _subchain_lookup(narrator_ids)
+    if len(narrator_ids) <= SEGMENT_MAX_LENGTH:
+        return Sanad.objects.filter(pk__in=segments.values('sanad_id'))
+
+    candidate_ids = set(segments.values_list('sanad_id', flat=True))
+    chains = {}
+    for sanad_id, narrator_id in (SanadNarrator.objects.filter(sanad_id__in=candidate_ids)
+                                  .order_by('sanad_id', 'order').values_list('sanad_id', 'narrator_id')):
+        chains.setdefault(sanad_id, []).append(narrator_id)
+    matching = [sanad_id for sanad_id, chain in chains.items() if _contains_run(chain, narrator_ids)]
+    return Sanad.objects.filter(pk__in=matching)
+
+
+def find_hadiths_by_subchain(narrator_ids: Sequence[int]):
+    """
+    Find the hadiths with at least one sanad through an ordered run of narrators.
+
+    Args:
+        narrator_ids: Narrator ids in chain order
+
+    Returns:
+        QuerySet: Matching Hadith objects
+    """
+    if len(narrator_ids) <= SEGMENT_MAX_LENGTH:
+        return Hadith.objects.filter(pk__in=_subchain_lookup(narrator_ids).values('hadith_id'))
+    return Hadith.objects.filter(pk__in=find_sanads_by_subchain(narrator_ids).values('hadith_id'))
+
+
+def fold_duplicate_sanads(hadith_ids: Sequence[int], dry_run: bool = False) -> Tuple[int, int]:
+    """
+    Refresh the chain fingerprints of the hadiths' asanid and merge duplicates.
+
+    A duplicate is folded into the oldest sanad with the same chain: its
+    ``is_mutawatir`` flag and notes are kept, then it is deleted.
+
+    Args:
+        hadith_ids: The hadiths to process (call inside a transaction)
+        dry_run: Only count, without changing the database
+
+    Returns:
+        tuple: ``(merged, updated)`` numbers of deleted and updated asanid
+    """
+    sanads = list(
+        Sanad.objects.filter(hadith_id__in=hadith_ids)
+        .order_by('hadith_id', 'pk')
+        .only('id', 'hadith_id', 'is_mutawatir', 'notes', 'chain_fingerprint')
+    )
+    chains = {}
+    for sanad_id, narrator_id in (
+            SanadNarrator.objects.filter(sanad__hadith_id__in=hadith_ids)
+            .order_by('sanad_id', 'order')
+            .values_list('sanad_id', 'narrator_id')):
+        chains.setdefault(sanad_id, []).append(narrator_id)
+
+    keepers = {}
+    to_update = {}
+    to_delete = []
+    for sanad in sanads:
+        fingerprint = chain_fingerprint(chains.get(sanad.pk, []))
+        if not fingerprint:
+            continue
+        keeper = keepers.get((sanad.hadith_id, fingerprint))
+        if keeper is None:
+            keepers[(sanad.hadith_id, fingerprint)] = sanad
+            if sanad.chain_fingerprint != fingerprint:
+                sanad.chain_fingerprint = fingerprint
+                to_update[sanad.pk] = sanad
+            continue
+
+        # Fold the duplicate into the oldest sanad with the same chain
+        to_delete.append(sanad.pk)
+        if sanad.is_mutawatir and not keeper.is_mutawatir:
+            keeper.is_mutawatir = True
+            to_update[keeper.pk] = keeper
+        if sanad.notes and sanad.notes not in (keeper.notes or ''):
+            keeper.notes = f'{keeper.notes}\n{sanad.notes}' if keeper.notes else sanad.notes
+            to_update[keeper.pk] = keeper
+
+    if not dry_run:
+        Sanad.objects.filter(pk__in=to_delete).delete()
+        # Clear first so fingerprints can move between asanid without a
+        # transient unique constraint violation
+        Sanad.objects.filter(pk__in=list(to_update)).update(chain_fingerprint='')
+        now = timezone.now()
+        for sanad in to_update.values():
+            sanad.updated_at = now
+        Sanad.objects.bulk_update(
+            to_update.values(), ['chain_fingerprint', 'is_mutawatir', 'notes', 'updated_at'], batch_size=500
+        )
+        if to_update:
+            sanad_chain_changed.send(sender=Sanad, sanad_ids=list(to_update))
+    return len(to_delete), len(to_update)
@@ -0,0 +1,188 @@
+from collections import Counter
+from datetime import timedelta
+from typing import Dict, Iterable, Mapping, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import Length
+from django.utils import timezone
+
+from ..models import Hadith, Narrator, StatsCounter
+
+# Counters last recomputed longer ago than this (seconds) are reconciled in the background
+STATS_RECONCILE_INTERVAL = getattr(settings, 'STATS_RECONCILE_INTERVAL', 60 * 60)
+
+RECONCILE_JOB = 'hadith_app.reconcile_stats'
+
+HADITH_GRADES = Hadith._meta.get_field('grade').choices
+NARRATOR_RELIABILITIES = Narrator._meta.get_field('reliability').choices
+
+
+def hadith_counters(grade: Optional[str], text_length: int) -> Counter:
+    """Return what one hadith adds to the counters."""
+    return Counter({'hadiths': 1, f'hadiths:grade:{grade or ""}': 1, 'hadiths:text_length': text_length})
+
+
+def narrator_counters(reliability: str, birth_year: Optional[int], death_year: Optional[int]) -> Counter:
+    """Return what one narrator adds to the counters."""
+    counters = Counter({'narrators': 1, f'narrators:reliability:{reliability}': 1})
+    if birth_year is not None and death_year is not None:
+        counters.update({'narrators:lifespan_total': death_year - birth_year, 'narrators:lifespan_count': 1})
+    return counters
+
+
+def counter_deltas(after: Iterable[Counter] = (), before: Iterable[Counter] = ()) -> Counter:
+    """Return the change from the ``before`` contributions to the ``after`` ones (negative values kept)."""
+    deltas = Counter()
+    for counters in after:
+        deltas.update(counters)
+    for counters in before:
+        deltas.subtract(counters)
+    return deltas
+
+
+def apply_counter_deltas(deltas: Mapping[str, int]) -> None:
+    """
+    Add ``deltas`` to the counters with one UPDATE.
+
+    The UPDATE is part of the current transaction, so the counters roll back
+    with the change they describe. Counters without a row yet are created by
+    the next ``reconcile_stats``.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    StatsCounter.objects.filter(name__in=deltas).update(value=F('value') + Case(
+        *[When(name=name, then=Value(delta)) for name, delta in deltas.items()],
+        default=Value(0),
+        output_field=BigIntegerField(),
+    ))
+
+
+def compute_counters() -> Counter:
+    """Compute every counter from the tables (three aggregate queries)."""
+    counters = Counter({name: 0 for name in (
+        'hadiths', 'hadiths:text_length', 'hadiths:grade:',
+        *(f'hadiths:grade:{grade}' for grade, _ in HADITH_GRADES),
+        'narrators', 'narrators:lifespan_total', 'narrators:lifespan_count',
+        *(f'narrators:reliability:{reliability}' for reliability, _ in NARRATOR_RELIABILITIES),
+        'users',
+    )})
+    for row in (Hadith.objects.order_by().values('grade')
+                .annotate(count=Count('pk'), text_length=Sum(Length('text')))):
+        counters['hadiths'] += row['count']
+        counters[f'hadiths:grade:{row["grade"] or ""}'] += row['count']
+        counters['hadiths:text_length'] += row['text_length'] or 0
+    known = Q(birth_year__isnull=False, death_year__isnull=False)
+    for row in (Narrator.objects.order_by().values('reliability')
+                .annotate(count=Count('pk'),
+                          lifespan_total=Sum(F('death_year') - F('birth_year'), filter=known),
+                          lifespan_count=Count('pk', filter=known))):
+        counters['narrators'] += row['count']
+        counters[f'narrators:reliability:{row["reliability"]}'] += row['count']
+        counters['narrators:lifespan_total'] += row['lifespan_total'] or 0
+        counters['narrators:lifespan_count'] += row['lifespan_count']
+    counters['users'] = User.objects.count()
+    return counters
+
+
+def reconcile_stats() -> Dict[str, int]:
+    """
+    Recompute every counter from the tables.
+
+    Corrects the drift left by writes that bypass the signal handlers
+    (bulk imports, raw SQL). The counter rows are updated first, which
+    locks them (or, on SQLite, the database) until the new values are
+    written, so increments from concurrent saves wait and apply on top of
+    the recomputed values instead of being overwritten.
+
+    Returns:
+        dict: The counters
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        StatsCounter.objects.update(reconciled_at=now)
+        counters = compute_counters()
+        existing = list(StatsCounter.objects.all())
+        for counter in existing:
+            counter.value = counters.get(counter.name, 0)
+        StatsCounter.objects.bulk_update(existing, ['value'])
+        known = {counter.name for counter in existing}
+        StatsCounter.objects.bulk_create([
+            StatsCounter(name=name, value=value, reconciled_at=now)
+            for name, value in counters.items() if name not in known
+        ], ignore_conflicts=True)
+    return dict(counters)
+
+
+def schedule_stats_reconciliation() -> None:
+    """Queue a background reconciliation unless one is already queued or running."""
+    from ..jobs import enqueue, find_active_job
+    if find_active_job(RECONCILE_JOB) is None:
+        enqueue(RECONCILE_JOB)
+
+
+def read_counters():
+    """
+    Return the counters and when they were last reconciled, with one query.
+
+    The counters are computed synchronously the first time; afterwards a
+    background reconciliation is queued whenever the last one is older than
+    ``STATS_RECONCILE_INTERVAL``.
+    """
+    rows = list(StatsCounter.objects.values_list('name', 'value', 'reconciled_at'))
+    if not rows:
+        return reconcile_stats(), timezone.now()
+    reconciled_at = min((reconciled for _, _, reconciled in rows if reconciled), default=None)
+    if reconciled_at is None or timezone.now() - reconciled_at > timedelta(seconds=STATS_RECONCILE_INTERVAL):
+        schedule_stats_reconciliation()
+    return {name: value for name, value, _ in rows}, reconciled_at
+
+
+def _average(total: int, count: int, digits: Optional[int] = None):
+    return round(total / count, digits) if count else None
+
+
+def get_site_stats() -> Dict:
+    """Return the statistics shown on the home page and the admin dashboard."""
+    counters, reconciled_at = read_counters()
+    return {
+        'hadith_count': counters.get('hadiths', 0),
+        'narrator_count': counters.get('narrators', 0),
+        'user_count': counters.get('users', 0),
+        'hadiths_by_grade': [
+            (label, counters.get(f'hadiths:grade:{grade}', 0))
+            for grade, label in [*HADITH_GRADES, ('', 'غير محدد')]
+        ],
+        'narrators_by_reliability': [
+            (label, counters.get(f'narrators:reliability:{reliability}', 0))
+            for reliability, label in NARRATOR_RELIABILITIES
+        ],
+        'average_hadith_length': _average(counters.get('hadiths:text_length', 0), counters.get('hadiths', 0)),
+        'average_lifespan': _average(counters.get('narrators:lifespan_total', 0),
+                                     counters.get('narrators:lifespan_count', 0), 1),
+        'reconciled_at': reconciled_at,
+    }
+
+
+def get_hadith_stats() -> Dict:
+    """Get statistics about hadiths in the system"""
+    counters, _ = read_counters()
+    return {
+        'total_hadiths': counters.get('hadiths', 0),
+        'verified_hadiths': counters.get('hadiths:grade:sahih', 0),
+        'average_hadith_length': _average(counters.get('hadiths:text_length', 0), counters.get('hadiths', 0)),
+    }
+
+
+def get_narrator_stats() -> Dict:
+    """Get statistics about narrators in the system"""
+    counters, _ = read_counters()
+    return {
+        'total_narrators': counters.get('narrators', 0),
+        'reliable_narrators': counters.get('narrators:reliability:thiqa', 0),
+        'average_lifespan': _average(counters.get('narrators:lifespan_total', 0),
+                                     counters.get('narrators:lifespan_count', 0), 1),
+    }
@@ -1,6 +1,37 @@
+import re
 from typing import List, Dict, Any
 from ..models import Narrator
 
+# Harakat, tanwin, shadda, sukun, Quranic marks, superscript alef and tatweel
+ARABIC_DIACRITICS_RE = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+NON_WORD_RE = re.compile(r'[\W_]+')
+ARABIC_LETTER_MAP = str.maketrans({
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ى': 'ي', 'ئ': 'ي', 'ؤ': 'و', 'ة': 'ه',
+})
+
+
+def normalize_arabic(text: str) -> str:
+    """
+    Normalize Arabic text for matching and comparison.
+
+    Strips diacritics and tatweel, unifies alef/yaa/taa marbuta variants,
+    replaces punctuation with spaces and collapses whitespace.
+
+    Args:
+        text: The text to normalize
+
+    Returns:
+        str: The normalized text
+    """
+    if not text:
+        return ''
+    text = ARABIC_DIACRITICS_RE.sub('', text)
+    text = text.translate(ARABIC_LETTER_MAP)
+    text = NON_WORD_RE.sub(' ', text)
+    return ' '.join(text.lower().split())
+
+
 def get_similar_narrators(name: str, threshold: float = 0.7) -> List[Dict[str, Any]]:
     """
     Find narrators with names similar to the given name.
@@ -22,8 +22,8 @@ def validate_sanad_text(value):
         raise ValidationError(_('Sanad text cannot be empty.'))
     
     # Check for minimum number of narrators (at least 2)
-    narrators = [n.strip() for n in value.split('\n') if n.strip()]
-    if len(narrators) < 2:
+    from .sanad_utils import parse_sanad_chain
+    if len(parse_sanad_chain(value)) < 2:
         raise ValidationError(_('A sanad must have at least two narrators.'))
 
 def validate_hadith_text(value):
@@ -1,3 +1,4 @@
+from .home_views import HomeView
 from .hadith_views import HadithListView, HadithDetailView, HadithCreateView, HadithUpdateView, HadithDeleteView
 from .narrator_views import NarratorListView, NarratorDetailView
 from .narrator_views_additional import NarratorCreateView, NarratorUpdateView, NarratorDeleteView
@@ -5,5 +6,8 @@ from .auth_views import LoginView, LogoutView, RegisterView
 from .profile_views import ProfileView, ProfileUpdateView
 from .search_views import SearchView
 from .set_theme import set_theme
-from .sanad_views import SanadCreateView
+from .sanad_views import SanadCreateView, subchain_search
 from .error_views import custom_404_view, custom_500_view
+from .job_views import job_status
+from .export_views import export_hadiths, export_tei
+from .cache_views import cache_stats
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.cache import caches
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from ..utils.conditional_utils import cache_policy
+
+
+@staff_member_required
+@require_GET
+@cache_policy(no_store=True)
+def cache_stats(request):
+    """
+    Return the hit and miss counts of each tier of the two-tier caches.
+
+    Counts are kept per worker process, so they describe the process that
+    served this request (its ``pid`` is included).
+    """
+    data = {
+        alias: caches[alias].stats()
+        for alias in settings.CACHES
+        if hasattr(caches[alias], 'stats')
+    }
+    return JsonResponse(data)
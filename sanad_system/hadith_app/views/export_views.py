@@ -0,0 +1,59 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
+from ..exporters import (
+    CONTENT_TYPES, EXPORT_FORMATS, TEI_CONTENT_TYPE, find_book, iter_export, iter_hadith_records, iter_tei,
+    source_queryset,
+)
+from ..models import HadithBook
+
+
+@staff_member_required
+@require_GET
+def export_hadiths(request):
+    """
+    Stream every hadith with its asanid and categories as a download.
+
+    Expects ``?format=jsonl`` (default) or ``?format=csv``. Rows are written
+    as they are read, so memory use does not grow with the corpus.
+    """
+    fmt = request.GET.get('format', 'jsonl')
+    if fmt not in EXPORT_FORMATS:
+        return JsonResponse({'error': _('صيغة التصدير غير مدعومة')}, status=400)
+
+    response = StreamingHttpResponse(iter_export(iter_hadith_records(), fmt), content_type=CONTENT_TYPES[fmt])
+    filename = f'hadiths-{timezone.localdate():%Y%m%d}.{fmt}'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@staff_member_required
+@require_GET
+def export_tei(request):
+    """
+    Stream the hadiths of one source as a TEI document.
+
+    Expects ``?source=<name>`` or ``?book=<HadithBook id>`` (whose title
+    names the source and whose details fill the TEI header).
+    """
+    if request.GET.get('book'):
+        try:
+            book = get_object_or_404(HadithBook, pk=int(request.GET['book']))
+        except ValueError:
+            raise Http404
+        source = book.title
+    elif request.GET.get('source'):
+        source = request.GET['source']
+        book = find_book(source)
+    else:
+        return JsonResponse({'error': _('يجب تحديد المصدر أو الكتاب')}, status=400)
+    if not source_queryset(source).exists():
+        raise Http404
+
+    response = StreamingHttpResponse(iter_tei(source, book), content_type=TEI_CONTENT_TYPE)
+    filename = f'hadiths-{timezone.localdate():%Y%m%d}.tei.xml'
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
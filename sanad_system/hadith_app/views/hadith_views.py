@@ -5,9 +5,13 @@ from django.urls import reverse_lazy
 from django.contrib import messages
 from django.utils.translation import gettext_lazy as _
 from django.db.models import Q
-from ..models import Hadith, Sanad, SanadNarrator
+from django.utils.decorators import method_decorator
+from ..models import Hadith
 from ..forms import HadithForm
-from .utils import parse_sanad_chain
+from ..utils.sanad_utils import create_sanad_from_text
+from ..utils.conditional_utils import conditional_page, hadith_page_state
+from ..utils.cache_utils import render_sanad_timelines
+from ..utils.hadith_utils import hadith_detail_queryset
 
 class HadithListView(ListView):
     model = Hadith
@@ -55,11 +59,27 @@ class HadithListView(ListView):
         
         return context
 
+@method_decorator(conditional_page(hadith_page_state), name='dispatch')
 class HadithDetailView(DetailView):
     model = Hadith
     template_name = 'hadith_app/hadith_detail.html'
     context_object_name = 'hadith'
 
+    def get_queryset(self):
+        # Categories and asanid prefetched; the chains come with the timelines
+        return hadith_detail_queryset(chains=False)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # The narrator timelines come from the fragment cache
+        context['asanid'] = list(self.object.asanid.all())
+        render_sanad_timelines(context['asanid'])
+        # Other versions of this hadith share its matn cluster (indexed lookup)
+        context['similar_hadiths'] = self.object.get_matn_variants().only(
+            'id', 'text', 'source', 'source_hadith_number'
+        )[:10]
+        return context
+
 class HadithCreateView(LoginRequiredMixin, CreateView):
     model = Hadith
     form_class = HadithForm
@@ -81,8 +101,7 @@ class HadithCreateView(LoginRequiredMixin, CreateView):
         # Parse sanad chain and create related objects
         sanad_text = form.cleaned_data.get('sanad_text')
         if sanad_text:
-            sanad = Sanad.objects.create(hadith=self.object)
-            parse_sanad_chain(sanad_text, sanad)
+            create_sanad_from_text(self.object, sanad_text)
         
         messages.success(self.request, _('تم إضافة الحديث بنجاح'))
         return super().form_valid(form)
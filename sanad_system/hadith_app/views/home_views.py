@@ -0,0 +1,13 @@
+from django.views.generic import TemplateView
+
+from ..utils.home_utils import get_home_snapshot
+
+
+class HomeView(TemplateView):
+    template_name = 'hadith_app/home.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Rendered in the background and served from the cache
+        context['home_snapshot'] = get_home_snapshot()
+        return context
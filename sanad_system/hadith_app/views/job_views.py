@@ -0,0 +1,34 @@
+from django.contrib.auth.decorators import login_required
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.translation import gettext_lazy as _
+from django.views.decorators.http import require_GET
+from ..jobs import can_view_job
+from ..models import Job
+from ..utils.conditional_utils import cache_policy
+
+
+@login_required
+@require_GET
+@cache_policy(no_store=True)  # polled until the job finishes
+def job_status(request, pk):
+    """Return the status and progress of a background job the user may follow."""
+    job = get_object_or_404(Job, pk=pk)
+    if not can_view_job(job, request.user):
+        raise Http404
+    data = {
+        'id': job.pk,
+        'name': job.name,
+        'status': job.status,
+        'status_display': job.get_status_display(),
+        'progress': job.progress,
+        'progress_message': job.progress_message,
+        'finished': job.is_finished,
+    }
+    if job.status == Job.SUCCEEDED:
+        data['result'] = job.result
+    elif job.status == Job.FAILED:
+        data['error'] = _('تعذر إكمال المهمة')
+        if request.user.is_staff:
+            data['traceback'] = job.error
+    return JsonResponse(data)
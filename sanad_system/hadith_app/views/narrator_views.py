@@ -7,9 +7,11 @@ from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.db.models import Q
 from django.contrib import messages
 from django.contrib.messages.views import SuccessMessageMixin
+from django.utils.decorators import method_decorator
 from ..models import Narrator, Hadith
 from ..forms import NarratorForm
-from ..utils import get_similar_narrators
+from ..utils.cache_utils import get_cached_similar_narrators
+from ..utils.conditional_utils import conditional_page, narrator_page_state
 
 class NarratorListView(ListView):
     model = Narrator
@@ -48,6 +50,7 @@ class NarratorListView(ListView):
         
         return context
 
+@method_decorator(conditional_page(narrator_page_state), name='dispatch')
 class NarratorDetailView(DetailView):
     model = Narrator
     template_name = 'hadith_app/narrator_detail.html'
@@ -55,7 +58,7 @@ class NarratorDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        narrator = self.get_object()
+        narrator = self.object
         
         # Get hadiths where this narrator is mentioned through SanadNarrator
         hadiths = Hadith.objects.filter(
@@ -63,7 +66,7 @@ class NarratorDetailView(DetailView):
         ).distinct()
         
         # Get similar narrators by name
-        similar_narrators = get_similar_narrators(narrator.name) if narrator.name else []
+        similar_narrators = get_cached_similar_narrators(narrator.name) if narrator.name else []
         
         # Add pagination
         paginator = Paginator(hadiths, 10)
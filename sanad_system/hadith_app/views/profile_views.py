@@ -6,6 +6,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse_lazy
 from ..models import UserProfile, Hadith
 from ..forms import ProfileUpdateForm
+from ..jobs import enqueue, resize_avatar
 from ..utils.user_utils import get_user_stats
 
 class ProfileView(LoginRequiredMixin, TemplateView):
@@ -48,5 +49,7 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
 
     def form_valid(self, form):
         response = super().form_valid(form)
+        if 'avatar' in form.changed_data and self.object.avatar:
+            enqueue(resize_avatar, {'profile_id': self.object.pk}, user=self.request.user)
         messages.success(self.request, _('تم تحديث الملف الشخصي بنجاح'))
         return response
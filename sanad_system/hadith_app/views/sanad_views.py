@@ -1,10 +1,15 @@
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_GET
 from django.views.generic import CreateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.messages.views import SuccessMessageMixin
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
-from ..models import Sanad, Hadith, SanadNarrator
+from ..models import Sanad
 from ..forms.sanad_forms import SanadForm
+from ..utils.conditional_utils import cache_policy
+from ..utils.lookup_utils import get_hadith
+from ..utils.sanad_utils import find_hadiths_by_subchain
 
 class SanadCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
     model = Sanad
@@ -19,10 +24,38 @@ class SanadCreateView(LoginRequiredMixin, SuccessMessageMixin, CreateView):
         context = super().get_context_data(**kwargs)
         context['title'] = _('إضافة سند جديد')
         context['action'] = _('إضافة')
-        context['hadith'] = Hadith.objects.get(pk=self.kwargs['hadith_id'])
+        context['hadith'] = get_hadith(self.kwargs['hadith_id'])
+        if context['hadith'] is None:
+            raise Http404(_('الحديث غير موجود'))
         return context
     
-    def form_valid(self, form):
-        form.instance.hadith_id = self.kwargs['hadith_id']
-        form.instance.added_by = self.request.user
-        return super().form_valid(form)
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['instance'] = Sanad(hadith_id=self.kwargs['hadith_id'])
+        return kwargs
+
+
+@require_GET
+@cache_policy(max_age=300, public=True)
+def subchain_search(request):
+    """
+    Return the hadiths transmitted through an ordered run of narrators.
+
+    Expects ``?narrators=<id>,<id>,...`` in chain order (at least two ids).
+    """
+    raw_ids = request.GET.get('narrators', '')
+    try:
+        narrator_ids = [int(value) for value in raw_ids.split(',') if value.strip()]
+    except ValueError:
+        return JsonResponse({'error': _('معرفات الرواة غير صالحة')}, status=400)
+    if len(narrator_ids) < 2:
+        return JsonResponse({'error': _('يجب تحديد راويين على الأقل')}, status=400)
+
+    hadiths = find_hadiths_by_subchain(narrator_ids).values('id', 'text', 'source')[:100]
+    return JsonResponse({
+        'narrators': narrator_ids,
+        'results': [
+            {'id': h['id'], 'text': h['text'][:200], 'source': h['source']}
+            for h in hadiths
+        ],
+    })
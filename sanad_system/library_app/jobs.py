@@ -0,0 +1,96 @@
+import html
+
+import docx
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+
+from hadith_app.jobs import register
+
+from .models import Document
+
+
+def converted_html_path(document):
+    """Storage path of the cached HTML rendering of a Word document."""
+    return f'library/html/document_{document.pk}.html'
+
+
+def get_converted_html(document):
+    """Return the cached HTML of ``document`` if it is newer than the document, else None."""
+    path = converted_html_path(document)
+    if not default_storage.exists(path):
+        return None
+    if document.updated_at and default_storage.get_modified_time(path) < document.updated_at:
+        return None
+    with default_storage.open(path, 'rb') as fp:
+        return fp.read().decode('utf-8')
+
+
+def document_to_html(file_path, progress=None):
+    """Render the paragraphs of a Word document as HTML."""
+    doc = docx.Document(file_path)
+    paragraphs = doc.paragraphs
+    parts = ['<div class="word-document">']
+
+    for index, para in enumerate(paragraphs, start=1):
+        # Get paragraph style
+        style = para.style.name.lower()
+
+        # Determine HTML tag based on style
+        if style == 'heading 1':
+            tag = 'h1'
+        elif style == 'heading 2':
+            tag = 'h2'
+        elif style == 'heading 3':
+            tag = 'h3'
+        else:
+            tag = 'p'
+
+        # Add paragraph content
+        parts.append(f'<{tag} class="word-{style}">')
+
+        # Process runs
+        for run in para.runs:
+            text = html.escape(run.text)
+
+            # Add styling
+            style_class = []
+            if run.bold:
+                style_class.append('bold')
+            if run.italic:
+                style_class.append('italic')
+            if run.underline:
+                style_class.append('underline')
+
+            if style_class:
+                text = f'<span class="word-{" ".join(style_class)}">{text}</span>'
+
+            parts.append(text)
+
+        parts.append(f'</{tag}>')
+        if progress and index % 200 == 0:
+            progress(index, len(paragraphs))
+
+    parts.append('</div>')
+    return ''.join(parts)
+
+
+def can_view_conversion(user, document_id):
+    """A conversion is followed by everyone who may view its document, not only the user who started it."""
+    return Document.objects.filter(pk=document_id).filter(
+        Q(is_public=True) | Q(uploaded_by_id=user.pk)
+    ).exists()
+
+
+# A document that cannot be parsed will not parse on a retry either
+@register('library.convert_word_document', max_attempts=1, viewable_by=can_view_conversion)
+def convert_word_document(job, document_id):
+    document = Document.objects.get(pk=document_id)
+    content = document_to_html(
+        document.file.path,
+        progress=lambda done, total: job.set_progress(done, total, 'تحويل الفقرات'),
+    )
+    path = converted_html_path(document)
+    default_storage.delete(path)
+    default_storage.save(path, ContentFile(content.encode('utf-8')))
+    return {'path': path, 'size': len(content)}
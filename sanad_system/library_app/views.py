@@ -2,7 +2,7 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib import messages
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, FileResponse, HttpResponse
@@ -10,15 +10,13 @@ from django.views.decorators.http import require_POST
 from django.core.exceptions import PermissionDenied
 from django.conf import settings
 import mimetypes
-import docx
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.shared import RGBColor
-import html
 import os
 
+from hadith_app.jobs import enqueue, find_active_job
+from hadith_app.utils.conditional_utils import cache_policy
 from .models import Document, DocumentType
 from .forms import DocumentForm, DocumentTypeForm
+from .jobs import convert_word_document, get_converted_html
 
 class DocumentListView(ListView):
     model = Document
@@ -57,6 +55,7 @@ class DocumentDetailView(DetailView):
         return queryset
 
 @login_required
+@cache_policy(max_age=600)
 def document_view(request, pk):
     document = get_object_or_404(Document, pk=pk)
     
@@ -78,6 +77,7 @@ def document_view(request, pk):
     )
 
 @login_required
+@cache_policy(max_age=600)  # the converted page, not the 202 job reply
 def word_to_html(request, pk):
     document = get_object_or_404(Document, pk=pk)
     
@@ -85,57 +85,19 @@ def word_to_html(request, pk):
     if not document.is_public and document.uploaded_by != request.user:
         raise PermissionDenied
     
-    # Get the file path
-    file_path = document.file.path
-    
-    # Read the Word document
-    doc = docx.Document(file_path)
-    
-    # Create HTML content
-    html_content = '<div class="word-document">'
-    
-    # Process paragraphs
-    for para in doc.paragraphs:
-        # Get paragraph style
-        style = para.style.name.lower()
-        
-        # Determine HTML tag based on style
-        if style == 'heading 1':
-            tag = 'h1'
-        elif style == 'heading 2':
-            tag = 'h2'
-        elif style == 'heading 3':
-            tag = 'h3'
-        else:
-            tag = 'p'
-        
-        # Add paragraph content
-        html_content += f'<{tag} class="word-{style}">'
-        
-        # Process runs
-        for run in para.runs:
-            text = html.escape(run.text)
-            
-            # Add styling
-            style_class = []
-            if run.bold:
-                style_class.append('bold')
-            if run.italic:
-                style_class.append('italic')
-            if run.underline:
-                style_class.append('underline')
-            
-            if style_class:
-                text = f'<span class="word-{" ".join(style_class)}">{text}</span>'
-            
-            html_content += text
-        
-        html_content += f'</{tag}>'
-    
-    html_content += '</div>'
-    
-    # Return HTML response
-    return HttpResponse(html_content, content_type='text/html')
+    # Serve the cached conversion when it is up to date
+    html_content = get_converted_html(document)
+    if html_content is not None:
+        return HttpResponse(html_content, content_type='text/html')
+    
+    # Otherwise convert in a background worker; the page polls the job
+    job = (find_active_job(convert_word_document, document_id=document.pk)
+           or enqueue(convert_word_document, {'document_id': document.pk}, user=request.user))
+    return JsonResponse({
+        'job': job.pk,
+        'status': job.status,
+        'status_url': reverse('hadith_app:job_status', args=[job.pk]),
+    }, status=202)
 
 class DocumentCreateView(LoginRequiredMixin, CreateView):
     model = Document
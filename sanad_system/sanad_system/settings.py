@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 from django.contrib.messages import constants as messages
 
@@ -57,6 +58,8 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files, precompressed (see STORAGES)
+    'hadith_app.middleware.CompressionMiddleware',  # Brotli/gzip for pages and JSON
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.locale.LocaleMiddleware',  # For language detection
     'hadith_app.middleware.ForceDefaultLanguageMiddleware',  # Force Arabic language
@@ -105,6 +108,45 @@ DATABASES = {
 }
 
 
+# Cache
+# A bounded in-process LRU with a short TTL (hadith_app.cache_backends) in
+# front of a cache shared by all worker processes: Redis when REDIS_URL is
+# set, files otherwise. The file cache lives next to the database it caches
+# so checkouts and databases never share entries; its incr() is not atomic,
+# so concurrent writers may see each other's changes only after
+# LOCAL_CACHE_TIMEOUT. Use Redis when several processes serve the site.
+# Tests get a per-process cache.
+
+REDIS_URL = config('REDIS_URL', default='')
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+if TESTING:
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+elif REDIS_URL:
+    SHARED_CACHE = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': REDIS_URL}
+else:
+    SHARED_CACHE = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': config('CACHE_DIR', default=os.path.join(
+            BASE_DIR, '.cache', Path(DATABASES['default']['NAME']).stem,
+        )),
+        'OPTIONS': {'MAX_ENTRIES': 50000},
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'hadith_app.cache_backends.TwoTierCache',
+        'LOCATION': 'shared',
+        'OPTIONS': {
+            'MAX_ENTRIES': config('LOCAL_CACHE_MAX_ENTRIES', default=2000, cast=int),
+            'LOCAL_TIMEOUT': config('LOCAL_CACHE_TIMEOUT', default=5, cast=int),
+            'SYNC_INTERVAL': config('LOCAL_CACHE_SYNC_INTERVAL', default=1, cast=float),
+        },
+    },
+    'shared': SHARED_CACHE,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -266,6 +308,11 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': False,
         },
+        'hadith_app': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
 SESSION_EXPIRE_AT_BROWSER_CLOSE = False
@@ -276,6 +323,12 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# collectstatic writes .gz (and .br when brotli is installed) next to each
+# file; WhiteNoise serves the variant the browser accepts
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'whitenoise.storage.CompressedStaticFilesStorage'},
+}
 
 # Media files
 MEDIA_URL = '/media/'